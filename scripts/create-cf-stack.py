@@ -7,8 +7,8 @@ from paramiko import SSHClient
 from boto import cloudformation
 from boto import regioninfo
 from boto import ec2
+from boto.exception import BotoServerError
 import argparse
-import time
 import logging
 import sys
 import random
@@ -18,6 +18,12 @@ import tempfile
 import paramiko
 import yaml
 import re
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "tests"))
+
+# pylint: disable=wrong-import-position
+from rhui3_tests_lib.polling import poll, PollTimeout, DONE
 
 # pylint: disable=W0621
 
@@ -540,24 +546,27 @@ if args.dry_run:
 con_cf.create_stack(STACK_ID, template_body=json_body,
                     parameters=parameters, timeout_in_minutes=args.timeout)
 
-is_complete = False
-result = False
-while not is_complete:
-    time.sleep(10)
-    try:
-        for event in con_cf.describe_stack_events(STACK_ID):
-            if event.resource_type == "AWS::CloudFormation::Stack" and event.resource_status == "CREATE_COMPLETE":
-                logging.info("Stack creation completed")
-                is_complete = True
-                result = True
-                break
-            if event.resource_type == "AWS::CloudFormation::Stack" and event.resource_status == "ROLLBACK_COMPLETE":
-                logging.info("Stack creation failed")
-                is_complete = True
-                break
-    except:
-        # Sometimes 'Rate exceeded' happens
-        pass
+def stack_status():
+    '''
+    the final status of the stack creation, or None if it's still in progress
+    '''
+    for event in con_cf.describe_stack_events(STACK_ID):
+        if event.resource_type == "AWS::CloudFormation::Stack" and \
+           event.resource_status in ["CREATE_COMPLETE", "ROLLBACK_COMPLETE"]:
+            return event.resource_status
+    return None
+
+# sometimes 'Rate exceeded' happens; give the stack extra time to roll back if it fails
+try:
+    status = poll(stack_status, "stack.create", timeout=(args.timeout + 30) * 60,
+                  done=lambda status: status == "CREATE_COMPLETE",
+                  stop=lambda status: status == "ROLLBACK_COMPLETE",
+                  errors=(BotoServerError,), initial=10, maximum=30)
+    result = status.outcome == DONE
+except PollTimeout as err:
+    logging.error(err)
+    result = False
+logging.info("Stack creation %s", "completed" if result else "failed")
 
 if not result:
     sys.exit(1)
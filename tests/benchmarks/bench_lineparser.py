@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+'''
+   Benchmark: parsing CDS/HAProxy listings of 1,000 and 10,000 instances
+   with the previous and the current line parser.
+   Run "python benchmarks/bench_lineparser.py" in the tests directory.
+'''
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from rhui3_tests_lib.instance import Instance
+
+SIZES = [1000, 10000]
+
+def listing(size):
+    '''
+    the lines of the instance list screen with the given number of instances
+    '''
+    yield "-= Red Hat Update Infrastructure Management Tool =-"
+    yield ""
+    for number in range(size):
+        yield "  Hostname:             cds%05d.example.com" % number
+        yield "  SSH Username:         ec2-user"
+        yield "  SSH Private Key:      /root/.ssh/id_rsa_rhua"
+        yield ""
+    yield "rhui (cds) => "
+
+def legacy(lines):
+    '''
+    what the library used to do: keep appending to the pairs of the parser instance
+    and map all of them onto each new item
+    '''
+    mapping = Instance.parser.mapping
+    index = 0
+    pairs = []
+    items = []
+    for line in lines:
+        name, pattern = mapping[index]
+        match = pattern.match(line)
+        if match is None:
+            continue
+        pairs.append((name, match.groups()))
+        index = (index + 1) % len(mapping)
+        if index == 0:
+            items.append(Instance.from_parsed_item_pairs(pairs))
+    return items
+
+def timed(func, lines):
+    '''
+    the number of seconds the function took to parse the lines, and the result
+    '''
+    start = time.time()
+    result = func(lines)
+    return time.time() - start, result
+
+def main():
+    '''
+    time both parsers and check that they agree
+    '''
+    for size in SIZES:
+        lines = list(listing(size))
+        legacy_time, legacy_items = timed(legacy, lines)
+        current_time, current_items = timed(Instance.parse, lines)
+        stream_time, stream_items = timed(Instance.parse, listing(size))
+        assert legacy_items == [item for _, item in current_items] == \
+               [item for _, item in stream_items]
+        print("%6d instances: legacy %8.3f s, current %8.3f s (%.1fx), from a generator %8.3f s" %
+              (size, legacy_time, current_time, legacy_time / current_time, stream_time))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+'''
+   Benchmark: parsing synthetic rhui-manager output for 5,000 repositories (and as many
+   subscriptions and entitlements) the ad-hoc way the library used to and with the parsing module.
+   Run "python benchmarks/bench_parsing.py [repos]" in the tests directory.
+'''
+
+from __future__ import print_function
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from rhui3_tests_lib import parsing
+
+def names(size):
+    '''
+    the repository names
+    '''
+    return ["Red Hat Enterprise Linux Test %05d (RPMs) (x86_64)" % number
+            for number in range(size)]
+
+def status_output(size):
+    '''
+    rhui-manager status
+    '''
+    lines = ["Entitlement CA certificate expiration date = 2038-01-19 (OK)", ""]
+    lines += ["%s ..... \x1b[92mSuccess\x1b[0m" % name for name in names(size)]
+    return "\n".join(lines) + "\n"
+
+def subscriptions_output(size):
+    '''
+    rhui-manager subscriptions list
+    '''
+    lines = []
+    for number in range(size):
+        lines += ["  Label: Subscription %05d" % number, "  Pool ID: %032x" % number, ""]
+    return "\n".join(lines) + "\n"
+
+def entitlements_output(size):
+    '''
+    rhui-manager cert info
+    '''
+    lines = ["Red Hat Entitlements", "", "  \x1b[92mValid\x1b[0m"]
+    for name in names(size):
+        lines += ["    " + name, "      Expiration: 2038-01-19  Certificate: rhcert.pem"]
+    return "\n".join(lines) + "\n"
+
+def info_output(_):
+    '''
+    rhui-manager repo info
+    '''
+    return "\n".join(["Name:                Red Hat Enterprise Linux Test (RPMs)",
+                      "ID:                  rhel-test-rpms",
+                      "Type:                Red Hat",
+                      "Relative Path:       content/dist/rhel/rhui/test/os",
+                      "GPG Check:           Yes",
+                      "Custom GPG Keys:     (None)",
+                      "Red Hat GPG Key:     Yes",
+                      "Package Count:       5000",
+                      "Last Sync:           01-19-2038 03:14",
+                      "Next Sync:           01-19-2038 09:14"]) + "\n"
+
+def legacy_status(output, size):
+    '''
+    one DOTALL regex over the whole output per repository
+    '''
+    return dict((name, re.match(".*%s[^A-Z]*([A-Za-z]*).*" % re.escape(name),
+                                output, re.DOTALL).group(1))
+                for name in names(size))
+
+def legacy_subscriptions(output, _):
+    '''
+    two filtered lists zipped together
+    '''
+    subs = output.splitlines()
+    labels = [l.replace("  Label: ", "") for l in subs if l.startswith("  Label")]
+    poolids = [p.replace("  Pool ID: ", "") for p in subs if p.startswith("  Pool")]
+    return dict(zip(labels, poolids))
+
+def legacy_entitlements(output, _):
+    '''
+    left-stripped lines except the ones with the expiration info
+    '''
+    lines = list(map(str.lstrip, output.splitlines()))
+    return [line for line in lines[3:] if line and not line.startswith("Expiration")]
+
+def legacy_info(output, _):
+    '''
+    the lines split into a dict with mangled keys
+    '''
+    pairs = [line.split(":", 1) for line in output.splitlines()]
+    return dict((pair[0].replace(" ", "").lower(), pair[1].lstrip()) for pair in pairs)
+
+# each way is timed this many times and the best time counts, which evens out the noise
+RUNS = 5
+
+CASES = [("status", status_output, legacy_status,
+          lambda output, _: dict(parsing.parse_status(output))),
+         ("subscriptions list", subscriptions_output, legacy_subscriptions,
+          lambda output, _: parsing.parse_subscriptions(output)),
+         ("cert info", entitlements_output, legacy_entitlements,
+          lambda output, _: parsing.parse_entitlement_names(output)),
+         ("repo info x1000", info_output,
+          lambda output, size: [legacy_info(output, size) for _ in range(1000)],
+          lambda output, size: [parsing.parse_repo_info(output) for _ in range(1000)])]
+
+def timed(func, output, size):
+    '''
+    the number of seconds the function took at best (of RUNS runs), and the result
+    '''
+    best = None
+    for _ in range(RUNS):
+        start = time.time()
+        result = func(output, size)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    '''
+    time both ways for each kind of output
+    '''
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for name, make_output, legacy, current in CASES:
+        output = make_output(size)
+        legacy_time, legacy_result = timed(legacy, output, size)
+        current_time, current_result = timed(current, output, size)
+        if name != "repo info x1000":
+            assert len(legacy_result) == len(current_result) == size
+        print("%-20s legacy %8.3f s, parsing %8.3f s (%.1fx)" %
+              (name, legacy_time, current_time, legacy_time / current_time))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+'''
+   Micro-benchmark: building the rhui-manager prompt patterns on every call, as the library
+   (and stitches' Expect.expect) used to, vs. getting them from the prompt registry, analyzed.
+   Run "python benchmarks/bench_prompts.py" in the tests directory.
+'''
+
+from __future__ import print_function
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from rhui3_tests_lib import prompts
+from rhui3_tests_lib.expect import _matcher
+
+NUMBER = 20000
+SCREENS = ["repo", "cds", "loadbalancers", "sync", "client", "entitlements", "subscriptions"]
+CAPTION = "The following product repositories will be deployed:"
+
+def inline():
+    '''
+    what the library used to do: concatenate and compile (re's own cache of compiled
+    patterns makes the compilation a lookup after the first call)
+    '''
+    for name in SCREENS:
+        re.compile(".*" + r"rhui \(" + name + r"\) =>" + ".*", re.DOTALL)
+    re.compile(".*" + "" + r".*rhui \(.*\) =>" + ".*", re.DOTALL)
+    re.compile(".*" + CAPTION + r"\r\n(.*)\r\nProceed\? \(y/n\).*", re.DOTALL)
+
+def registry():
+    '''
+    the same patterns from the registry
+    '''
+    for name in SCREENS:
+        _matcher(prompts.screen(name))
+    _matcher(prompts.any_screen(""))
+    _matcher(prompts.proceed_with(CAPTION))
+
+def main():
+    '''
+    time both ways and print the per-call figures
+    '''
+    calls = NUMBER * (len(SCREENS) + 2)
+    results = [(name, min(timeit.repeat(func, number=NUMBER, repeat=3)))
+               for name, func in [("inline", inline), ("registry", registry)]]
+    for name, seconds in results:
+        print("%-10s %8.3f us per pattern" % (name, seconds / calls * 1e6))
+    print("speedup    %8.1fx" % (results[0][1] / results[1][1]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+'''
+   Benchmark: drive rhui-manager screens through the library against the simulated RHUA.
+   Run "python benchmarks/bench_screens.py [repos] [latency]" in the tests directory;
+   the default is 10000 repositories and no latency.
+'''
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from rhui3_tests_lib.conmgr import ConMgr
+from rhui3_tests_lib.rhuimanager import RHUIManagerSession
+from rhui3_tests_lib.rhuimanager_cmdline import RHUIManagerCLI
+from rhui3_tests_lib.rhuimanager_instance import RHUIManagerInstance
+from rhui3_tests_lib.rhuimanager_repo import RHUIManagerRepo
+
+SELECTED = 10
+
+def timed(name, func, *args):
+    '''
+    run the function once and print how long it took
+    '''
+    start = time.time()
+    result = func(*args)
+    print("%-30s %8.3f s" % (name, time.time() - start))
+    return result
+
+def main():
+    '''
+    time typical operations
+    '''
+    repos = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    rhua = ConMgr.use_simulator(repos=repos, available=SELECTED, cds=3, latency=latency)
+    connection = ConMgr.connect()
+    names = [repo.name for repo in rhua.sorted_repos()]
+    timed("repo list (screen)", RHUIManagerRepo.list, connection)
+    timed("repo list (command)", RHUIManagerCLI.repo_list, connection)
+    timed("cds list", RHUIManagerInstance.list, connection, "cds")
+    timed("add %d repos" % SELECTED, RHUIManagerRepo.add_rh_repo_by_repo, connection,
+          [repo.name for repo in rhua.unused()])
+    timed("delete %d repos" % SELECTED, RHUIManagerRepo.delete_repo, connection,
+          names[-SELECTED:])
+    with RHUIManagerSession(connection) as session:
+        timed("repo list x10 (session)",
+              lambda: [RHUIManagerRepo.list(session) for _ in range(10)])
+
+if __name__ == "__main__":
+    main()
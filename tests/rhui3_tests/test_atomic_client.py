@@ -12,10 +12,9 @@ from stitches.expect import Expect
 import yaml
 
 from rhui3_tests_lib.conmgr import ConMgr
+from rhui3_tests_lib.operations import Operations
 from rhui3_tests_lib.rhuimanager import RHUIManager
 from rhui3_tests_lib.rhuimanager_client import RHUIManagerClient
-from rhui3_tests_lib.rhuimanager_entitlement import RHUIManagerEntitlements
-from rhui3_tests_lib.rhuimanager_instance import RHUIManagerInstance
 from rhui3_tests_lib.rhuimanager_repo import RHUIManagerRepo
 from rhui3_tests_lib.rhuimanager_sync import RHUIManagerSync
 from rhui3_tests_lib.util import Util
@@ -63,27 +62,26 @@ class TestClient(object):
         '''
            add a CDS
         '''
-        cds_list = RHUIManagerInstance.list(RHUA, "cds")
+        cds_list = Operations.list_instances(RHUA, "cds")
         nose.tools.assert_equal(cds_list, [])
-        RHUIManagerInstance.add_instance(RHUA, "cds")
+        Operations.add_instance(RHUA, "cds")
 
     @staticmethod
     def test_03_add_hap():
         '''
            add an HAProxy Load-balancer
         '''
-        hap_list = RHUIManagerInstance.list(RHUA, "loadbalancers")
+        hap_list = Operations.list_instances(RHUA, "loadbalancers")
         nose.tools.assert_equal(hap_list, [])
-        RHUIManagerInstance.add_instance(RHUA, "loadbalancers")
+        Operations.add_instance(RHUA, "loadbalancers")
 
     @staticmethod
     def test_04_upload_atomic_cert():
         '''
            upload the Atomic cert
         '''
-        entlist = RHUIManagerEntitlements.upload_rh_certificate(RHUA,
-                                                                "/tmp/extra_rhui_files/" +
-                                                                "rhcert_atomic.pem")
+        entlist = Operations.upload_certificate(RHUA,
+                                                "/tmp/extra_rhui_files/rhcert_atomic.pem")
         nose.tools.assert_not_equal(len(entlist), 0)
 
     def test_05_add_atomic_repo(self):
@@ -203,9 +201,9 @@ class TestClient(object):
            remove the repo and RH cert, uninstall CDS and HAProxy, delete the ostree configuration
         '''
         RHUIManagerRepo.delete_all_repos(RHUA)
-        nose.tools.assert_equal(RHUIManagerRepo.list(RHUA), [])
-        RHUIManagerInstance.delete_all(RHUA, "loadbalancers")
-        RHUIManagerInstance.delete_all(RHUA, "cds")
+        nose.tools.assert_equal(Operations.list_repos(RHUA), [])
+        Operations.delete_instances(RHUA, "loadbalancers")
+        Operations.delete_instances(RHUA, "cds")
         Expect.expect_retval(RHUA, "rm -f /root/test_atomic_ent_cli*")
         Expect.expect_retval(RHUA, "rm -f /root/test_atomic_pkg.tar.gz")
         RHUIManager.remove_rh_certs(RHUA)
@@ -10,6 +10,7 @@ import nose
 from stitches.expect import CTRL_C, Expect
 
 from rhui3_tests_lib.conmgr import ConMgr, SUDO_USER_NAME, SUDO_USER_KEY
+from rhui3_tests_lib.fanout import fan_out
 from rhui3_tests_lib.helpers import Helpers
 from rhui3_tests_lib.rhui_cmd import RHUICLI
 from rhui3_tests_lib.rhuimanager import RHUIManager
@@ -260,8 +261,11 @@ def test_21_check_cleanup():
     dirty_hosts = dict()
     errors = []
 
-    dirty_hosts["httpd"] = [cds.hostname for cds in CDS if Helpers.check_service(cds, service)]
-    dirty_hosts["mount"] = [cds.hostname for cds in CDS if Helpers.check_mountpoint(cds, mdir)]
+    checks = fan_out(CDS, lambda cds: (Helpers.check_service(cds, service),
+                                       Helpers.check_mountpoint(cds, mdir)))
+    checks.check()
+    dirty_hosts["httpd"] = checks.hosts_where(lambda status: status[0])
+    dirty_hosts["mount"] = checks.hosts_where(lambda status: status[1])
 
     if dirty_hosts["httpd"]:
         errors.append("Apache is still running on %s" % dirty_hosts["httpd"])
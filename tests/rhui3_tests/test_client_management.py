@@ -23,10 +23,9 @@ import yaml
 
 from rhui3_tests_lib.conmgr import ConMgr
 from rhui3_tests_lib.helpers import Helpers
+from rhui3_tests_lib.operations import Operations
 from rhui3_tests_lib.rhuimanager import RHUIManager
 from rhui3_tests_lib.rhuimanager_client import RHUIManagerClient
-from rhui3_tests_lib.rhuimanager_entitlement import RHUIManagerEntitlements
-from rhui3_tests_lib.rhuimanager_instance import RHUIManagerInstance
 from rhui3_tests_lib.rhuimanager_repo import RHUIManagerRepo
 from rhui3_tests_lib.rhuimanager_sync import RHUIManagerSync
 from rhui3_tests_lib.util import Util
@@ -55,30 +54,28 @@ class TestClient(object):
        class for client tests
     '''
 
-    def __init__(self):
+    @classmethod
+    def setup_class(cls):
+        '''
+           announce the beginning of the test run, gather the test data
+        '''
+        print("*** Running %s: *** " % basename(__file__))
         try:
-            self.custom_rpm = Util.get_rpms_in_dir(RHUA, CUSTOM_RPMS_DIR)[0]
+            cls.custom_rpm = Util.get_rpms_in_dir(RHUA, CUSTOM_RPMS_DIR)[0]
         except IndexError:
             raise RuntimeError("No custom RPMs to test in %s" % CUSTOM_RPMS_DIR)
-        self.version = Util.get_rhel_version(CLI)["major"]
+        cls.version = Util.get_rhel_version(CLI)["major"]
         arch = Util.get_arch(CLI)
         with open("/etc/rhui3_tests/tested_repos.yaml") as configfile:
             doc = yaml.load(configfile)
             try:
-                self.yum_repo_name = doc["yum_repos"][self.version][arch]["name"]
-                self.yum_repo_version = doc["yum_repos"][self.version][arch]["version"]
-                self.yum_repo_kind = doc["yum_repos"][self.version][arch]["kind"]
-                self.yum_repo_path = doc["yum_repos"][self.version][arch]["path"]
-                self.test_package = doc["yum_repos"][self.version][arch]["test_package"]
+                cls.yum_repo_name = doc["yum_repos"][cls.version][arch]["name"]
+                cls.yum_repo_version = doc["yum_repos"][cls.version][arch]["version"]
+                cls.yum_repo_kind = doc["yum_repos"][cls.version][arch]["kind"]
+                cls.yum_repo_path = doc["yum_repos"][cls.version][arch]["path"]
+                cls.test_package = doc["yum_repos"][cls.version][arch]["test_package"]
             except KeyError:
-                raise nose.SkipTest("No test repo defined for RHEL %s on %s" % (self.version, arch))
-
-    @staticmethod
-    def setup_class():
-        '''
-           announce the beginning of the test run
-        '''
-        print("*** Running %s: *** " % basename(__file__))
+                raise nose.SkipTest("No test repo defined for RHEL %s on %s" % (cls.version, arch))
 
     @staticmethod
     def test_01_init():
@@ -92,7 +89,7 @@ class TestClient(object):
            upload a new or updated Red Hat content certificate
         '''
         if not getenv("RHUISKIPSETUP"):
-            entlist = RHUIManagerEntitlements.upload_rh_certificate(RHUA)
+            entlist = Operations.upload_certificate(RHUA)
             nose.tools.assert_not_equal(len(entlist), 0)
 
     @staticmethod
@@ -101,9 +98,9 @@ class TestClient(object):
             add a CDS
         '''
         if not getenv("RHUISKIPSETUP"):
-            cds_list = RHUIManagerInstance.list(RHUA, "cds")
+            cds_list = Operations.list_instances(RHUA, "cds")
             nose.tools.assert_equal(cds_list, [])
-            RHUIManagerInstance.add_instance(RHUA, "cds")
+            Operations.add_instance(RHUA, "cds")
 
     @staticmethod
     def test_04_add_hap():
@@ -111,9 +108,9 @@ class TestClient(object):
             add an HAProxy Load-balancer
         '''
         if not getenv("RHUISKIPSETUP"):
-            hap_list = RHUIManagerInstance.list(RHUA, "loadbalancers")
+            hap_list = Operations.list_instances(RHUA, "loadbalancers")
             nose.tools.assert_equal(hap_list, [])
-            RHUIManagerInstance.add_instance(RHUA, "loadbalancers")
+            Operations.add_instance(RHUA, "loadbalancers")
 
     def test_05_add_upload_sync_stuff(self):
         '''
@@ -304,15 +301,15 @@ class TestClient(object):
         '''
         test_rpm_name = self.custom_rpm.rsplit('-', 2)[0]
         RHUIManagerRepo.delete_all_repos(RHUA)
-        nose.tools.assert_equal(RHUIManagerRepo.list(RHUA), [])
+        nose.tools.assert_equal(Operations.list_repos(RHUA), [])
         Expect.expect_retval(RHUA, "rm -f /root/test_ent_cli*")
         Expect.expect_retval(RHUA, "rm -rf /root/test_cli_rpm-3.0/")
         Util.remove_rpm(CLI, [self.test_package, "test_cli_rpm", test_rpm_name])
         rmtree(TMPDIR)
         Helpers.del_legacy_ca(CDS, LEGACY_CA_FILE)
         if not getenv("RHUISKIPSETUP"):
-            RHUIManagerInstance.delete_all(RHUA, "loadbalancers")
-            RHUIManagerInstance.delete_all(RHUA, "cds")
+            Operations.delete_instances(RHUA, "loadbalancers")
+            Operations.delete_instances(RHUA, "cds")
             RHUIManager.remove_rh_certs(RHUA)
 
     @staticmethod
@@ -7,7 +7,6 @@ from os.path import basename, getsize, join
 import re
 from shutil import rmtree
 from tempfile import mkdtemp
-import time
 
 try:
     from configparser import ConfigParser # Python 3+
@@ -18,6 +17,7 @@ from stitches.expect import Expect
 import yaml
 
 from rhui3_tests_lib.conmgr import ConMgr
+from rhui3_tests_lib.polling import poll
 from rhui3_tests_lib.rhuimanager import RHUIManager
 from rhui3_tests_lib.rhuimanager_cmdline import RHUIManagerCLI, \
                                                 CustomRepoAlreadyExists, \
@@ -177,7 +177,7 @@ class TestCLI(object):
     def test_16_repo_info(self):
         '''verify that the repo name is part of the information about the specified repo ID'''
         info = RHUIManagerCLI.repo_info(RHUA, self.yum_repo_ids[1])
-        nose.tools.eq_(info["name"], self.yum_repo_names[1])
+        nose.tools.eq_(info.name, self.yum_repo_names[1])
 
     def test_17_check_package_in_repo(self):
         '''check a random package in the repo'''
@@ -477,9 +477,9 @@ class TestCLI(object):
         # for RHBZ#1651638
         RHUIManagerCLI.cert_upload(RHUA, "%s/%s" % (DATADIR, CERTS["Atomic"]))
         RHUIManagerCLI.repo_add(RHUA, self.product["name"])
-        # wait a few seconds for the repo to actually get added
-        time.sleep(4)
-        repolist_actual = RHUIManagerCLI.repo_list(RHUA, True).splitlines()
+        # wait for the repo to actually get added
+        repolist_actual = poll(lambda: RHUIManagerCLI.repo_list(RHUA, True).splitlines(),
+                               "cli.repo_add.list", timeout=30).value
         nose.tools.eq_([self.product["id"]], repolist_actual)
 
     def test_99_cleanup(self):
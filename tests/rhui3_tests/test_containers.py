@@ -10,7 +10,6 @@ from __future__ import print_function
 
 from os import getenv
 from os.path import basename
-import time
 
 import logging
 import nose
@@ -19,9 +18,10 @@ import yaml
 
 from rhui3_tests_lib.conmgr import ConMgr
 from rhui3_tests_lib.helpers import Helpers
+from rhui3_tests_lib.operations import Operations
+from rhui3_tests_lib.polling import poll
 from rhui3_tests_lib.rhuimanager import RHUIManager
 from rhui3_tests_lib.rhuimanager_client import RHUIManagerClient
-from rhui3_tests_lib.rhuimanager_instance import RHUIManagerInstance
 from rhui3_tests_lib.rhuimanager_repo import RHUIManagerRepo
 from rhui3_tests_lib.rhuimanager_sync import RHUIManagerSync
 from rhui3_tests_lib.util import Util
@@ -43,9 +43,14 @@ class TestClient(object):
        class for container tests
     '''
 
-    def __init__(self):
-        self.cli_os_version = Util.get_rhel_version(CLI)["major"]
-        self.cli_supported = self.cli_os_version in [7, 8]
+    @classmethod
+    def setup_class(cls):
+        '''
+           announce the beginning of the test run, gather the test data
+        '''
+        print("*** Running %s: *** " % basename(__file__))
+        cls.cli_os_version = Util.get_rhel_version(CLI)["major"]
+        cls.cli_supported = cls.cli_os_version in [7, 8]
 
         arch = Util.get_arch(CLI)
 
@@ -53,21 +58,14 @@ class TestClient(object):
             doc = yaml.load(configfile)
 
         try:
-            self.container_name = doc["container_rhel7"][arch]["name"]
-            self.container_id = doc["container_rhel7"][arch]["id"]
-            self.container_displayname = doc["container_rhel7"][arch]["displayname"]
+            cls.container_name = doc["container_rhel7"][arch]["name"]
+            cls.container_id = doc["container_rhel7"][arch]["id"]
+            cls.container_displayname = doc["container_rhel7"][arch]["displayname"]
         except KeyError:
             raise nose.SkipTest("No test container defined for %s" % arch)
 
-        self.container_quay = doc["container_alt"]["quay"]
-        self.container_docker = doc["container_alt"]["docker"]
-
-    @staticmethod
-    def setup_class():
-        '''
-           announce the beginning of the test run
-        '''
-        print("*** Running %s: *** " % basename(__file__))
+        cls.container_quay = doc["container_alt"]["quay"]
+        cls.container_docker = doc["container_alt"]["docker"]
 
     @staticmethod
     def test_01_init():
@@ -81,7 +79,7 @@ class TestClient(object):
             add a CDS
         '''
         if not getenv("RHUISKIPSETUP"):
-            RHUIManagerInstance.add_instance(RHUA, "cds")
+            Operations.add_instance(RHUA, "cds")
 
     @staticmethod
     def test_03_add_hap():
@@ -89,7 +87,7 @@ class TestClient(object):
             add an HAProxy Load-balancer
         '''
         if not getenv("RHUISKIPSETUP"):
-            RHUIManagerInstance.add_instance(RHUA, "loadbalancers")
+            Operations.add_instance(RHUA, "loadbalancers")
 
     def test_04_add_containers(self):
         '''
@@ -175,12 +173,9 @@ class TestClient(object):
                           Util.safe_pulp_repo_name(self.container_docker["name"])]:
             cmd = "docker pull %s" % container
             # in some cases the container is synced but pulling fails mysteriously
-            # if that happens, try again in a minute
-            try:
-                Expect.expect_retval(CLI, cmd, timeout=30)
-            except ExpectFailed:
-                time.sleep(60)
-                Expect.expect_retval(CLI, cmd, timeout=30)
+            # if that happens, keep trying for a while
+            poll(lambda: Expect.expect_retval(CLI, cmd, timeout=30), "docker.pull",
+                 timeout=180, done=lambda _: True, errors=(ExpectFailed,), initial=5, maximum=60)
 
     def test_10_check_images(self):
         '''
@@ -223,8 +218,8 @@ class TestClient(object):
         Expect.expect_retval(RHUA, "rm -rf /tmp/%s*" % CONF_RPM_NAME)
         RHUIManagerRepo.delete_all_repos(RHUA)
         if not getenv("RHUISKIPSETUP"):
-            RHUIManagerInstance.delete_all(RHUA, "loadbalancers")
-            RHUIManagerInstance.delete_all(RHUA, "cds")
+            Operations.delete_instances(RHUA, "loadbalancers")
+            Operations.delete_instances(RHUA, "cds")
 
     @staticmethod
     def teardown_class():
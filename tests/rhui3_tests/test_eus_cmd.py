@@ -38,29 +38,27 @@ class TestEUSCLI(object):
     class to test EUS repos via the CLI
     '''
 
-    def __init__(self):
-        self.cli_version = Util.get_rhel_version(CLI)["major"]
+    @classmethod
+    def setup_class(cls):
+        '''
+        announce the beginning of the test run, gather the test data
+        '''
+        print("*** Running %s: *** " % basename(__file__))
+        cls.cli_version = Util.get_rhel_version(CLI)["major"]
         arch = Util.get_arch(CLI)
         with open("/etc/rhui3_tests/tested_repos.yaml") as configfile:
             doc = yaml.load(configfile)
             try:
-                self.repo_id = doc["EUS_repos"][self.cli_version]["id"]
-                self.repo_label = doc["EUS_repos"][self.cli_version]["label"]
-                self.repo_name = doc["EUS_repos"][self.cli_version]["name"]
-                self.repo_path = doc["EUS_repos"][self.cli_version]["path"]
-                self.test_package = doc["EUS_repos"][self.cli_version]["test_package"]
+                cls.repo_id = doc["EUS_repos"][cls.cli_version]["id"]
+                cls.repo_label = doc["EUS_repos"][cls.cli_version]["label"]
+                cls.repo_name = doc["EUS_repos"][cls.cli_version]["name"]
+                cls.repo_path = doc["EUS_repos"][cls.cli_version]["path"]
+                cls.test_package = doc["EUS_repos"][cls.cli_version]["test_package"]
             except KeyError as version:
                 raise nose.SkipTest("No test repo defined for RHEL %s" % version)
-            if not self.repo_id.endswith(arch):
+            if not cls.repo_id.endswith(arch):
                 raise nose.SkipTest("No test repo defined for %s" % arch)
 
-    @staticmethod
-    def setup_class():
-        '''
-        announce the beginning of the test run
-        '''
-        print("*** Running %s: *** " % basename(__file__))
-
     @staticmethod
     def test_01_initial_run():
         '''
@@ -16,9 +16,9 @@ import nose
 from stitches.expect import Expect
 
 from rhui3_tests_lib.conmgr import ConMgr
+from rhui3_tests_lib.operations import Operations
 from rhui3_tests_lib.rhuimanager import RHUIManager
 from rhui3_tests_lib.rhuimanager_client import RHUIManagerClient
-from rhui3_tests_lib.rhuimanager_instance import RHUIManagerInstance
 from rhui3_tests_lib.rhuimanager_repo import RHUIManagerRepo
 from rhui3_tests_lib.util import Util
 
@@ -56,14 +56,14 @@ def test_02_add_cds():
         add a CDS
     '''
     if not getenv("RHUISKIPSETUP"):
-        RHUIManagerInstance.add_instance(RHUA, "cds")
+        Operations.add_instance(RHUA, "cds")
 
 def test_03_add_hap():
     '''
         add an HAProxy Load-balancer
     '''
     if not getenv("RHUISKIPSETUP"):
-        RHUIManagerInstance.add_instance(RHUA, "loadbalancers")
+        Operations.add_instance(RHUA, "loadbalancers")
 
 def test_04_create_custom_repo():
     '''
@@ -177,8 +177,8 @@ def test_99_cleanup():
     RHUIManagerRepo.delete_all_repos(RHUA)
     Expect.expect_retval(RHUA, "rm -rf /tmp/%s*" % REPO)
     if not getenv("RHUISKIPSETUP"):
-        RHUIManagerInstance.delete_all(RHUA, "loadbalancers")
-        RHUIManagerInstance.delete_all(RHUA, "cds")
+        Operations.delete_instances(RHUA, "loadbalancers")
+        Operations.delete_instances(RHUA, "cds")
 
 def teardown():
     '''
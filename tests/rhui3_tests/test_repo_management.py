@@ -26,7 +26,7 @@ logging.basicConfig(level=logging.DEBUG)
 
 RHUA = ConMgr.connect()
 # side channel for hacking
-RHUA_2 = ConMgr.connect()
+RHUA_2 = ConMgr.connect(pooled=False)
 
 CUSTOM_REPOS = ["custom-i386-x86_64", "custom-x86_64-x86_64", "custom-i386-i386"]
 CUSTOM_PATHS = [repo.replace("-", "/") for repo in CUSTOM_REPOS]
@@ -37,27 +37,25 @@ class TestRepo(object):
        class for repository manipulation tests
     '''
 
-    def __init__(self):
-        self.custom_rpms = Util.get_rpms_in_dir(RHUA, CUSTOM_RPMS_DIR)
-        if not self.custom_rpms:
+    @classmethod
+    def setup_class(cls):
+        '''
+           announce the beginning of the test run, gather the test data
+        '''
+        print("*** Running %s: *** " % basename(__file__))
+        cls.custom_rpms = Util.get_rpms_in_dir(RHUA, CUSTOM_RPMS_DIR)
+        if not cls.custom_rpms:
             raise RuntimeError("No custom RPMs to test in %s" % CUSTOM_RPMS_DIR)
         # Test the RHEL-6 repo for a change
         version = 6
         arch = "x86_64"
         with open("/etc/rhui3_tests/tested_repos.yaml") as configfile:
             doc = yaml.load(configfile)
-            self.yum_repo_name = doc["yum_repos"][version][arch]["name"]
-            self.yum_repo_version = doc["yum_repos"][version][arch]["version"]
-            self.yum_repo_kind = doc["yum_repos"][version][arch]["kind"]
-            self.yum_repo_path = doc["yum_repos"][version][arch]["path"]
-            self.containers = {"rh": doc["container_primary"], "alt": doc["container_alt"]}
-
-    @staticmethod
-    def setup_class():
-        '''
-           announce the beginning of the test run
-        '''
-        print("*** Running %s: *** " % basename(__file__))
+            cls.yum_repo_name = doc["yum_repos"][version][arch]["name"]
+            cls.yum_repo_version = doc["yum_repos"][version][arch]["version"]
+            cls.yum_repo_kind = doc["yum_repos"][version][arch]["kind"]
+            cls.yum_repo_path = doc["yum_repos"][version][arch]["path"]
+            cls.containers = {"rh": doc["container_primary"], "alt": doc["container_alt"]}
 
     @staticmethod
     def test_01_repo_setup():
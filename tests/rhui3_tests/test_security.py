@@ -10,6 +10,7 @@ import subprocess
 import nose
 
 from rhui3_tests_lib.conmgr import ConMgr
+from rhui3_tests_lib.fanout import fan_out
 from rhui3_tests_lib.rhuimanager import RHUIManager
 from rhui3_tests_lib.rhuimanager_instance import RHUIManagerInstance
 
@@ -96,7 +97,8 @@ def test_05_crane_cds():
 def test_06_haproxy_stats():
     """check haproxy stats"""
     # for RHBZ#1718066
-    for haproxy in HAPROXIES:
+    def _check_stats(haproxy):
+        """check the stats on one HAProxy node"""
         _, stdout, _ = haproxy.exec_command("echo 'show stat' | nc -U /var/lib/haproxy/stats")
         stats = list(csv.DictReader(stdout))
         cranestats = {row["svname"]: row["status"] for row in stats if row["# pxname"] == "crane00"}
@@ -111,6 +113,8 @@ def test_06_haproxy_stats():
         for cds in HOSTNAMES["CDS"]:
             nose.tools.eq_(httpsstats[cds], "UP")
 
+    fan_out(HAPROXIES, _check_stats).check()
+
 def test_99_cleanup():
     """delete CDS and HAProxy nodes"""
     RHUIManagerInstance.delete_all(RHUA, "loadbalancers")
@@ -17,10 +17,10 @@ from stitches.expect import Expect
 import yaml
 
 from rhui3_tests_lib.conmgr import ConMgr
+from rhui3_tests_lib.operations import Operations
 from rhui3_tests_lib.rhuimanager import RHUIManager
 from rhui3_tests_lib.rhuimanager_client import RHUIManagerClient
 from rhui3_tests_lib.rhuimanager_cmdline import RHUIManagerCLI
-from rhui3_tests_lib.rhuimanager_instance import RHUIManagerInstance
 from rhui3_tests_lib.rhuimanager_repo import RHUIManagerRepo
 from rhui3_tests_lib.util import Util
 
@@ -38,25 +38,23 @@ class TestClient(object):
        class for client tests
     '''
 
-    def __init__(self):
-        self.arch = Util.get_arch(CLI)
-        self.version = Util.get_rhel_version(CLI)["major"]
+    @classmethod
+    def setup_class(cls):
+        '''
+           announce the beginning of the test run, gather the test data
+        '''
+        print("*** Running %s: *** " % basename(__file__))
+        cls.arch = Util.get_arch(CLI)
+        cls.version = Util.get_rhel_version(CLI)["major"]
         with open("/etc/rhui3_tests/tested_repos.yaml") as configfile:
             doc = yaml.load(configfile)
             try:
-                self.test = doc["updateinfo"][self.version][self.arch]
+                cls.test = doc["updateinfo"][cls.version][cls.arch]
             except KeyError:
                 raise nose.SkipTest("No test repo defined for RHEL %s on %s" % \
-                                    (self.version, self.arch))
+                                    (cls.version, cls.arch))
             # the special "RHEL 0" repo contains updateinfo.xml instead of *.gz
-            self.test["uncompressed_updateinfo"] = doc["updateinfo"][0]["all"]["repo_id"]
-
-    @staticmethod
-    def setup_class():
-        '''
-           announce the beginning of the test run
-        '''
-        print("*** Running %s: *** " % basename(__file__))
+            cls.test["uncompressed_updateinfo"] = doc["updateinfo"][0]["all"]["repo_id"]
 
     @staticmethod
     def test_01_repo_setup():
@@ -72,7 +70,7 @@ class TestClient(object):
            add a CDS
         '''
         if not getenv("RHUISKIPSETUP"):
-            RHUIManagerInstance.add_instance(RHUA, "cds")
+            Operations.add_instance(RHUA, "cds")
 
     @staticmethod
     def test_03_add_hap():
@@ -80,7 +78,7 @@ class TestClient(object):
            add an HAProxy Load-balancer
         '''
         if not getenv("RHUISKIPSETUP"):
-            RHUIManagerInstance.add_instance(RHUA, "loadbalancers")
+            Operations.add_instance(RHUA, "loadbalancers")
 
     def test_04_add_repo(self):
         '''
@@ -220,8 +218,8 @@ class TestClient(object):
         RHUIManagerRepo.delete_all_repos(RHUA)
         Expect.expect_retval(RHUA, "rm -rf /tmp/%s*" % self.test["repo_id"])
         if not getenv("RHUISKIPSETUP"):
-            RHUIManagerInstance.delete_all(RHUA, "loadbalancers")
-            RHUIManagerInstance.delete_all(RHUA, "cds")
+            Operations.delete_instances(RHUA, "loadbalancers")
+            Operations.delete_instances(RHUA, "cds")
 
     @staticmethod
     def teardown_class():
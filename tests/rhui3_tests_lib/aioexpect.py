@@ -0,0 +1,169 @@
+"""
+asyncio front-end for the blocking, stitches-based library (Python 3.7+ only)
+
+The blocking paramiko work runs in the event loop's default executor. Calls that use the same
+connection are serialized, so coroutines can share connections safely, while work on different
+connections (e.g. the RHUA and a client) overlaps:
+
+    await asyncio.gather(AsyncRHUIManagerCLI.repo_sync(RHUA, repo_id, repo_name),
+                         AsyncExpect.expect_retval(CLI, "yum clean all"))
+
+A call holds the locks of all the connections it's given (the arguments whose names end with
+"connection" or "connections"), so e.g. AsyncUtil.install_pkg_from_rhua(RHUA, CLI, rpm) waits
+for both the RHUA and the client to be free, and keeps both busy until it's done.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import weakref
+
+from rhui3_tests_lib.batch import run_many
+from rhui3_tests_lib.expect import Expect
+from rhui3_tests_lib.helpers import Helpers
+from rhui3_tests_lib.rhuimanager_cmdline import RHUIManagerCLI
+from rhui3_tests_lib.util import Util
+
+_LOCKS = weakref.WeakKeyDictionary()
+_LOCKS_GUARD = threading.Lock()
+
+def _connection_locks(connections):
+    '''
+    return the locks that serialize blocking calls on the given connections, in a fixed order
+    (so that calls taking several of them can't deadlock); a session shares the lock of its
+    connection
+    '''
+    keys = dict((id(key), key) for key in (getattr(connection, "connection", connection)
+                                           for connection in connections))
+    with _LOCKS_GUARD:
+        for key in keys.values():
+            if key not in _LOCKS:
+                _LOCKS[key] = threading.Lock()
+        return [_LOCKS[keys[key_id]] for key_id in sorted(keys)]
+
+async def _run_locked(connections, func, *args, **kwargs):
+    '''
+    run func(*args, **kwargs) in the executor while holding the locks of all the connections
+    '''
+    locks = _connection_locks(connections)
+
+    def _locked():
+        for lock in locks:
+            lock.acquire()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    return await asyncio.get_running_loop().run_in_executor(None, _locked)
+
+async def run_blocking(connection, func, *args, **kwargs):
+    '''
+    run func(connection, *args, **kwargs) in the executor, one call per connection at a time
+    '''
+    return await _run_locked([connection], func, connection, *args, **kwargs)
+
+def _connection_args(signature, args, kwargs):
+    '''
+    the connections among the arguments of a call: the values of the parameters whose names
+    end with "connection", and the items of those whose names end with "connections"
+    '''
+    connections = []
+    for name, value in signature.bind(*args, **kwargs).arguments.items():
+        if name.endswith("connection"):
+            connections.append(value)
+        elif name.endswith("connections"):
+            connections.extend(value)
+    return [connection for connection in connections if connection]
+
+def _coroutine(func):
+    '''
+    turn a blocking function taking a connection as the first argument into a coroutine function
+    '''
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def _wrapper(*args, **kwargs):
+        return await _run_locked(_connection_args(signature, args, kwargs), func, *args, **kwargs)
+    return _wrapper
+
+def asyncify(cls):
+    '''
+    create an asyncio twin of a class with static methods: the methods that take a connection
+    as the first argument become coroutine functions, the others are kept as they are
+    '''
+    namespace = {"__doc__": "asyncio twin of %s" % cls.__name__}
+    for name, member in vars(cls).items():
+        if not isinstance(member, staticmethod):
+            continue
+        func = getattr(cls, name)
+        params = list(inspect.signature(func).parameters)
+        if params and params[0].endswith("connection"):
+            namespace[name] = staticmethod(_coroutine(func))
+        else:
+            namespace[name] = member
+    return type("Async" + cls.__name__, (object,), namespace)
+
+class AsyncExpect(object):
+    '''
+    Awaitable counterparts of the stitches Expect methods
+    '''
+    @staticmethod
+    async def enter(connection, command):
+        '''
+        enter a command to the shell channel
+        '''
+        return await run_blocking(connection, Expect.enter, command)
+
+    @staticmethod
+    async def expect(connection, strexp, timeout=10):
+        '''
+        wait until the expression appears in the output
+        '''
+        return await run_blocking(connection, Expect.expect, strexp, timeout)
+
+    @staticmethod
+    async def expect_list(connection, regexp_list, timeout=10):
+        '''
+        wait until one of the expressions matches, return its associated value
+        '''
+        return await run_blocking(connection, Expect.expect_list, regexp_list, timeout)
+
+    @staticmethod
+    async def match(connection, regexp, grouplist=None, timeout=10):
+        '''
+        wait until the compiled expression matches, return the requested groups
+        '''
+        return await run_blocking(connection, Expect.match, regexp, grouplist or [1], timeout)
+
+    @staticmethod
+    async def ping_pong(connection, command, strexp, timeout=10):
+        '''
+        enter a command and wait until the expression appears in the output
+        '''
+        return await run_blocking(connection, Expect.ping_pong, command, strexp, timeout)
+
+    @staticmethod
+    async def expect_retval(connection, command, expected_status=0, timeout=10):
+        '''
+        run a command and check its exit status
+        '''
+        return await run_blocking(connection,
+                                  Expect.expect_retval,
+                                  command,
+                                  expected_status,
+                                  timeout)
+
+    @staticmethod
+    async def exec(connection, command, timeout=10):
+        '''
+        run a command, return its exit status (None on timeout), stdout and stderr
+        '''
+        results = await run_blocking(connection, run_many, [command], timeout)
+        return results[0]
+
+AsyncHelpers = asyncify(Helpers)
+AsyncRHUIManagerCLI = asyncify(RHUIManagerCLI)
+AsyncUtil = asyncify(Util)
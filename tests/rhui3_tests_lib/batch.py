@@ -0,0 +1,71 @@
+""" Batched execution of independent remote commands """
+
+import time
+
+from rhui3_tests_lib.facts import Facts
+
+RECV_SIZE = 131072
+IDLE_WAIT = 0.05
+# sshd allows 10 sessions per connection by default (MaxSessions), and the connection itself
+# may already have some open, so never run more commands than this at the same time
+MAX_SESSIONS = 8
+
+def _drain(channel, stdout, stderr):
+    '''
+    read whatever output the channel has buffered; return True if anything was read
+    '''
+    received = False
+    while channel.recv_ready():
+        stdout.append(channel.recv(RECV_SIZE))
+        received = True
+    while channel.recv_stderr_ready():
+        stderr.append(channel.recv_stderr(RECV_SIZE))
+        received = True
+    return received
+
+def run_many(connection, commands, timeout=10):
+    '''
+    run the commands concurrently, each in its own channel on the connection's SSH transport,
+    and return a list of (exit status, stdout, stderr) tuples in the order of the commands;
+    at most MAX_SESSIONS commands run at a time, the next one starts when one of them finishes;
+    the exit status is None if the command did not finish within the timeout (in seconds)
+    '''
+    if not commands:
+        return []
+    transport = connection.cli.get_transport()
+    connection.last_command = "; ".join(commands)
+    channels = {}
+    stdouts = [[] for _ in commands]
+    stderrs = [[] for _ in commands]
+    statuses = [None] * len(commands)
+    waiting = list(range(len(commands)))
+    deadline = time.time() + timeout
+    while (waiting or channels) and time.time() < deadline:
+        while waiting and len(channels) < MAX_SESSIONS:
+            index = waiting.pop(0)
+            channels[index] = transport.open_session()
+            channels[index].exec_command(commands[index])
+        received = False
+        for index, channel in list(channels.items()):
+            received |= _drain(channel, stdouts[index], stderrs[index])
+            if channel.exit_status_ready() and channel.eof_received:
+                # the exit status may come before the last chunk of data, read it all
+                _drain(channel, stdouts[index], stderrs[index])
+                statuses[index] = channel.recv_exit_status()
+                channel.close()
+                del channels[index]
+        if channels and not received:
+            time.sleep(IDLE_WAIT)
+    for channel in channels.values():
+        channel.close()
+    for command in commands:
+        Facts.notice(connection, command)
+    return [(statuses[index],
+             b"".join(stdouts[index]).decode(),
+             b"".join(stderrs[index]).decode()) for index in range(len(commands))]
+
+def exit_statuses(connection, commands, timeout=10):
+    '''
+    run the commands concurrently and return a list of their exit statuses
+    '''
+    return [result[0] for result in run_many(connection, commands, timeout)]
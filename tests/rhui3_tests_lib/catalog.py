@@ -0,0 +1,203 @@
+""" Index of the repositories in RHUI, built from few remote commands and cached """
+
+from collections import namedtuple
+import functools
+import re
+import threading
+import weakref
+
+from rhui3_tests_lib.parsing import REPO_INFO
+from rhui3_tests_lib.util import Util
+
+# the number of repositories whose information is fetched by a single remote command
+INFO_BATCH = 100
+VERSION_PATTERN = re.compile(r"^(.*?)\s*\(([^()]*)\)\s*$")
+
+CatalogEntry = namedtuple("CatalogEntry", ["repo_id", "name", "base_name", "version"])
+
+_CACHE = weakref.WeakKeyDictionary()
+_CACHE_LOCK = threading.Lock()
+
+def _entry(repo_id, name):
+    '''
+    the catalog entry of the repository; the version is in the last parentheses of the name
+    '''
+    match = VERSION_PATTERN.match(name)
+    if match:
+        return CatalogEntry(repo_id, name, match.group(1), match.group(2))
+    return CatalogEntry(repo_id, name, name, None)
+
+def _index(records, key):
+    '''
+    {key: [records]}
+    '''
+    index = {}
+    for record in records:
+        index.setdefault(getattr(record, key), []).append(record)
+    return index
+
+def invalidates_catalog(func):
+    '''
+    decorate a method that changes the repositories: discard the cached catalog once it's done,
+    whether it succeeds or not
+    '''
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            RepoCatalog.invalidate()
+    return wrapper
+
+class RepoCatalog(object):
+    '''
+    The repositories in RHUI, indexed by ID, name, name without the version, and version.
+    Built from one "rhui-manager repo list"; the information about all the repositories (needed
+    for the lookups by relative path and type) is fetched in bulk when first needed.
+    Get the catalog with RepoCatalog.get(); the library discards it after it adds or deletes
+    repositories, uploads packages, or syncs repositories.
+    '''
+    def __init__(self, connection):
+        # only a weak reference: the cache must not keep the connection (its key) alive
+        self._connection = weakref.ref(connection)
+        self.entries = []
+        for line in Util.command_lines(connection, "rhui-manager repo list"):
+            # lines look like: ID :: name
+            repo_id, separator, name = line.partition(" :: ")
+            if separator:
+                self.entries.append(_entry(repo_id.strip(), name.strip()))
+        self._by_id = dict((entry.repo_id, entry) for entry in self.entries)
+        self._by_name = dict((entry.name, entry) for entry in self.entries)
+        self._by_base_name = _index(self.entries, "base_name")
+        self._by_version = _index(self.entries, "version")
+        self._infos = None
+        self._by_path = None
+        self._by_type = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get(connection):
+        '''
+        return the catalog of the repositories on the RHUA, building it if it isn't cached yet
+        '''
+        # a session and its connection share the catalog
+        key = getattr(connection, "connection", connection)
+        with _CACHE_LOCK:
+            catalog = _CACHE.get(key)
+        if catalog is None:
+            catalog = RepoCatalog(connection)
+            with _CACHE_LOCK:
+                _CACHE[key] = catalog
+        else:
+            # fetch the information with the caller's connection, the previous one may be gone
+            catalog._connection = weakref.ref(connection)
+        return catalog
+
+    @staticmethod
+    def invalidate(connection=None):
+        '''
+        forget the cached catalog of the RHUA (or of all RHUAs if no connection is given)
+        '''
+        with _CACHE_LOCK:
+            if connection is None:
+                _CACHE.clear()
+            else:
+                _CACHE.pop(getattr(connection, "connection", connection), None)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def names(self):
+        '''
+        return the names of the repositories, in the order of rhui-manager
+        '''
+        return [entry.name for entry in self.entries]
+
+    def by_id(self, repo_id):
+        '''
+        return the entry of the repository with the given ID, or None
+        '''
+        return self._by_id.get(repo_id)
+
+    def by_name(self, name):
+        '''
+        return the entry of the repository with the given name, or None
+        '''
+        return self._by_name.get(name)
+
+    def by_base_name(self, base_name):
+        '''
+        return the entries of the repositories whose names without the version are as given
+        '''
+        return list(self._by_base_name.get(base_name, []))
+
+    def by_version(self, version):
+        '''
+        return the entries of the repositories with the given version
+        '''
+        return list(self._by_version.get(version, []))
+
+    def find(self, name):
+        '''
+        return the entry of the repository with the given name, with or without the version,
+        or of the first repository whose name contains the given text; None if there's none
+        '''
+        entry = self._by_name.get(name)
+        if entry is None and name in self._by_base_name:
+            entry = self._by_base_name[name][0]
+        if entry is None:
+            entry = next((entry for entry in self.entries if name in entry.name), None)
+        return entry
+
+    def version(self, name):
+        '''
+        return the version of the repository found by find(), or None
+        '''
+        entry = self.find(name)
+        return entry.version if entry else None
+
+    def _load_infos(self):
+        '''
+        fetch the information about all the repositories, a batch of them per command
+        '''
+        with self._lock:
+            if self._infos is not None:
+                return
+            connection = self._connection()
+            if connection is None:
+                raise RuntimeError("The connection of the repository catalog is closed.")
+            infos = {}
+            repo_ids = [entry.repo_id for entry in self.entries]
+            for start in range(0, len(repo_ids), INFO_BATCH):
+                command = " ; ".join("rhui-manager repo info --repo_id %s" % repo_id
+                                     for repo_id in repo_ids[start:start + INFO_BATCH])
+                for info in REPO_INFO.parse(Util.command_lines(connection, command)):
+                    infos[info.repo_id] = info
+            self._by_path = dict((info.relative_path, info) for info in infos.values())
+            self._by_type = _index(infos.values(), "type")
+            self._infos = infos
+
+    def info(self, repo_id):
+        '''
+        return the parsing.RepoInfo record of the repository with the given ID, or None
+        '''
+        self._load_infos()
+        return self._infos.get(repo_id)
+
+    def by_path(self, relative_path):
+        '''
+        return the parsing.RepoInfo record of the repository with the given relative path, or None
+        '''
+        self._load_infos()
+        return self._by_path.get(relative_path)
+
+    def by_type(self, repo_type):
+        '''
+        return the parsing.RepoInfo records of the repositories of the given type,
+        "Red Hat" or "Custom"
+        '''
+        self._load_infos()
+        return list(self._by_type.get(repo_type, []))
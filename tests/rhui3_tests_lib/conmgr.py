@@ -1,10 +1,19 @@
 """Connection Manager for RHUI Test Cases"""
 
-import re
+import atexit
+from contextlib import contextmanager
 import logging
+import os
+import sys
+import threading
 
 from stitches.connection import Connection
-from stitches.expect import Expect
+
+from rhui3_tests_lib.expect import Expect
+from rhui3_tests_lib.facts import Facts, NoticingShell
+from rhui3_tests_lib.inventory import Inventory, HOSTS_FILE
+from rhui3_tests_lib.recorder import Recorder, RecordingConnection, ReplayConnection, \
+                                     recording_name
 
 SHORT_HOSTNAMES = {"RHUA": "rhua",
                    "CDS_LB": "cds",
@@ -19,30 +28,159 @@ USER_KEY = "/root/.ssh/id_rsa_test"
 SUDO_USER_NAME = "ec2-user"
 SUDO_USER_KEY = "/root/.ssh/id_rsa_rhua"
 
+# set this environment variable to the path to a hosts_*.cfg file to use it instead of /etc/hosts
+INVENTORY_ENV_VAR = "RHUI_INVENTORY"
+_INVENTORY_PATH = []
+# set this environment variable to e.g. "repos=1000,cds=3,latency=0.001" to connect to
+# a simulated RHUA instead of real hosts (see simulator.SimulatedRHUA for the parameters)
+SIMULATOR_ENV_VAR = "RHUI_SIMULATOR"
+_SIMULATOR = []
+# set one of these environment variables to a directory to record the connections of each test
+# module there, or to replay such recordings instead of connecting anywhere (see recorder)
+RECORD_ENV_VAR = "RHUI_RECORD"
+REPLAY_ENV_VAR = "RHUI_REPLAY"
+_RECORDINGS = {}
+_UNPOOLED_COUNT = {}
+_MODULE = []
+
+def _inventory():
+    """return the inventory in use"""
+    path = _INVENTORY_PATH[-1] if _INVENTORY_PATH else os.environ.get(INVENTORY_ENV_VAR, HOSTS_FILE)
+    return Inventory.load(path, DOMAIN)
+
 def _list_hostnames(nodes, fake=False):
     """return a list of hostnames of the given node type"""
     # if "fake" is on and no hostnames are found, a hostname is made up and returned as
     # a single list item
-    host_pattern = r"%s[0-9]+\.%s" % (nodes, re.escape(DOMAIN))
-    with open("/etc/hosts") as hostsfile:
-        all_hosts = hostsfile.read()
-    matched_hosts = re.findall(host_pattern, all_hosts)
+    matched_hosts = _inventory().hosts(nodes)
     if matched_hosts or not fake:
         return matched_hosts
     logging.warning("No hosts found. Using a fake hostname. Proceed with caution.")
     return ["%s01.%s" % (nodes, DOMAIN)]
 
+def _calling_module(depth):
+    """return the name of the test module using the library"""
+    # connections requested from within the library (e.g. by fanout) belong to the module
+    # that last requested one itself
+    name = sys._getframe(depth).f_globals.get("__name__", "")
+    if not name.startswith("rhui3_tests_lib") or not _MODULE:
+        _MODULE[:] = [name]
+    return _MODULE[0]
+
+def _recording_path(directory, key, pooled):
+    """return the path to the recording of the connection to be made from the calling module"""
+    module = _calling_module(3)
+    number = 0
+    if not pooled:
+        number = _UNPOOLED_COUNT[(module, key)] = _UNPOOLED_COUNT.get((module, key), 0) + 1
+    return os.path.join(directory, recording_name(module, key[0], key[1], number))
+
+def _single_hostname(role, nodes):
+    """return the hostname of a node that normally has a fixed name in /etc/hosts"""
+    # in a hosts_*.cfg inventory, it's the first host of the given role, though, under its public
+    # name (see inventory.Inventory); e.g. the CDS load balancer is then the first HAProxy node
+    inventory = _inventory()
+    if inventory.from_cfg:
+        hosts = inventory.hosts(nodes)
+        if hosts:
+            return hosts[0]
+    return "%s.%s" % (SHORT_HOSTNAMES[role], DOMAIN)
+
+class PooledConnection(Connection):
+    """
+    a stitches connection that can be shared through the ConMgr registry;
+    the SSH handshake is only done when the connection is first used (a command is run,
+    the shell or SFTP is accessed), so importing a test module whose tests are all skipped
+    costs nothing; if the SSH transport drops, the connection is re-established on next use;
+    the commands run or typed into the shell are passed to Facts.notice
+    """
+    def is_connected(self):
+        """return True if the SSH handshake has been done and the transport is still active"""
+        client = getattr(self, "_lazy_cli", None)
+        if client is None:
+            return False
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def _reset(self):
+        """close and forget the SSH client, the shell channel and the SFTP session (if any)"""
+        # the lazy attributes are handled directly; going through the properties would reconnect
+        for attr in ["_lazy_sftp", "_lazy_channel", "_lazy_cli"]:
+            resource = self.__dict__.pop(attr, None)
+            if resource is not None:
+                try:
+                    resource.close()
+                except Exception as err:
+                    logging.debug("Closing %s of %s failed: %s", attr, self.hostname, err)
+
+    def _check_transport(self):
+        """drop the dead resources if the transport has gone away since the last use"""
+        if "_lazy_cli" in self.__dict__ and not self.is_connected():
+            logging.warning("The connection to %s was lost, reconnecting.", self.hostname)
+            self._reset()
+
+    @property
+    def cli(self):
+        """SSH client, (re)connected on demand"""
+        self._check_transport()
+        return Connection.cli.fget(self)
+
+    @property
+    def channel(self):
+        """interactive shell channel, (re)opened on demand"""
+        self._check_transport()
+        chan = self.__dict__.get("_lazy_channel")
+        if chan is not None and chan.closed:
+            self.__dict__.pop("_lazy_channel")
+        return NoticingShell(self, Connection.channel.fget(self))
+
+    @property
+    def sftp(self):
+        """SFTP session, (re)opened on demand"""
+        self._check_transport()
+        return Connection.sftp.fget(self)
+
+    def exec_command(self, command, bufsize=-1, get_pty=False):
+        """execute a command, return its stdin, stdout and stderr"""
+        result = Connection.exec_command(self, command, bufsize, get_pty)
+        Facts.notice(self, command)
+        return result
+
+    def recv_exit_status(self, command, timeout=10, get_pty=False):
+        """execute a command, return its exit status (None if it timed out)"""
+        try:
+            return Connection.recv_exit_status(self, command, timeout, get_pty)
+        finally:
+            Facts.notice(self, command)
+
+    def drain(self):
+        """discard any output left unread in the shell channel, e.g. by a previous test module"""
+        chan = self.__dict__.get("_lazy_channel")
+        if chan is None or chan.closed:
+            return
+        while chan.recv_ready():
+            chan.recv(131072)
+
+    def disconnect(self):
+        """close the connection; it will be re-established if used again"""
+        self._reset()
+
+_POOL = {}
+_UNPOOLED = []
+_POOL_LOCK = threading.Lock()
+
 class ConMgr(object):
     """simplify connections to RHUI nodes & clients by providing handy constants and methods"""
     @staticmethod
     def get_rhua_hostname():
         """return the hostname of the RHUA node"""
-        return "%s.%s" % (SHORT_HOSTNAMES["RHUA"], DOMAIN)
+        return _single_hostname("RHUA", SHORT_HOSTNAMES["RHUA"])
 
     @staticmethod
     def get_cds_lb_hostname():
         """return the hostname of the CDS Load Balancer node"""
-        return "%s.%s" % (SHORT_HOSTNAMES["CDS_LB"], DOMAIN)
+        # the load balancer is the (first) HAProxy node
+        return _single_hostname("CDS_LB", SHORT_HOSTNAMES["HAProxy"])
 
     @staticmethod
     def get_cds_hostnames(fake=True):
@@ -54,6 +192,24 @@ class ConMgr(object):
         """return a list of HAProxy hostnames; there's usually only a single HAProxy node in RHUI"""
         return _list_hostnames(SHORT_HOSTNAMES["HAProxy"], fake)
 
+    @staticmethod
+    def use_simulator(rhua=None, **kwargs):
+        """connect to a simulated RHUA (the given one, or one made from kwargs) from now on"""
+        # the simulator is only loaded when it's used
+        from rhui3_tests_lib.simulator import SimulatedRHUA
+        # connections made so far lead elsewhere
+        ConMgr.close_all()
+        _SIMULATOR.append(rhua or SimulatedRHUA(**kwargs))
+        return _SIMULATOR[-1]
+
+    @staticmethod
+    def get_simulator():
+        """return the simulated RHUA in use (set up from the environment if needed), or None"""
+        if not _SIMULATOR and os.environ.get(SIMULATOR_ENV_VAR):
+            from rhui3_tests_lib.simulator import parse_spec
+            ConMgr.use_simulator(**parse_spec(os.environ[SIMULATOR_ENV_VAR]))
+        return _SIMULATOR[-1] if _SIMULATOR else None
+
     @staticmethod
     def get_cli_hostnames(fake=True):
         """return a list of client hostnames"""
@@ -62,12 +218,79 @@ class ConMgr(object):
     @staticmethod
     def get_atomic_cli_hostname():
         """return the hostname of the Atomic client"""
-        return "%s.%s" % (SHORT_HOSTNAMES["Atomic_client"], DOMAIN)
+        return _single_hostname("Atomic_client", SHORT_HOSTNAMES["Atomic_client"])
+
+    @staticmethod
+    def use_inventory(path):
+        """look up hostnames in the given hosts file or hosts_*.cfg inventory until reset"""
+        _INVENTORY_PATH.append(path)
 
     @staticmethod
-    def connect(hostname="", username=USER_NAME, sshkey=USER_KEY):
-        """create a connection to the specified host"""
-        return Connection(hostname or ConMgr.get_rhua_hostname(), username, sshkey)
+    def reset_inventory():
+        """go back to the inventory used before the last use_inventory call"""
+        if _INVENTORY_PATH:
+            _INVENTORY_PATH.pop()
+
+    @staticmethod
+    @contextmanager
+    def inventory(path):
+        """look up hostnames in the given hosts file or inventory within the with block"""
+        ConMgr.use_inventory(path)
+        try:
+            yield
+        finally:
+            ConMgr.reset_inventory()
+
+    @staticmethod
+    def connect(hostname="", username=USER_NAME, sshkey=USER_KEY, pooled=True):
+        """return a connection to the specified host; it connects lazily, on first use"""
+        # connections are shared process-wide, one per (host, user, key); use pooled=False
+        # if you need a separate shell (e.g. a side channel to the same host)
+        key = (hostname or ConMgr.get_rhua_hostname(), username, sshkey)
+        if os.environ.get(REPLAY_ENV_VAR):
+            path = _recording_path(os.environ[REPLAY_ENV_VAR], key, pooled)
+            with _POOL_LOCK:
+                if path not in _RECORDINGS:
+                    _RECORDINGS[path] = ReplayConnection.load(path)
+                return _RECORDINGS[path]
+        simulator = ConMgr.get_simulator()
+        if simulator is None:
+            new_connection = lambda: PooledConnection(*key)
+        else:
+            from rhui3_tests_lib.simulator import SimulatedConnection
+            new_connection = lambda: SimulatedConnection(simulator, *key)
+        with _POOL_LOCK:
+            if not pooled:
+                connection = new_connection()
+                _UNPOOLED.append(connection)
+            else:
+                connection = _POOL.get(key)
+                if connection is None:
+                    connection = _POOL[key] = new_connection()
+                else:
+                    connection.drain()
+        if os.environ.get(RECORD_ENV_VAR):
+            path = _recording_path(os.environ[RECORD_ENV_VAR], key, pooled)
+            with _POOL_LOCK:
+                if path not in _RECORDINGS:
+                    _RECORDINGS[path] = Recorder(path, key[0], key[1], _MODULE[0])
+            connection = RecordingConnection(connection, _RECORDINGS[path])
+        return connection
+
+    @staticmethod
+    def close_all():
+        """close all connections created by ConMgr"""
+        with _POOL_LOCK:
+            connections = list(_POOL.values()) + _UNPOOLED
+            recordings = list(_RECORDINGS.values())
+            _POOL.clear()
+            del _UNPOOLED[:]
+            _RECORDINGS.clear()
+        for connection in connections:
+            connection.disconnect()
+        for recording in recordings:
+            if isinstance(recording, Recorder):
+                recording.close()
 
     @staticmethod
     def add_ssh_keys(connection, hostnames, keytype="rsa"):
@@ -85,3 +308,5 @@ class ConMgr(object):
                 hostnames = ConMgr.get_cds_hostnames() + ConMgr.get_haproxy_hostnames()
             for host in hostnames:
                 Expect.expect_retval(connection, "ssh-keygen -R %s" % host)
+
+atexit.register(ConMgr.close_all)
@@ -0,0 +1,284 @@
+"""
+Expect with incremental matching of the shell output
+
+The stitches Expect methods re.match the patterns (usually ".*something.*" with re.DOTALL)
+against all the output received so far, every time another chunk arrives, and sleep for
+a second between the reads. Here, the leading ".*" is dropped and the rest is only searched
+for in the newly received output plus an overlap window as wide as the longest possible match.
+The full pattern is only applied once it is known to match, so the groups stay the same.
+Patterns that can match arbitrarily long strings are searched for in (at most) the last
+WINDOW characters of the output. Other patterns are only applied once the output contains
+the literal text they require as many times as they require it.
+
+The timeout is a deadline for the whole wait. The stitches Expect methods counted attempts to
+read instead, and each attempt could block for the channel timeout (10 s) when no output came,
+so a wait for a command that prints nothing for a while could last several times the timeout
+there. The waits in the library that follow remote work (launching rhui-manager, listings fetched
+from Pulp or the entitlement server, building RPMs, etc.) have timeouts to match.
+
+While rhui-manager screens are shown, the output is also watched for ERROR_SENTINELS, and
+UnexpectedOutput is raised as soon as one of them appears, rather than waiting for the expected
+output until the timeout. Sentinels whose keyword occurs in any of the expected patterns are not
+watched for. Other output, e.g. that of yum in the shell, isn't watched. The screens are taken
+to be shown from entering "rhui-manager" until entering "q" or "logout" here, and whenever
+a shell prompt appears in the output followed by a command line, they're taken to be shown
+if that command is "rhui-manager" and not shown otherwise; this way, rhui-manager quit through
+stitches' Expect, interrupted, or killed doesn't leave the shell watched.
+"""
+
+import codecs
+import logging
+import re
+import socket
+import sys
+import time
+import weakref
+
+try:
+    from functools import lru_cache # Python 3.2+
+except ImportError:
+    from rhui3_tests_lib.prompts import lru_cache
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# ExpectFailed and CTRL_C are imported from here along with Expect
+from stitches.expect import Expect as StitchesExpect, ExpectFailed, CTRL_C
+
+
+RECV_SIZE = 131072
+WINDOW = 1048576
+
+# (keyword, pattern); modify the list to change what is considered an error
+ERROR_SENTINELS = [("An unexpected error", re.compile("An unexpected error")),
+                   ("Traceback", re.compile(r"Traceback \(most recent call last\)")),
+                   ("Aborting", re.compile("Aborting"))]
+SENTINEL_OVERLAP = 256
+# a bash prompt, like "[root@rhua ~]# ", and the command line entered after it
+SHELL_PROMPT_PATTERN = re.compile(r"\[[^\[\]\s@]+@[^\[\]\r\n]+\][#$] ([^\r\n]*)\r?\n")
+# the connections showing rhui-manager screens
+_SCREENS = weakref.WeakKeyDictionary()
+QUIT_COMMANDS = ["q", "logout"]
+
+class UnexpectedOutput(ExpectFailed):
+    '''
+    To be raised if an error sentinel appears in the output instead of the expected output
+    '''
+    def __init__(self, sentinel, screen):
+        self.sentinel = sentinel
+        self.screen = screen
+        ExpectFailed.__init__(self, "%s in the output:\n%s" % (sentinel, screen))
+
+def _required_literals(parsed):
+    '''
+    the literal strings that any match of the parsed pattern contains, with the minimal
+    number of their occurrences, as a dict
+    '''
+    required = {}
+    run = []
+
+    def _add(literal, count):
+        if literal:
+            required[literal] = required.get(literal, 0) + count
+
+    for opcode, argument in parsed:
+        if opcode == sre_parse.LITERAL:
+            run.append(chr(argument))
+            continue
+        _add("".join(run), 1)
+        run = []
+        if opcode in [sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT] and argument[0] > 0:
+            for literal, count in _required_literals(argument[2]).items():
+                _add(literal, count * argument[0])
+        elif opcode == sre_parse.SUBPATTERN:
+            for literal, count in _required_literals(argument[-1]).items():
+                _add(literal, count)
+    _add("".join(run), 1)
+    return required
+
+class _Matcher(object):
+    '''
+    A pattern as used by the stitches Expect methods (matched from the beginning of the output)
+    with a cheaper way to find out whether it matches yet
+    '''
+    def __init__(self, regexp):
+        self.regexp = re.compile(regexp)
+        self.search = None
+        self.overlap = None
+        self.anchored = True
+        self.literal = None
+        pattern = self.regexp.pattern
+        if not isinstance(pattern, str) or not self.regexp.flags & re.DOTALL:
+            return
+        if not self.regexp.flags & re.IGNORECASE:
+            required = _required_literals(sre_parse.parse(pattern, self.regexp.flags))
+            if required:
+                # the most frequent one; of those, the longest
+                self.literal = max(required.items(), key=lambda item: (item[1], len(item[0])))
+        # ".*X..." matches iff X is found anywhere; so does "(.*)X...", but its group
+        # spans all the output, which therefore can't be cut
+        for prefix, anchored in [(".*", False), ("(.*)", True)]:
+            if pattern.startswith(prefix):
+                rest = pattern[len(prefix):]
+                break
+        else:
+            return
+        if rest[:1] in ["?", "*", "+", "{"]:
+            # e.g. ".*?": not a plain greedy prefix
+            return
+        if rest.endswith(".*") and not rest.endswith("\\.*"):
+            rest = rest[:-2]
+        try:
+            self.search = re.compile(rest, self.regexp.flags)
+        except re.error:
+            return
+        self.anchored = anchored
+        width = sre_parse.parse(rest, self.regexp.flags).getwidth()[1]
+        if width < WINDOW:
+            self.overlap = width
+
+    def find(self, output, scanned):
+        '''
+        return the match object of the pattern in the output, or None;
+        the first scanned characters of the output are known not to contain a match
+        '''
+        if self.search is not None:
+            start = max(0, scanned - self.overlap) if self.overlap is not None else 0
+            if self.search.search(output, start) is None:
+                return None
+        elif self.literal is not None and output.count(self.literal[0]) < self.literal[1]:
+            return None
+        return self.regexp.match(output)
+
+@lru_cache(256)
+def _matcher(regexp):
+    '''
+    the (shared) matcher for the pattern; analyzing the pattern is costlier than compiling it
+    '''
+    return _Matcher(regexp)
+
+def _connection(connection):
+    '''
+    the connection itself, also when given a session using it
+    '''
+    return getattr(connection, "connection", connection)
+
+def _wait(connection, matchers, timeout):
+    '''
+    read the shell output until one of the matchers matches it;
+    return the index of the matcher and the match object
+    '''
+    channel = connection.channel
+    # output that can't be part of any match anymore is dropped
+    keep = None if any(matcher.anchored for matcher in matchers) else WINDOW
+    key = _connection(connection)
+    sentinels = [(keyword, pattern) for keyword, pattern in ERROR_SENTINELS
+                 if not any(keyword in matcher.regexp.pattern for matcher in matchers)]
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    output = ""
+    scanned = 0
+    received = True
+    closed = False
+    deadline = time.time() + timeout
+    original_timeout = channel.gettimeout()
+    try:
+        while True:
+            try:
+                channel.settimeout(max(deadline - time.time(), 0))
+                recv_part = channel.recv(RECV_SIZE)
+                if recv_part:
+                    recv_part = decoder.decode(recv_part)
+                    logging.getLogger('stitches.expect').debug("RCV: " + recv_part)
+                    if connection.output_shell:
+                        sys.stdout.write(recv_part)
+                    output += recv_part
+                    received = True
+                else:
+                    closed = True
+            except socket.timeout:
+                # socket.timeout here means 'no more data'
+                pass
+            if received:
+                for index, matcher in enumerate(matchers):
+                    match = matcher.find(output, scanned)
+                    if match:
+                        return index, match
+                start = max(0, scanned - SENTINEL_OVERLAP)
+                for prompt in SHELL_PROMPT_PATTERN.finditer(output, start):
+                    if prompt.end() <= scanned:
+                        continue
+                    command = prompt.group(1).strip()
+                    if command == "rhui-manager":
+                        _SCREENS[key] = True
+                    elif command:
+                        _SCREENS.pop(key, None)
+                    # what came before the prompt doesn't matter anymore
+                    start = prompt.end()
+                if key in _SCREENS:
+                    for keyword, pattern in sentinels:
+                        if pattern.search(output, start):
+                            raise UnexpectedOutput(keyword, output)
+                scanned = len(output)
+                if keep is not None and len(output) > keep:
+                    scanned -= len(output) - keep
+                    output = output[-keep:]
+                received = False
+            if closed or time.time() >= deadline:
+                raise ExpectFailed(output)
+    finally:
+        channel.settimeout(original_timeout)
+
+class Expect(StitchesExpect):
+    '''
+    stitches Expect, only matching the output incrementally and without polling delays
+    '''
+    @staticmethod
+    def enter(connection, command):
+        '''
+        Enter a command to the channel (with '\n' appended); note whether rhui-manager
+        is launched or quit
+        '''
+        if command == "rhui-manager":
+            _SCREENS[_connection(connection)] = True
+        elif command in QUIT_COMMANDS:
+            _SCREENS.pop(_connection(connection), None)
+        return StitchesExpect.enter(connection, command)
+
+    @staticmethod
+    def expect_list(connection, regexp_list, timeout=10):
+        '''
+        Expect a list of expressions, return the value associated with the first one that matches
+        '''
+        index, _ = _wait(connection, [_matcher(regexp) for regexp, _ in regexp_list], timeout)
+        return regexp_list[index][1]
+
+    @staticmethod
+    def expect(connection, strexp, timeout=10):
+        '''
+        Expect one expression (.*strexp.*), or a compiled pattern as it is
+        '''
+        if not hasattr(strexp, "pattern"):
+            strexp = re.compile(".*" + strexp + ".*", re.DOTALL)
+        return Expect.expect_list(connection, [(strexp, True)], timeout)
+
+    @staticmethod
+    def match(connection, regexp, grouplist=None, timeout=10):
+        '''
+        Match against a compiled expression, return the list of the requested groups
+        '''
+        logging.getLogger('stitches.expect').debug("MATCHING: " + regexp.pattern)
+        _, match = _wait(connection, [_matcher(regexp)], timeout)
+        ret_list = []
+        for group in grouplist or [1]:
+            logging.getLogger('stitches.expect').debug("matched: " + match.group(group))
+            ret_list.append(match.group(group))
+        return ret_list
+
+    @staticmethod
+    def ping_pong(connection, command, strexp, timeout=10):
+        '''
+        Enter a command and wait for the expression to appear in the output
+        '''
+        Expect.enter(connection, command)
+        return Expect.expect(connection, strexp, timeout)
@@ -0,0 +1,128 @@
+""" Per-host facts, collected in one round trip and cached per connection """
+
+import re
+import threading
+import weakref
+
+ISO_REPO_FILE = "/etc/yum.repos.d/rhui-local.repo"
+
+# each fact is printed under its own marker line by a single shell command
+FACT_COMMANDS = [("rhel_version", r"egrep -o '[0-9]+\.[0-9]+' /etc/redhat-release"),
+                 ("arch", "arch"),
+                 ("rhui_packages",
+                  "rpm -qa --queryformat '%{NAME}\\n' '*rhui*' 2>/dev/null | sort"),
+                 ("registered", "subscription-manager identity > /dev/null 2>&1; echo $?"),
+                 ("iso_installation", "test -f %s; echo $?" % ISO_REPO_FILE),
+                 ("yum_repo_files", "ls -1 /etc/yum.repos.d/ 2>/dev/null | grep '\\.repo$'")]
+MARKER = "@@fact:"
+# commands after which the facts may no longer be true: registration, packages, yum repositories
+CHANGING_COMMANDS = re.compile(r"\bsubscription-manager\s+"
+                               r"(?:register|unregister|attach|remove|repos)"
+                               r"|\brpm\s+-[eiUF]"
+                               r"|\byum\b[^;&|]*\b(?:install|localinstall|reinstall|update|upgrade"
+                               r"|downgrade|remove|erase)\b"
+                               r"|\byum-config-manager\b"
+                               r"|/etc/yum\.repos\.d/")
+
+_CACHE = weakref.WeakKeyDictionary()
+_CACHE_LOCK = threading.Lock()
+
+def _parse_rhel_version(lines):
+    '''
+    dict with two integers representing the major and minor version, or None
+    '''
+    version = lines[0].split(".") if lines else []
+    try:
+        return {"major": int(version[0]), "minor": int(version[1])}
+    except (IndexError, ValueError):
+        return None
+
+def _key(connection):
+    '''
+    the connection the facts are cached for; a session shares the facts of its connection
+    '''
+    return getattr(connection, "connection", connection)
+
+PARSERS = {"rhel_version": _parse_rhel_version,
+           "arch": lambda lines: lines[0] if lines else "",
+           "rhui_packages": list,
+           "registered": lambda lines: lines == ["0"],
+           "iso_installation": lambda lines: lines == ["0"],
+           "yum_repo_files": list}
+
+class Facts(object):
+    '''
+    Facts about a remote host: RHEL version, architecture, installed RHUI packages,
+    RHSM registration, and yum repository setup.
+    All the facts are gathered by a single remote command the first time any of them is needed,
+    and cached for the connection until invalidated, which happens when a command that may change
+    them is run on the connection, whether through exec_command, recv_exit_status, batch.run_many
+    or the shell channel.
+    '''
+    @staticmethod
+    def collect(connection):
+        '''
+        gather all the facts from the remote host (ignoring the cache), cache and return them
+        '''
+        cmd = "; ".join("echo '%s%s'; %s" % (MARKER, name, command)
+                        for name, command in FACT_COMMANDS)
+        _, stdout, _ = connection.exec_command(cmd)
+        raw = {}
+        name = None
+        for line in stdout.read().decode().splitlines():
+            if line.startswith(MARKER):
+                name = line[len(MARKER):]
+                raw[name] = []
+            elif name and line.strip():
+                raw[name].append(line.strip())
+        facts = dict((name, PARSERS[name](raw.get(name, []))) for name in PARSERS)
+        with _CACHE_LOCK:
+            _CACHE[_key(connection)] = facts
+        return facts
+
+    @staticmethod
+    def get(connection, name):
+        '''
+        return the given fact, collecting the facts first if they aren't cached yet
+        '''
+        with _CACHE_LOCK:
+            facts = _CACHE.get(_key(connection))
+        if facts is None:
+            facts = Facts.collect(connection)
+        return facts[name]
+
+    @staticmethod
+    def invalidate(connection=None):
+        '''
+        forget the cached facts about the host (or about all hosts if no connection is given)
+        '''
+        with _CACHE_LOCK:
+            if connection is None:
+                _CACHE.clear()
+            else:
+                _CACHE.pop(_key(connection), None)
+
+    @staticmethod
+    def notice(connection, command):
+        '''
+        forget the cached facts about the host if the command run on it may have changed them
+        (the connections call this for the commands run on them: subscription-manager, rpm, yum)
+        '''
+        if CHANGING_COMMANDS.search(command):
+            Facts.invalidate(connection)
+
+class NoticingShell(object):
+    '''
+    a shell channel passing what is typed into it to Facts.notice
+    '''
+    def __init__(self, connection, channel):
+        self._connection = connection
+        self._channel = channel
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+    def send(self, data):
+        text = data.decode("utf-8", "replace") if isinstance(data, bytes) else data
+        Facts.notice(self._connection, text)
+        return self._channel.send(data)
@@ -0,0 +1,93 @@
+""" Parallel fan-out of the same action to several hosts """
+
+from multiprocessing.pool import ThreadPool
+
+from rhui3_tests_lib.conmgr import ConMgr
+
+DEFAULT_WIDTH = 8
+
+def _host_key(host):
+    '''
+    identify a host by its name, whether given as a hostname or a connection
+    '''
+    return getattr(host, "hostname", host)
+
+class FanOutError(AssertionError):
+    '''
+    To be raised if the action failed on one or more hosts
+    '''
+    def __init__(self, errors):
+        self.errors = errors
+        AssertionError.__init__(self,
+                                "; ".join("%s: %r" % (host, err) for host, err in errors.items()))
+
+class FanOutResult(object):
+    '''
+    Per-host return values and exceptions collected by fan_out, keyed by hostname
+    '''
+    def __init__(self, hosts):
+        self.hosts = [_host_key(host) for host in hosts]
+        self.values = {}
+        self.errors = {}
+
+    def __repr__(self):
+        return "FanOutResult(values=%r, errors=%r)" % (self.values, self.errors)
+
+    @property
+    def ok(self):
+        '''
+        True if the action succeeded on all hosts
+        '''
+        return not self.errors
+
+    @property
+    def failed_hosts(self):
+        '''
+        hosts on which the action raised an exception, in the original order
+        '''
+        return [host for host in self.hosts if host in self.errors]
+
+    def hosts_where(self, predicate=bool):
+        '''
+        hosts whose return value satisfies the predicate (truthy by default), in the original order
+        '''
+        return [host for host in self.hosts if host in self.values and predicate(self.values[host])]
+
+    def check(self):
+        '''
+        raise FanOutError if the action failed on any host, otherwise return the values
+        '''
+        if self.errors:
+            raise FanOutError(dict((host, self.errors[host]) for host in self.failed_hosts))
+        return self.values
+
+def fan_out(hosts, action, width=DEFAULT_WIDTH, connect=False):
+    '''
+    run action(host) for every host concurrently, at most width hosts at a time,
+    and return a FanOutResult; exceptions are collected, not raised
+    hosts can be hostnames or connections; with connect=True, the action gets a pooled
+    connection (ConMgr.connect) to each of the given hostnames instead of the name itself
+    '''
+    hosts = list(hosts)
+    result = FanOutResult(hosts)
+    if not hosts:
+        return result
+
+    def _run(host):
+        try:
+            return host, True, action(ConMgr.connect(host) if connect else host)
+        except Exception as err:
+            return host, False, err
+
+    pool = ThreadPool(max(1, min(width, len(hosts))))
+    try:
+        outcomes = pool.map(_run, hosts)
+    finally:
+        pool.close()
+        pool.join()
+    for host, succeeded, value in outcomes:
+        if succeeded:
+            result.values[_host_key(host)] = value
+        else:
+            result.errors[_host_key(host)] = value
+    return result
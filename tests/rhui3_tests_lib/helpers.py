@@ -6,8 +6,33 @@ try:
     from configparser import ConfigParser # Python 3+
 except ImportError:
     from ConfigParser import ConfigParser # Python 2
-
-from stitches.expect import Expect
+try:
+    from StringIO import StringIO # Python 2
+except ImportError:
+    from io import StringIO # Python 3+
+
+from rhui3_tests_lib.batch import run_many
+from rhui3_tests_lib.expect import Expect
+from rhui3_tests_lib.facts import Facts
+
+CREDENTIALS_FILE = "/tmp/extra_rhui_files/credentials.conf"
+RHUI_TOOLS_CONF = "/etc/rhui/rhui-tools.conf"
+
+def _config_from_text(text):
+    """return a ConfigParser object with the given configuration file contents loaded"""
+    cfg = ConfigParser()
+    cfg.readfp(StringIO(text))
+    return cfg
+
+def _credentials_from_config(creds_cfg, site):
+    """return [username, password] for the given site from the parsed credentials file"""
+    if not creds_cfg.has_section(site):
+        raise RuntimeError("section %s does not exist in %s" % (site, CREDENTIALS_FILE))
+    if not creds_cfg.has_option(site, "username"):
+        raise RuntimeError("username does not exist inside %s in %s" % (site, CREDENTIALS_FILE))
+    if not creds_cfg.has_option(site, "password"):
+        raise RuntimeError("password does not exist inside %s in %s" % (site, CREDENTIALS_FILE))
+    return [creds_cfg.get(site, "username"), creds_cfg.get(site, "password")]
 
 class Helpers(object):
     """actions that may be repeated in specific test cases and do not belong in general utils"""
@@ -82,26 +107,17 @@ class Helpers(object):
         '''
         get the user name and password for the given site from the RHUA
         '''
-        path = "/tmp/extra_rhui_files/credentials.conf"
         creds_cfg = ConfigParser()
-        _, stdout, _ = connection.exec_command("cat %s" % path)
+        _, stdout, _ = connection.exec_command("cat %s" % CREDENTIALS_FILE)
         creds_cfg.readfp(stdout)
-        if not creds_cfg.has_section(site):
-            raise RuntimeError("section %s does not exist in %s" % (site, path))
-        if not creds_cfg.has_option(site, "username"):
-            raise RuntimeError("username does not exist inside %s in %s" % (site, path))
-        if not creds_cfg.has_option(site, "password"):
-            raise RuntimeError("password does not exist inside %s in %s" % (site, path))
-        credentials = [creds_cfg.get(site, "username"), creds_cfg.get(site, "password")]
-        return credentials
+        return _credentials_from_config(creds_cfg, site)
 
     @staticmethod
     def get_registry_url(site, connection=""):
         """get the URL for the given container registry or for the saved one (use "default" then)"""
         if site == "default":
-            cfg_file = "/etc/rhui/rhui-tools.conf"
             rhuicfg = ConfigParser()
-            _, stdout, _ = connection.exec_command("cat %s" % cfg_file)
+            _, stdout, _ = connection.exec_command("cat %s" % RHUI_TOOLS_CONF)
             rhuicfg.readfp(stdout)
             if not rhuicfg.has_option("docker", "docker_url"):
                 return None
@@ -118,17 +134,22 @@ class Helpers(object):
         """put container registry credentials into the RHUI configuration file"""
         # if "site" isn't in credentials.conf, then "data" is supposed to be:
         # [username, password, url], or just [url] if no authentication is to be used for "site";
-        # first get the RHUI config file
-        cfg_file = "/etc/rhui/rhui-tools.conf"
-        rhuicfg = ConfigParser()
-        _, stdout, _ = connection.exec_command("cat %s" % cfg_file)
-        rhuicfg.readfp(stdout)
+        # first get the RHUI config file, and the credentials file at the same time
+        cfg_file = RHUI_TOOLS_CONF
+        cfg_result, creds_result = run_many(connection, ["cat %s" % cfg_file,
+                                                         "cat %s" % CREDENTIALS_FILE])
+        # don't rewrite the config file from a failed read; the credentials file may not exist
+        if cfg_result[0] != 0:
+            raise RuntimeError("could not read %s: %s" % (cfg_file, cfg_result[2].strip()))
+        if creds_result[0] is None:
+            raise RuntimeError("could not read %s in time" % CREDENTIALS_FILE)
+        rhuicfg = _config_from_text(cfg_result[1])
         # add the relevant config section if it's not there yet
         if not rhuicfg.has_section("docker"):
             rhuicfg.add_section("docker")
         # then get the credentials
         try:
-            credentials = Helpers.get_credentials(connection, site)
+            credentials = _credentials_from_config(_config_from_text(creds_result[1]), site)
             url = Helpers.get_registry_url(site)
             rhuicfg.set("docker", "docker_url", url)
             rhuicfg.set("docker", "docker_auth", "True")
@@ -162,16 +183,15 @@ class Helpers(object):
     @staticmethod
     def restore_rhui_tools_conf(connection):
         """restore the backup copy of the RHUI tools configuration file"""
-        cfg_file = "/etc/rhui/rhui-tools.conf"
+        cfg_file = RHUI_TOOLS_CONF
         Expect.expect_retval(connection, "mv -f %s.bak %s" % (cfg_file, cfg_file))
 
     @staticmethod
     def is_iso_installation(connection):
         """return True if the remote uses a local (ISO based) yum repository, or False otherwise"""
-        yum_repo_file_from_iso = "/etc/yum.repos.d/rhui-local.repo"
-        return connection.recv_exit_status("test -f %s" % yum_repo_file_from_iso) == 0
+        return Facts.get(connection, "iso_installation")
 
     @staticmethod
     def is_registered(connection):
         """return True if the remote host is registered with RHSM, or False otherwise"""
-        return connection.recv_exit_status("subscription-manager identity") == 0
+        return Facts.get(connection, "registered")
@@ -0,0 +1,126 @@
+""" Inventory of RHUI stack nodes, indexed by role """
+
+import os
+import re
+
+HOSTS_FILE = "/etc/hosts"
+
+# section names in hosts_*.cfg (written by scripts/create-cf-stack.py) -> roles used in hostnames
+CFG_SECTIONS = {"RHUA": "rhua",
+                "CDS": "cds",
+                "HAPROXY": "hap",
+                "CLI": "cli",
+                "ATOMIC_CLI": "atomiccli",
+                "DNS": "ns",
+                "NFS": "nfs",
+                "GLUSTER": "gluster",
+                "TEST": "test"}
+
+SECTION_PATTERN = re.compile(r"^\[([A-Za-z_]+)\]\s*$")
+
+class Inventory(object):
+    '''
+    Hostnames of the stack nodes indexed by role, e.g. "cds" -> ["cds01.example.com", ...]
+
+    The source is either a hosts file (/etc/hosts, numbered names in the given domain,
+    like cds01.example.com), or a hosts_*.cfg file as written by create-cf-stack.py.
+    The file is parsed once and parsed again only if its modification time changes.
+
+    Note that a hosts_*.cfg file lists the public (e.g. EC2) names of the nodes, in the order
+    of its sections, not the names the deployment gives them (see deploy/roles/common/templates
+    /hosts.j2): the n-th CDS there is cdsNN.example.com on the stack and in RHUI, the first
+    HAProxy node is also known as cds.example.com (the CDS load balancer), etc. The hostnames
+    from a hosts_*.cfg inventory are good for connecting to the nodes from outside the stack,
+    but they aren't the ones rhui-manager lists or expects to be given.
+    '''
+    _loaded = {}
+
+    def __init__(self, path=HOSTS_FILE, domain="example.com"):
+        self.path = path
+        self.domain = domain
+        self._from_cfg = False
+        self._mtime = None
+        self._roles = {}
+        self._hostname_pattern = re.compile(r"\b([a-z]+)([0-9]+)\.%s\b" % re.escape(domain))
+
+    @classmethod
+    def load(cls, path=HOSTS_FILE, domain="example.com"):
+        '''
+        return the (shared) inventory for the given file
+        '''
+        key = (os.path.abspath(path), domain)
+        if key not in cls._loaded:
+            cls._loaded[key] = cls(path, domain)
+        return cls._loaded[key]
+
+    def _refresh(self):
+        '''
+        (re)build the role index if the file has changed since the last time
+        '''
+        mtime = os.stat(self.path).st_mtime
+        if mtime == self._mtime:
+            return
+        with open(self.path) as source:
+            lines = source.read().splitlines()
+        self._from_cfg = any(SECTION_PATTERN.match(line) for line in lines)
+        roles = self._parse_cfg(lines) if self._from_cfg else self._parse_hosts(lines)
+        self._roles = dict((role, tuple(hosts)) for role, hosts in roles.items())
+        self._mtime = mtime
+
+    def _parse_hosts(self, lines):
+        '''
+        index numbered hostnames in the domain by their prefix, in the order of appearance
+        '''
+        roles = {}
+        for line in lines:
+            line = line.split("#", 1)[0]
+            for match in self._hostname_pattern.finditer(line):
+                hosts = roles.setdefault(match.group(1), [])
+                if match.group(0) not in hosts:
+                    hosts.append(match.group(0))
+        return roles
+
+    @staticmethod
+    def _parse_cfg(lines):
+        '''
+        index hosts listed in the Ansible inventory sections
+        '''
+        roles = {}
+        role = None
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            section = SECTION_PATTERN.match(line)
+            if section:
+                name = section.group(1).upper()
+                role = CFG_SECTIONS.get(name, name.lower())
+                roles.setdefault(role, [])
+                continue
+            if role is not None:
+                host = line.split()[0]
+                if host not in roles[role]:
+                    roles[role].append(host)
+        return roles
+
+    @property
+    def from_cfg(self):
+        '''
+        True if the file is a hosts_*.cfg inventory, False if it's a hosts file
+        '''
+        self._refresh()
+        return self._from_cfg
+
+    def hosts(self, role):
+        '''
+        return a list of hostnames for the given role (empty if there are none)
+        '''
+        self._refresh()
+        return list(self._roles.get(role, ()))
+
+    def roles(self):
+        '''
+        return a sorted list of the known roles
+        '''
+        self._refresh()
+        return sorted(self._roles)
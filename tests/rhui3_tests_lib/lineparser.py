@@ -3,17 +3,21 @@ generic list parser
 """
 
 class Parser(object):
-
+    """
+    a parser of items spanning a fixed sequence of lines, compiled from the mapping;
+    it keeps no state between or during the parse() calls, so one instance can be shared
+    """
     def __init__(self, mapping=[]):
-        self.mapping = mapping
-        self.pairs = []
-        self.index = 0
-        self.linenr = 0
+        self.mapping = list(mapping)
+        # state i expects field i; a match moves the machine to the next state
+        self._states = tuple((name, pattern.match, pattern)
+                             for name, pattern in self.mapping)
 
     def parse(self, lines=[]):
-        """
-        parse the list of lines yielding mapping pairs a time
-        lines as shown in list of items on some rhui screen
+        r"""
+        parse the lines yielding mapping pairs an item at a time
+        lines as shown in list of items on some rhui screen; any iterable of lines will do,
+        and they are consumed lazily
         mapping is a list of tuples:
             [
                 (<your_key>, re.pattern()),
@@ -35,30 +39,37 @@ class Parser(object):
             ...
         where line_nr is the line number on which the item starts
         """
-        self.linenr = 0
-        self.index = 0
-        self.pairs = []
-        for line in lines:
-            self.linenr += 1
-            name, pattern = self.mapping[self.index]
-            match = pattern.match(line)
-
-            if match is None:
-                if self.index == 0:
-                    # lines not matching while "outside" an item are OK
+        states = self._states
+        if not states:
+            return
+        last = len(states) - 1
+        first_name, first_match, _ = states[0]
+        state = 0
+        pairs = []
+        for linenr, line in enumerate(lines):
+            if state == 0:
+                # lines not matching while "outside" an item are OK
+                match = first_match(line)
+                if match is None:
                     continue
-                else:
+                pairs = [(first_name, match.groups())]
+            else:
+                name, match_line, pattern = states[state]
+                match = match_line(line)
+                if match is None:
                     # but lines that don't match while processing an item are input error
-                    raise ValueError("%s doesn't match %s at line #%s" (pattern, line, self.linenr))
-
-            # add matching name--value pair and shift mapping index
-            self.pairs.append((name, match.groups()))
-            self.index = (self.index + 1) % len(self.mapping)
-
-            if self.index == 0:
+                    raise ValueError("%s doesn't match %s at line #%s" %
+                                     (pattern.pattern, line, linenr + 1))
+                pairs.append((name, match.groups()))
+            if state == last:
                 # new item starts next iteration
-                yield self.linenr - len(self.mapping), self.pairs
-                pairs = []
+                yield linenr - last, pairs
+                state = 0
+            else:
+                state += 1
 
-        def copy(self, prefix=[], suffix=[]):
-            return type(self)(mapping=prefix + self.mapping + suffix)
+    def copy(self, prefix=[], suffix=[]):
+        """
+        a parser with the given mapping pairs added before and after the current ones
+        """
+        return type(self)(mapping=prefix + self.mapping + suffix)
@@ -0,0 +1,226 @@
+"""
+Operations that rhui-manager offers both as screens and as commands
+
+Use these in setup and cleanup steps, and generally in tests that aren't about the screens
+or about the commands. The operations run either way, as chosen by the policy:
+
+  TUI      - always through the rhui-manager screens
+  CLI      - always through the rhui-manager and rhui commands
+  FASTEST  - whichever is faster (the commands, as things stand); the default
+
+The policy is taken from the RHUI_BACKEND environment variable unless set with
+Operations.set_policy. Either way, the operations return the same values: lists of names,
+sorted alphabetically. A test module that sets a policy in setup_class should go back to
+the previous one with Operations.reset_policy in teardown_class, so that the policy doesn't
+carry over to the next modules; for a few steps, use "with Operations.policy(...):" instead.
+"""
+
+from contextlib import contextmanager
+import os
+
+from rhui3_tests_lib.conmgr import ConMgr, SUDO_USER_NAME, SUDO_USER_KEY
+from rhui3_tests_lib.rhui_cmd import RHUICLI
+from rhui3_tests_lib.rhuimanager_cmdline import RHUIManagerCLI
+from rhui3_tests_lib.rhuimanager_entitlement import RHUIManagerEntitlements
+from rhui3_tests_lib.rhuimanager_instance import RHUIManagerInstance, \
+                                                InstanceAlreadyExistsError, NoSuchInstance
+from rhui3_tests_lib.rhuimanager_repo import RHUIManagerRepo
+from rhui3_tests_lib.rhuimanager_subman import RHUIManagerSubMan
+
+TUI = "tui"
+CLI = "cli"
+FASTEST = "fastest"
+POLICIES = [TUI, CLI, FASTEST]
+BACKEND_ENV_VAR = "RHUI_BACKEND"
+_POLICY = []
+
+# rhui-manager screen and rhui command node type for each kind of instance
+INSTANCE_TYPES = {"cds": ("cds", "cds"),
+                  "loadbalancers": ("loadbalancers", "haproxy"),
+                  "haproxy": ("loadbalancers", "haproxy")}
+
+class InstanceRegistrationFailed(RuntimeError):
+    '''
+    To be raised if the rhui command fails to add or delete an instance
+    '''
+
+def _run(tui, cli):
+    '''
+    run the operation as required by the policy in effect
+    '''
+    policy = Operations.get_policy()
+    if policy == TUI:
+        return tui()
+    # the commands are faster than the screens for everything here
+    return cli()
+
+def _entitlement_name(entitlement):
+    '''
+    the name of an entitlement as returned from the entitlements screen, without the file info
+    '''
+    return entitlement.splitlines()[0].strip()
+
+def _cli_repo_names(connection):
+    '''
+    the names of the repositories as listed by the command
+    '''
+    # lines look like: ID :: name
+    return [line.split(" :: ", 1)[1].strip() for line in RHUIManagerCLI.iter_repo_list(connection)
+            if " :: " in line]
+
+def _instance_types(kind):
+    '''
+    the screen and node type for the given kind of instance
+    '''
+    try:
+        return INSTANCE_TYPES[kind]
+    except KeyError:
+        raise ValueError("Unsupported instance type: '%s'. Use one of: %s." %
+                         (kind, sorted(INSTANCE_TYPES)))
+
+class Operations(object):
+    '''
+    rhui-manager operations run through the screens or the commands, as the policy says
+    '''
+    @staticmethod
+    def get_policy():
+        '''
+        return the policy in effect
+        '''
+        if _POLICY:
+            return _POLICY[-1]
+        policy = os.environ.get(BACKEND_ENV_VAR, FASTEST).lower()
+        if policy not in POLICIES:
+            raise ValueError("Unsupported %s: '%s'. Use one of: %s." %
+                             (BACKEND_ENV_VAR, policy, POLICIES))
+        return policy
+
+    @staticmethod
+    def set_policy(policy):
+        '''
+        use the given policy from now on, until reset_policy is called
+        '''
+        if policy not in POLICIES:
+            raise ValueError("Unsupported policy: '%s'. Use one of: %s." % (policy, POLICIES))
+        _POLICY.append(policy)
+
+    @staticmethod
+    def reset_policy():
+        '''
+        go back to the policy in effect before the last set_policy call
+        '''
+        if _POLICY:
+            _POLICY.pop()
+
+    @staticmethod
+    @contextmanager
+    def policy(policy):
+        '''
+        use the given policy within the with block
+        '''
+        Operations.set_policy(policy)
+        try:
+            yield
+        finally:
+            Operations.reset_policy()
+
+    @staticmethod
+    def list_repos(connection):
+        '''
+        return the names of the repositories in RHUI
+        '''
+        return sorted(_run(lambda: RHUIManagerRepo.list(connection),
+                           lambda: _cli_repo_names(connection)))
+
+    @staticmethod
+    def upload_certificate(connection, certificate_file="/tmp/extra_rhui_files/rhcert.pem"):
+        '''
+        upload a Red Hat content certificate, return the names of the valid entitlements
+        '''
+        tui = lambda: [_entitlement_name(entitlement) for entitlement in
+                       RHUIManagerEntitlements.upload_rh_certificate(connection,
+                                                                     certificate_file)]
+        return sorted(_run(tui, lambda: RHUIManagerCLI.cert_upload(connection, certificate_file)))
+
+    @staticmethod
+    def list_entitlements(connection):
+        '''
+        return the names of the valid Red Hat entitlements
+        '''
+        tui = lambda: [_entitlement_name(entitlement) for entitlement in
+                       RHUIManagerEntitlements.list_rh_entitlements(connection)]
+        return sorted(_run(tui, lambda: RHUIManagerCLI.cert_info(connection)))
+
+    @staticmethod
+    def list_subscriptions(connection, what="registered"):
+        '''
+        return the names of the registered or available subscriptions
+        '''
+        return sorted(_run(lambda: RHUIManagerSubMan.subscriptions_list(connection, what),
+                           lambda: list(RHUIManagerCLI.subscriptions_list(connection, what))))
+
+    @staticmethod
+    def list_instances(connection, kind):
+        '''
+        return the hostnames of the CDS ("cds") or HAProxy ("loadbalancers") instances
+        '''
+        screen, node_type = _instance_types(kind)
+        tui = lambda: [instance.host_name for instance in
+                       RHUIManagerInstance.list(connection, screen)]
+        return sorted(_run(tui, lambda: RHUICLI.list(connection, node_type)))
+
+    @staticmethod
+    def add_instance(connection, kind, hostname="",
+                     user_name=SUDO_USER_NAME, ssh_key_path=SUDO_USER_KEY, update=False):
+        '''
+        register a CDS or HAProxy instance (the default one for the kind if no hostname
+        is given); if it is already registered, reconfigure it if update is True,
+        otherwise raise InstanceAlreadyExistsError
+        '''
+        screen, node_type = _instance_types(kind)
+        if not hostname:
+            hostnames = ConMgr.get_cds_hostnames() if node_type == "cds" else \
+                        ConMgr.get_haproxy_hostnames()
+            hostname = hostnames[0]
+
+        def _cli():
+            if not update and hostname in RHUICLI.list(connection, node_type):
+                raise InstanceAlreadyExistsError("%s already tracked but update wasn't required" %
+                                                 hostname)
+            # like rhui-manager, accept the instance's SSH key
+            if not RHUICLI.add(connection, node_type, hostname, user_name, ssh_key_path,
+                               force=update, unsafe=True):
+                raise InstanceRegistrationFailed("Failed to add %s %s" % (node_type, hostname))
+
+        _run(lambda: RHUIManagerInstance.add_instance(connection, screen, hostname,
+                                                      user_name, ssh_key_path, update),
+             _cli)
+
+    @staticmethod
+    def delete_instances(connection, kind, hostnames=None):
+        '''
+        unregister the given CDS or HAProxy instances, or all of them;
+        raise NoSuchInstance if any of the given ones isn't registered
+        '''
+        screen, node_type = _instance_types(kind)
+
+        def _tui():
+            if hostnames is None:
+                RHUIManagerInstance.delete_all(connection, screen)
+            else:
+                RHUIManagerInstance.delete(connection, screen, hostnames)
+
+        def _cli():
+            registered = set(RHUICLI.list(connection, node_type))
+            if hostnames is None:
+                to_delete = sorted(registered)
+            else:
+                bad_instances = set(hostnames) - registered
+                if bad_instances:
+                    raise NoSuchInstance(sorted(bad_instances))
+                to_delete = hostnames
+            if to_delete and not RHUICLI.delete(connection, node_type, to_delete, force=True):
+                raise InstanceRegistrationFailed("Failed to delete %s %s" %
+                                                 (node_type, " ".join(to_delete)))
+
+        _run(_tui, _cli)
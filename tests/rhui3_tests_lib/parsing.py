@@ -0,0 +1,259 @@
+"""
+Parsers of the structured rhui-manager output
+
+The output is described by specs: a TableSpec for one record per matching line (e.g. the
+repository statuses), a KeyValueSpec for records made of "Key: value" lines (e.g. the repository
+information). The specs turn the output into typed records (named tuples) in a single pass over
+its lines. Values are converted as the spec says; missing ones are None.
+
+The subscriptions and the entitlement names are only wanted as strings, and filtering the lines
+with comprehensions, as the library has always done for them, is faster than any spec.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+import re
+
+from rhui3_tests_lib.screen import strip_ansi
+
+RepoStatus = namedtuple("RepoStatus", ["name", "status"])
+RepoInfo = namedtuple("RepoInfo", ["name", "repo_id", "type", "relative_path", "gpg_check",
+                                   "custom_gpg_keys", "redhat_gpg_key", "package_count",
+                                   "last_sync", "next_sync"])
+Entitlement = namedtuple("Entitlement", ["name", "status", "expiration", "certificate"])
+
+DATE_FORMATS = ["%Y-%m-%d", "%m-%d-%Y"]
+
+def _lines(output):
+    '''
+    the lines of the output, which can also be given as lines already
+    '''
+    if hasattr(output, "splitlines"):
+        return output.splitlines()
+    return output
+
+def yes_no(value):
+    '''
+    True for "Yes", False for "No"
+    '''
+    return value == "Yes"
+
+def none_if_none(value):
+    '''
+    None for "(None)", the value otherwise
+    '''
+    return None if value == "(None)" else value
+
+def date(value):
+    '''
+    a datetime.date from a YYYY-MM-DD or MM-DD-YYYY string, or the string if it's neither
+    '''
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    return value
+
+class TableSpec(object):
+    '''
+    one record per line matching the pattern, whose named groups are the fields of the record;
+    other lines are skipped
+    '''
+    def __init__(self, record, pattern, converters=None, uncolorify=False):
+        self.record = record
+        self.pattern = re.compile(pattern)
+        self.converters = converters or {}
+        self.uncolorify = uncolorify
+
+    def parse(self, output):
+        '''
+        yield the records from the output
+        '''
+        match_line = self.pattern.match
+        fields = self.record._fields
+        converters = [(fields.index(name), convert) for name, convert in self.converters.items()]
+        for line in _lines(output):
+            if self.uncolorify:
+                line = strip_ansi(line)
+            match = match_line(line)
+            if match is None:
+                continue
+            values = [match.group(name) for name in fields]
+            for index, convert in converters:
+                values[index] = convert(values[index])
+            yield self.record(*values)
+
+class KeyValueSpec(object):
+    '''
+    records made of "Key: value" lines, where the keys are mapped to the fields of the record;
+    a record ends with a blank line, or when one of its keys appears again;
+    lines with other keys are skipped
+    '''
+    def __init__(self, record, keys, converters=None, separator=":"):
+        self.record = record
+        self.keys = dict((key, record._fields.index(field)) for key, field in keys.items())
+        self.converters = converters or {}
+        self.separator = separator
+        self._converters = [(record._fields.index(name), convert)
+                            for name, convert in self.converters.items()]
+
+    def _record(self, values):
+        '''
+        the record made of the values
+        '''
+        for index, convert in self._converters:
+            if values[index] is not None:
+                values[index] = convert(values[index])
+        return self.record._make(values)
+
+    def parse(self, output):
+        '''
+        yield the records from the output
+        '''
+        keys = self.keys
+        separator = self.separator
+        empty = [None] * len(self.record._fields)
+        values = None
+        for line in _lines(output):
+            key, found, value = line.partition(separator)
+            if not found:
+                if values is not None and not line.strip():
+                    yield self._record(values)
+                    values = None
+                continue
+            index = keys.get(key.strip())
+            if index is None:
+                continue
+            if values is None:
+                values = empty[:]
+            elif values[index] is not None:
+                yield self._record(values)
+                values = empty[:]
+            values[index] = value.strip()
+        if values is not None:
+            yield self._record(values)
+
+# rhui-manager status: "<repo name> ..... <status>", possibly colored
+REPO_STATUS = TableSpec(RepoStatus,
+                        r"^\s*(?P<name>\S.*?)\s*\.{3,}[^A-Za-z]*(?P<status>[A-Za-z]+)",
+                        uncolorify=True)
+# rhui-manager repo info, and the repo info screen
+REPO_INFO = KeyValueSpec(RepoInfo,
+                         {"Name": "name",
+                          "ID": "repo_id",
+                          "Type": "type",
+                          "Relative Path": "relative_path",
+                          "GPG Check": "gpg_check",
+                          "Custom GPG Keys": "custom_gpg_keys",
+                          "Red Hat GPG Key": "redhat_gpg_key",
+                          "Package Count": "package_count",
+                          "Last Sync": "last_sync",
+                          "Next Sync": "next_sync"},
+                         {"gpg_check": yes_no,
+                          "custom_gpg_keys": none_if_none,
+                          "redhat_gpg_key": yes_no,
+                          "package_count": int})
+# rhui-manager subscriptions list: "  Label: <name>" and "  Pool ID: <pool ID>" per subscription
+LABEL = "  Label: "
+POOL_ID = "  Pool ID: "
+# rhui-manager cert info and cert upload: names under a status line, with expiration info
+ENTITLEMENT_STATUSES = frozenset(["Valid", "Expired"])
+EXPIRATION = "Expiration:"
+CERTIFICATE = "Certificate:"
+SKIPPED_PREFIXES = (EXPIRATION, "\x1b")
+# the repo list screen: headings and messages among the repository names
+REPO_LIST_HEADINGS = frozenset(["Custom Repositories",
+                                "Red Hat Repositories",
+                                "OSTree",
+                                "Docker",
+                                "Yum",
+                                "No repositories are currently managed by the RHUI"])
+
+def parse_status(output):
+    '''
+    return the list of RepoStatus records; dict() turns it into {name: status}
+    '''
+    return list(REPO_STATUS.parse(output))
+
+def parse_repo_info(output):
+    '''
+    return the information about a repository as a RepoInfo record, or None if there's none
+    '''
+    return next(REPO_INFO.parse(output), None)
+
+def parse_subscriptions(output):
+    '''
+    return {subscription name: pool ID}
+    '''
+    # the lines are gone through twice, so they can't be a generator
+    lines = list(_lines(output))
+    labels = [line[len(LABEL):] for line in lines if line.startswith(LABEL)]
+    pool_ids = [line[len(POOL_ID):] for line in lines if line.startswith(POOL_ID)]
+    return dict(zip(labels, pool_ids))
+
+def parse_entitlements(output):
+    '''
+    return the list of Entitlement records; the expiration is a datetime.date
+    '''
+    if not hasattr(output, "splitlines"):
+        output = "\n".join(output)
+    if "\x1b" in output:
+        output = strip_ansi(output)
+    entitlements = []
+    dates = {}
+    status = None
+    name = None
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith(EXPIRATION):
+            # the expiration info belongs to the entitlement above it
+            if name is not None:
+                expiration, found, certificate = line[len(EXPIRATION):].partition(CERTIFICATE)
+                expiration = expiration.strip()
+                if expiration not in dates:
+                    dates[expiration] = date(expiration)
+                entitlements.append(Entitlement(name, status, dates[expiration],
+                                                certificate.strip() if found else None))
+                name = None
+            continue
+        if name is not None:
+            entitlements.append(Entitlement(name, status, None, None))
+            name = None
+        if line in ENTITLEMENT_STATUSES:
+            status = line
+        elif line and status is not None:
+            name = line
+    if name is not None:
+        entitlements.append(Entitlement(name, status, None, None))
+    return entitlements
+
+def parse_entitlement_names(output):
+    '''
+    return the names of the entitlements (of any status), like parse_entitlements but faster
+    '''
+    lines = list(map(str.strip, _lines(output)))
+    # the names follow the first status line
+    for start, line in enumerate(lines):
+        if line in ENTITLEMENT_STATUSES or strip_ansi(line) in ENTITLEMENT_STATUSES:
+            break
+    else:
+        return []
+    # colored status lines are the only ones beginning with an escape character;
+    # plain ones, which are rare, are removed afterwards rather than looked for on every line
+    names = [line for line in lines[start + 1:] if line and not line.startswith(SKIPPED_PREFIXES)]
+    for status in ENTITLEMENT_STATUSES:
+        while status in names:
+            names.remove(status)
+    return names
+
+def parse_repo_list(output):
+    '''
+    return the names of the repositories on the repo list screen
+    '''
+    names = []
+    for line in _lines(output):
+        line = line.strip()
+        if line and line not in REPO_LIST_HEADINGS:
+            names.append(line)
+    return names
@@ -0,0 +1,100 @@
+"""
+Polling with exponential backoff and an overall deadline
+
+Wait loops call poll() instead of sleeping for a fixed time between checks:
+
+    poll(lambda: not RHUIManagerRepo.list(connection), "repo.delete_all.list", timeout=360)
+
+The check is called until done(value) is true for the value it returns. The first check is made
+at once, the next one INITIAL seconds later, and the interval grows by FACTOR after each check,
+up to MAXIMUM seconds, with up to JITTER (a fraction of the interval) added or taken at random
+so that parallel pollers don't keep hitting a host at the same time. Conditions that already
+hold cost a single check, short operations are noticed within about a second, and long ones
+aren't checked more often than every MAXIMUM seconds.
+
+Polling ends early if stop(value) is true, e.g. when the operation failed. The exceptions listed
+in errors count as "not done yet". If the deadline passes, PollTimeout is raised. Either way,
+the outcome, the number of checks and the time spent are logged (and returned) as a PollResult.
+This module only uses the standard library so that the scripts can use it, too.
+"""
+
+from collections import namedtuple
+import logging
+import random
+import time
+
+INITIAL = 0.5
+FACTOR = 1.5
+MAXIMUM = 10
+JITTER = 0.1
+
+DONE = "done"
+STOPPED = "stopped"
+TIMED_OUT = "timed out"
+
+# outcome is DONE, STOPPED or TIMED_OUT; value is what the last check returned (None if it failed)
+PollResult = namedtuple("PollResult", ["name", "outcome", "value", "checks", "elapsed"])
+
+class PollTimeout(RuntimeError):
+    '''
+    To be raised if polling doesn't end before the deadline
+    '''
+    def __init__(self, result, error=None):
+        message = "%s: not done after %d checks in %.1f s; the last check returned %r" % \
+                  (result.name, result.checks, result.elapsed, result.value)
+        if error is not None:
+            message += " and failed with: %s" % error
+        RuntimeError.__init__(self, message)
+        self.result = result
+        self.error = error
+
+def intervals(initial=INITIAL, factor=FACTOR, maximum=MAXIMUM, jitter=JITTER):
+    '''
+    yield the (endless) sequence of the numbers of seconds to wait between the checks
+    '''
+    interval = initial
+    while True:
+        yield interval * random.uniform(1 - jitter, 1 + jitter)
+        interval = min(interval * factor, maximum)
+
+def poll(check, name, timeout=None, done=bool, stop=None, errors=(), **backoff):
+    '''
+    call check() with backoff until done(value) or stop(value) is true for the value it returns,
+    or until the timeout (in seconds; None to wait forever) expires;
+    the backoff keyword arguments are those of intervals();
+    return a PollResult, raise PollTimeout
+    '''
+    start = time.time()
+    deadline = start + timeout if timeout is not None else None
+    checks = 0
+    value = None
+    error = None
+    waits = intervals(**backoff)
+    while True:
+        if checks:
+            interval = next(waits)
+            if deadline is not None:
+                # the last check is made at the deadline
+                interval = min(interval, max(deadline - time.time(), 0))
+            time.sleep(interval)
+        checks += 1
+        try:
+            value = check()
+            error = None
+        except errors as err:
+            value = None
+            error = err
+        outcome = None
+        if error is None and done(value):
+            outcome = DONE
+        elif error is None and stop is not None and stop(value):
+            outcome = STOPPED
+        elif deadline is not None and time.time() >= deadline:
+            outcome = TIMED_OUT
+        if outcome is None:
+            continue
+        result = PollResult(name, outcome, value, checks, round(time.time() - start, 3))
+        logging.getLogger("rhui3_tests_lib.polling").info("%s", result)
+        if outcome == TIMED_OUT:
+            raise PollTimeout(result, error)
+        return result
@@ -0,0 +1,83 @@
+""" rhui-manager prompts and the patterns matching them, compiled once """
+
+import re
+
+try:
+    from functools import lru_cache # Python 3.2+
+except ImportError:
+    def lru_cache(maxsize=128):
+        '''
+        minimal stand-in for functools.lru_cache on Python 2: drop everything when full
+        '''
+        def _decorator(func):
+            cache = {}
+            def _wrapper(*args):
+                if args not in cache:
+                    if len(cache) >= maxsize:
+                        cache.clear()
+                    cache[args] = func(*args)
+                return cache[args]
+            return _wrapper
+        return _decorator
+
+CACHE_SIZE = 256
+
+HOME = r"rhui \(home\) =>"
+ANY_SCREEN = r"rhui \(.*\) =>"
+MORE_COMMANDS = "for more commands:"
+CONFIRM_SELECTION = r"Enter value \([\d]+-[\d]+\) to toggle selection, " + \
+                    r"'c' to confirm selections, or '\?' for more commands: "
+
+HOME_PATTERN = re.compile(".*" + HOME + ".*", re.DOTALL)
+COMMAND_NOT_FOUND_PATTERN = re.compile(".*command not found.*", re.DOTALL)
+USERNAME_PATTERN = re.compile(".*RHUI Username:.*", re.DOTALL)
+INVALID_LOGIN_PATTERN = re.compile(".*Invalid login.*", re.DOTALL)
+PROCEED_PATTERN = re.compile(r".*Proceed\? \(y/n\).*", re.DOTALL)
+ENTER_VALUE_PATTERN = re.compile(".*Enter value .*:.*", re.DOTALL)
+LIST_PATTERN = re.compile("(.*)" + MORE_COMMANDS, re.DOTALL)
+REPO_LIST_PATTERN = re.compile(r"l\r\n(.*)\r\n-+\r\nrhui\s* \(repo\)\s* =>", re.DOTALL)
+PACKAGE_LIST_PATTERN = re.compile(r".*only\.\r\n(.*)\r\n-+\r\nrhui\s* \(repo\)\s* =>", re.DOTALL)
+REPO_INFO_PATTERN = re.compile(r".*(Name:.*)\r\n\r\n-+\r\nrhui\s* \(repo\)\s* =>", re.DOTALL)
+
+@lru_cache(CACHE_SIZE)
+def screen(screen_name):
+    '''
+    the prompt of the given rhui-manager screen
+    '''
+    return re.compile(r".*rhui \(" + screen_name + r"\) =>.*", re.DOTALL)
+
+@lru_cache(CACHE_SIZE)
+def any_screen(prefix=""):
+    '''
+    any rhui-manager prompt, preceded by the given expression
+    '''
+    return re.compile(".*" + prefix + ".*" + ANY_SCREEN + ".*", re.DOTALL)
+
+@lru_cache(CACHE_SIZE)
+def listing(prompt):
+    '''
+    everything up to the given prompt (group 1)
+    '''
+    return re.compile("(.*)" + prompt, re.DOTALL)
+
+@lru_cache(CACHE_SIZE)
+def redrawn(count):
+    '''
+    the list as redrawn after the given number of selection toggles (group 1)
+    '''
+    return re.compile(r"(?:.*?%s){%d}(.*?)%s" % (MORE_COMMANDS, count - 1, MORE_COMMANDS),
+                      re.DOTALL)
+
+@lru_cache(CACHE_SIZE)
+def single_choice(item):
+    '''
+    the index of the given item in a single choice list (group 1)
+    '''
+    return re.compile(r".*([0-9]+)\s+-\s+" + item + r"\s*\n.*to abort:.*", re.DOTALL)
+
+@lru_cache(CACHE_SIZE)
+def proceed_with(caption):
+    '''
+    the values listed under the caption above the Proceed? prompt (group 1)
+    '''
+    return re.compile(".*" + caption + r"\r\n(.*)\r\nProceed\? \(y/n\).*", re.DOTALL)
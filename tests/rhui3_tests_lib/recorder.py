@@ -0,0 +1,596 @@
+"""
+Recording and replaying of the traffic on connections
+
+A RecordingConnection wraps a connection and writes what goes through it to a recording:
+the input sent to the shell, the output received from the shell (in the chunks it came in),
+commands run with exec_command (including those on session channels, as in batch.run_many)
+and recv_exit_status, and SFTP transfers, each with the time it happened. A ReplayConnection
+plays a recording back, as fast as the library reads it, without any host to connect to.
+
+Passwords are not recorded: they are replaced with REDACTED in commands ("--password ..."),
+in output (e.g. "password = ..." in configuration files), and in the input sent after a password
+prompt; the replay redacts what it's given in the same way before comparing it with the recording.
+
+A recording is a gzipped file with a JSON object per line: a header first, then events,
+which are lists starting with the time in seconds since the recording started and the kind
+of the event. ConMgr records or replays connections per test module if RHUI_RECORD or
+RHUI_REPLAY is set (see conmgr), and Recording shows where the time went in a recording:
+
+    for seconds, step in Recording.load("test_cmdline.root@rhua.example.com.rec.gz").slowest():
+        print("%8.1f %s" % (seconds, step))
+"""
+
+import gzip
+import json
+import re
+import threading
+import time
+
+from rhui3_tests_lib.expect import ExpectFailed
+from rhui3_tests_lib.facts import Facts, NoticingShell
+
+# raw output is stored as text, one character per byte
+ENCODING = "latin-1"
+REDACTED = "<redacted>"
+SECRET_PATTERNS = [re.compile(r"(--password[= ])(\S+)"),
+                   re.compile(r"(password[ \t]*[=:][ \t]*)(\S+)", re.IGNORECASE)]
+PASSWORD_PROMPT = re.compile(r"password:\s*$", re.IGNORECASE)
+
+class ReplayMismatch(ExpectFailed):
+    '''
+    To be raised if the connection is used differently than when the recording was made
+    '''
+
+def _text(data):
+    '''
+    the data as text to be stored in a recording
+    '''
+    return data if isinstance(data, type(u"")) else data.decode(ENCODING)
+
+def redact(text):
+    '''
+    the text with the passwords in it replaced with REDACTED
+    '''
+    for pattern in SECRET_PATTERNS:
+        text = pattern.sub(lambda match: match.group(1) + REDACTED, text)
+    return text
+
+def recording_name(module, hostname, username, number=0):
+    '''
+    the file name of the recording of the given connection made in the given module;
+    the number distinguishes unpooled connections to the same host
+    '''
+    suffix = "-%d" % number if number else ""
+    return "%s.%s@%s%s.rec.gz" % (module, username, hostname, suffix)
+
+class Recorder(object):
+    '''
+    A recording being written
+    '''
+    def __init__(self, path, hostname, username, module=""):
+        self.path = path
+        self.start = time.time()
+        self._lock = threading.Lock()
+        self._execs = 0
+        # whether the shell is asking for a password
+        self.password_prompt = False
+        self._file = gzip.open(path, "wb")
+        self._write({"hostname": hostname, "username": username, "module": module,
+                     "started": self.start})
+
+    def _write(self, record):
+        self._file.write((json.dumps(record) + "\n").encode())
+
+    def log(self, kind, *data):
+        '''
+        add an event, with the passwords in its text redacted
+        '''
+        data = [redact(item) if isinstance(item, type(u"")) else item for item in data]
+        with self._lock:
+            if not self._file.closed:
+                self._write([round(time.time() - self.start, 4), kind] + data)
+
+    def new_exec(self, command):
+        '''
+        log the start of a command, return the number identifying its other events
+        '''
+        with self._lock:
+            self._execs += 1
+            number = self._execs
+        self.log("exec", number, command)
+        return number
+
+    def close(self):
+        '''
+        finish the recording
+        '''
+        with self._lock:
+            self._file.close()
+
+class Recording(object):
+    '''
+    A recording as read from a file
+    '''
+    def __init__(self, header, events):
+        self.header = header
+        self.events = events
+
+    @staticmethod
+    def load(path):
+        '''
+        read the recording; if the file is truncated (the recording process was killed),
+        the events written until then are returned
+        '''
+        lines = []
+        recording = gzip.open(path, "rb")
+        try:
+            for line in recording:
+                lines.append(line)
+        except (EOFError, IOError):
+            pass
+        finally:
+            recording.close()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line.decode()))
+            except ValueError:
+                # cut off
+                break
+        return Recording(records[0], records[1:])
+
+    def steps(self):
+        '''
+        (seconds, description) for each input line and command: how long it took
+        until the next input was sent, or until the command finished
+        '''
+        steps = []
+        last_input = None
+        exec_starts = {}
+        for event in self.events:
+            moment, kind = event[:2]
+            if kind == "send":
+                if last_input is not None:
+                    steps.append((moment - last_input[0], "shell: " + last_input[1]))
+                last_input = (moment, event[2].strip() or repr(event[2]))
+            elif kind == "exec":
+                exec_starts[event[2]] = (moment, event[3])
+            elif kind == "exit" and event[2] in exec_starts:
+                started, command = exec_starts.pop(event[2])
+                steps.append((moment - started, "exec: " + command))
+            elif kind == "status":
+                steps.append((event[-1], "status: " + event[2]))
+        if last_input is not None and self.events:
+            steps.append((self.events[-1][0] - last_input[0], "shell: " + last_input[1]))
+        return steps
+
+    def slowest(self, count=10):
+        '''
+        the count steps that took the longest
+        '''
+        return sorted(self.steps(), key=lambda step: step[0], reverse=True)[:count]
+
+# recording
+
+class _RecordingShell(object):
+    '''
+    a shell channel logging what is sent to and received from it
+    '''
+    def __init__(self, channel, recorder):
+        self._channel = channel
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+    def send(self, data):
+        self._recorder.log("send", REDACTED if self._recorder.password_prompt else _text(data))
+        self._recorder.password_prompt = False
+        return self._channel.send(data)
+
+    def recv(self, size):
+        data = self._channel.recv(size)
+        if data:
+            text = _text(data)
+            self._recorder.password_prompt = bool(PASSWORD_PROMPT.search(text))
+            self._recorder.log("recv", text)
+        return data
+
+class _RecordingFile(object):
+    '''
+    stdin, stdout or stderr of a command, logging the data written or read
+    '''
+    def __init__(self, channel_file, recorder, number, kind):
+        self._file = channel_file
+        self._recorder = recorder
+        self._number = number
+        self._kind = kind
+        self.channel = _RecordingSession(channel_file.channel, recorder, number)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def write(self, data):
+        self._recorder.log(self._kind, self._number, _text(data))
+        return self._file.write(data)
+
+    def read(self, *args):
+        data = self._file.read(*args)
+        self._recorder.log(self._kind, self._number, _text(data))
+        return data
+
+    def readlines(self):
+        lines = self._file.readlines()
+        self._recorder.log(self._kind, self._number, "".join(_text(line) for line in lines))
+        return lines
+
+class _RecordingSession(object):
+    '''
+    a session (exec) channel logging the command, its output and its exit status
+    '''
+    def __init__(self, channel, recorder, number=None):
+        self._channel = channel
+        self._recorder = recorder
+        self._number = number
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+    def exec_command(self, command):
+        self._number = self._recorder.new_exec(command)
+        return self._channel.exec_command(command)
+
+    def recv(self, size):
+        data = self._channel.recv(size)
+        self._recorder.log("stdout", self._number, _text(data))
+        return data
+
+    def recv_stderr(self, size):
+        data = self._channel.recv_stderr(size)
+        self._recorder.log("stderr", self._number, _text(data))
+        return data
+
+    def recv_exit_status(self):
+        status = self._channel.recv_exit_status()
+        self._recorder.log("exit", self._number, status)
+        return status
+
+class _RecordingTransport(object):
+    def __init__(self, transport, recorder):
+        self._transport = transport
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+    def open_session(self, *args, **kwargs):
+        return _RecordingSession(self._transport.open_session(*args, **kwargs), self._recorder)
+
+class _RecordingClient(object):
+    def __init__(self, client, recorder):
+        self._client = client
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def get_transport(self):
+        return _RecordingTransport(self._client.get_transport(), self._recorder)
+
+    def exec_command(self, command, *args, **kwargs):
+        number = self._recorder.new_exec(command)
+        files = self._client.exec_command(command, *args, **kwargs)
+        return tuple(_RecordingFile(channel_file, self._recorder, number, kind)
+                     for channel_file, kind in zip(files, ["stdin", "stdout", "stderr"]))
+
+class _RecordingSFTP(object):
+    def __init__(self, sftp, recorder):
+        self._sftp = sftp
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._sftp, name)
+
+    def put(self, localpath, remotepath, *args, **kwargs):
+        self._recorder.log("sftp", "put", localpath, remotepath)
+        return self._sftp.put(localpath, remotepath, *args, **kwargs)
+
+    def get(self, remotepath, localpath, *args, **kwargs):
+        self._recorder.log("sftp", "get", remotepath, localpath)
+        return self._sftp.get(remotepath, localpath, *args, **kwargs)
+
+    def open(self, filename, mode="r", *args, **kwargs):
+        self._recorder.log("sftp", "open", filename, mode)
+        return self._sftp.open(filename, mode, *args, **kwargs)
+
+class RecordingConnection(object):
+    '''
+    A connection whose traffic is written to a recording
+    '''
+    def __init__(self, connection, recorder):
+        self.connection = connection
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        # hostname, output_shell, last_stdout, etc. are those of the underlying connection
+        return getattr(self.connection, name)
+
+    @property
+    def channel(self):
+        '''
+        the shell channel, recorded
+        '''
+        return _RecordingShell(self.connection.channel, self.recorder)
+
+    @property
+    def cli(self):
+        '''
+        the SSH client, recorded
+        '''
+        return _RecordingClient(self.connection.cli, self.recorder)
+
+    @property
+    def sftp(self):
+        '''
+        the SFTP session; transfers are recorded, the contents of the files aren't
+        '''
+        return _RecordingSFTP(self.connection.sftp, self.recorder)
+
+    def exec_command(self, command):
+        self.connection.last_command = command
+        result = self.cli.exec_command(command)
+        Facts.notice(self, command)
+        return result
+
+    def recv_exit_status(self, command, timeout=10):
+        started = time.time()
+        status = self.connection.recv_exit_status(command, timeout)
+        # stitches keeps the output as bytes
+        self.recorder.log("status", command, status,
+                          _text(self.connection.last_stdout or ""),
+                          _text(self.connection.last_stderr or ""),
+                          round(time.time() - started, 4))
+        return status
+
+# replaying
+
+class _ReplayShell(object):
+    '''
+    a shell channel returning the recorded output
+    '''
+    def __init__(self, events):
+        self._events = events
+        self._position = 0
+        self._pending = b""
+        self._timeout = None
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+
+    def gettimeout(self):
+        return self._timeout
+
+    def send(self, data):
+        # output that hasn't been read yet stays available
+        while self._position < len(self._events) and self._events[self._position][1] == "recv":
+            self._pending += self._events[self._position][2].encode(ENCODING)
+            self._position += 1
+        if self._position >= len(self._events):
+            raise ReplayMismatch("Sent %r after the end of the recording" % data)
+        recorded = self._events[self._position][2]
+        if recorded != REDACTED and redact(_text(data)) != recorded:
+            raise ReplayMismatch("Sent %r instead of %r" % (data, recorded))
+        self._position += 1
+        return len(data)
+
+    def recv_ready(self):
+        return bool(self._pending) or (self._position < len(self._events) and
+                                       self._events[self._position][1] == "recv")
+
+    def recv(self, size):
+        if not self._pending and self.recv_ready():
+            self._pending = self._events[self._position][2].encode(ENCODING)
+            self._position += 1
+        # no more output came before the next input: like a closed channel, which makes
+        # expecting more fail right away rather than after the timeout
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def close(self):
+        pass
+
+class _ReplayFile(object):
+    '''
+    stdin, stdout or stderr of a replayed command
+    '''
+    def __init__(self, data, channel):
+        self._data = data
+        self._encoded = data.encode(ENCODING)
+        self._position = 0
+        self.channel = channel
+
+    def write(self, data):
+        pass
+
+    def read(self, size=-1):
+        start = self._position
+        self._position = len(self._encoded) if size < 0 else \
+                         min(start + size, len(self._encoded))
+        return self._encoded[start:self._position]
+
+    def readlines(self):
+        return self._data.splitlines(True)
+
+    def close(self):
+        pass
+
+class _ReplaySFTPFile(object):
+    '''
+    a file opened over SFTP; the contents of the files aren't recorded, so it's empty
+    '''
+    def read(self, size=-1):
+        return b""
+
+    def write(self, data):
+        pass
+
+    def set_pipelined(self, pipelined=True):
+        pass
+
+    def close(self):
+        pass
+
+class _ReplaySession(object):
+    '''
+    a session (exec) channel returning the recorded output and exit status of a command
+    '''
+    def __init__(self, connection, command=None):
+        self._connection = connection
+        self.stdout = self.stderr = ""
+        self.status = None
+        self.eof_received = False
+        if command is not None:
+            self.exec_command(command)
+
+    def exec_command(self, command):
+        self.stdout, self.stderr, self.status = self._connection.take_exec(command)
+        self.eof_received = True
+
+    def recv_ready(self):
+        return bool(self.stdout)
+
+    def recv(self, size):
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        return data.encode(ENCODING)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv_stderr(self, size):
+        data, self.stderr = self.stderr[:size], self.stderr[size:]
+        return data.encode(ENCODING)
+
+    def exit_status_ready(self):
+        return True
+
+    def recv_exit_status(self):
+        return self.status
+
+    def close(self):
+        pass
+
+class _ReplayTransport(object):
+    def __init__(self, connection):
+        self._connection = connection
+
+    def is_active(self):
+        return True
+
+    def open_session(self):
+        return _ReplaySession(self._connection)
+
+class _ReplayClient(object):
+    def __init__(self, connection):
+        self._connection = connection
+
+    def get_transport(self):
+        return _ReplayTransport(self._connection)
+
+    def exec_command(self, command):
+        session = _ReplaySession(self._connection, command)
+        return (_ReplayFile("", session), _ReplayFile(session.stdout, session),
+                _ReplayFile(session.stderr, session))
+
+class _ReplaySFTP(object):
+    def __init__(self, connection):
+        self._connection = connection
+
+    def put(self, localpath, remotepath, *args, **kwargs):
+        self._connection.take("sftp", "put", localpath, remotepath)
+
+    def get(self, remotepath, localpath, *args, **kwargs):
+        self._connection.take("sftp", "get", remotepath, localpath)
+
+    def open(self, filename, mode="r", *args, **kwargs):
+        self._connection.take("sftp", "open", filename, mode)
+        return _ReplaySFTPFile()
+
+class ReplayConnection(object):
+    '''
+    A stand-in for a connection, playing back a recording of it
+    '''
+    def __init__(self, recording):
+        self.hostname = recording.header["hostname"]
+        self.username = recording.header["username"]
+        self.key_filename = None
+        self.output_shell = False
+        self.last_command = ""
+        self.last_stdout = ""
+        self.last_stderr = ""
+        self._lock = threading.Lock()
+        self._other = [event for event in recording.events if event[1] not in ["send", "recv"]]
+        self.channel = NoticingShell(self, _ReplayShell([event for event in recording.events
+                                                         if event[1] in ["send", "recv"]]))
+        self.cli = _ReplayClient(self)
+        self.sftp = _ReplaySFTP(self)
+
+    @staticmethod
+    def load(path):
+        '''
+        a connection replaying the recording in the given file
+        '''
+        return ReplayConnection(Recording.load(path))
+
+    def take(self, kind, *data):
+        '''
+        remove the first recorded event of the kind beginning with the data, and return it
+        '''
+        with self._lock:
+            for index, event in enumerate(self._other):
+                if event[1] == kind and tuple(event[2:2 + len(data)]) == data:
+                    return self._other.pop(index)
+        raise ReplayMismatch("Not in the recording: %s %s" % (kind, " ".join(map(str, data))))
+
+    def take_exec(self, command):
+        '''
+        remove the recorded events of the command, return its stdout, stderr and exit status
+        '''
+        self.last_command = command
+        command = redact(command)
+        with self._lock:
+            numbers = [event[2] for event in self._other
+                       if event[1] == "exec" and event[3] == command]
+            if not numbers:
+                raise ReplayMismatch("Not in the recording: exec %s" % command)
+            related = [event for event in self._other if event[2] == numbers[0] and
+                       event[1] in ["exec", "stdin", "stdout", "stderr", "exit"]]
+            for event in related:
+                self._other.remove(event)
+        output = {"stdin": "", "stdout": "", "stderr": "", "exit": None}
+        for event in related[1:]:
+            if event[1] == "exit":
+                output["exit"] = event[3]
+            else:
+                output[event[1]] += event[3]
+        return output["stdout"], output["stderr"], output["exit"]
+
+    def exec_command(self, command):
+        result = self.cli.exec_command(command)
+        Facts.notice(self, command)
+        return result
+
+    def recv_exit_status(self, command, timeout=10):
+        self.last_command = command
+        Facts.notice(self, command)
+        event = self.take("status", redact(command))
+        self.last_stdout, self.last_stderr = event[4], event[5]
+        return event[3]
+
+    def is_connected(self):
+        return True
+
+    def drain(self):
+        pass
+
+    def disconnect(self):
+        pass
@@ -1,6 +1,9 @@
 ''' Methods to interact with the rhui command '''
 
+import time
+
 from rhui3_tests_lib.conmgr import ConMgr, SUDO_USER_NAME, SUDO_USER_KEY
+from rhui3_tests_lib.timing import Timing
 
 def _validate_node_type(text):
     '''
@@ -10,6 +13,17 @@ def _validate_node_type(text):
     if text not in ok_types:
         raise ValueError("Unsupported node type: '%s'. Use one of: %s." % (text, ok_types))
 
+def _succeeded(connection, command, step, default):
+    '''
+    Run the command as the given timed step and return True if it exited with 0;
+    only the durations of such runs are recorded.
+    '''
+    start = time.time()
+    if connection.recv_exit_status(command, timeout=Timing.timeout(step, default)) != 0:
+        return False
+    Timing.record(step, time.time() - start)
+    return True
+
 class RHUICLI(object):
     '''
     The 'rhui' command-line interface (shell commands to control CDS and HAProxy nodes).
@@ -46,7 +60,7 @@ class RHUICLI(object):
             cmd += " -f"
         if unsafe:
             cmd += " -u"
-        return connection.recv_exit_status(cmd, timeout=300) == 0
+        return _succeeded(connection, cmd, "rhui.%s.add" % node_type, 300)
 
     @staticmethod
     def reinstall(connection, node_type, hostname):
@@ -56,7 +70,7 @@ class RHUICLI(object):
         '''
         _validate_node_type(node_type)
         cmd = "rhui %s reinstall %s" % (node_type, hostname)
-        return connection.recv_exit_status(cmd, timeout=120) == 0
+        return _succeeded(connection, cmd, "rhui.%s.reinstall" % node_type, 120)
 
     @staticmethod
     def delete(connection, node_type, hostnames="", force=False):
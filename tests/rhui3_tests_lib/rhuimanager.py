@@ -3,21 +3,80 @@
 import logging
 import re
 
-from stitches.expect import Expect, ExpectFailed
+from rhui3_tests_lib.expect import Expect, ExpectFailed, CTRL_C
 
+from rhui3_tests_lib import prompts
 from rhui3_tests_lib.conmgr import ConMgr
+from rhui3_tests_lib.screen import Screen
 from rhui3_tests_lib.util import Util
 
 SELECT_PATTERN = re.compile(r'^  (x|-)  (\d+) :')
-PROCEED_PATTERN = re.compile(r'.*Proceed\? \(y/n\).*', re.DOTALL)
-CONFIRM_PATTERN_STRING = r"Enter value \([\d]+-[\d]+\) to toggle selection, " + \
-                         r"'c' to confirm selections, or '\?' for more commands: "
 
 class NotSelectLine(ValueError):
     """
     to be raised when the line isn't actually a selection line
     """
 
+class RHUIManagerSession(object):
+    '''
+    A shell connection with one rhui-manager process kept running across operations.
+
+    Pass it to the RHUIManager* screen methods instead of the connection: they get to their
+    screens from the home screen of the running rhui-manager instead of launching it again,
+    and they leave it running when they're done. rhui-manager exits when the session is closed:
+
+        with RHUIManagerSession(RHUA) as session:
+            RHUIManagerRepo.add_rh_repo_by_repo(session, [...])
+            RHUIManagerSync.sync_repo(session, [...])
+
+    If rhui-manager exits in the meantime (e.g. after a failure), it is launched again.
+    '''
+    def __init__(self, connection):
+        self.connection = connection
+        self.running = False
+
+    def __getattr__(self, name):
+        # channel, cli, hostname, etc. are those of the underlying connection
+        return getattr(self.connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def home(self):
+        '''
+        get to the home screen, (re)launching rhui-manager if it isn't running
+        '''
+        if self.running:
+            Expect.enter(self.connection, "home")
+            try:
+                state = Expect.expect_list(self.connection,
+                                           [(prompts.HOME_PATTERN, 1),
+                                            (prompts.COMMAND_NOT_FOUND_PATTERN, 2)],
+                                           60)
+            except ExpectFailed:
+                # stuck somewhere unexpected; get out of it and start over
+                Expect.enter(self.connection, CTRL_C)
+                Expect.enter(self.connection, "q")
+                Expect.expect(self.connection, "root@")
+                state = 2
+            if state == 1:
+                return
+            self.running = False
+        Expect.enter(self.connection, "rhui-manager")
+        Expect.expect(self.connection, prompts.HOME_PATTERN, 60)
+        self.running = True
+
+    def close(self):
+        '''
+        quit rhui-manager if it is running
+        '''
+        if self.running:
+            Expect.enter(self.connection, "q")
+            self.running = False
+
 class RHUIManager(object):
     '''
     Basic functions to manage rhui-manager.
@@ -34,30 +93,59 @@ class RHUIManager(object):
         return match.groups()[0] == 'x', int(match.groups()[1])
 
     @staticmethod
-    def list_lines(connection, prompt='', enter_l=True):
+    def list_screen(connection, prompt='', enter_l=True):
         '''
-        list items on screen returning a list of lines seen
+        list items on screen returning the Screen with everything seen
         eats prompt!!!
         '''
         if enter_l:
             Expect.enter(connection, "l")
-        match = Expect.match(connection, re.compile("(.*)" + prompt, re.DOTALL))
-        return match[0].splitlines()
+        match = Expect.match(connection, prompts.listing(prompt), timeout=60)
+        return Screen(match[0])
+
+    @staticmethod
+    def list_lines(connection, prompt='', enter_l=True):
+        '''
+        list items on screen returning a list of lines seen
+        eats prompt!!!
+        '''
+        return RHUIManager.list_screen(connection, prompt, enter_l).lines
+
+    @staticmethod
+    def _toggle(connection, items, requested):
+        '''
+        toggle the selection of the given list items all at once,
+        check that the list as redrawn after the last one has them all selected
+        '''
+        indices = [str(item.index) for item in items]
+        Expect.enter(connection, "\n".join(indices))
+        # the list is redrawn (followed by the prompt) after each toggle
+        redrawn = Screen(Expect.match(connection, prompts.redrawn(len(indices)))[0])
+        selected = set(str(item.index) for item in redrawn.items() if item.selected)
+        if not selected.issuperset(indices):
+            logging.debug("Selected: %s", sorted(selected))
+            logging.debug("Expected: %s", indices)
+            raise ExpectFailed("Failed to select: %s" % requested)
 
     @staticmethod
     def select(connection, value_list):
         '''
         Select list of items (multiple choice)
         '''
+        screen = Screen(Expect.match(connection, prompts.LIST_PATTERN, timeout=60)[0])
+        items = dict((item.label, item) for item in screen.items())
+        to_toggle = []
         for value in value_list:
-            match = Expect.match(connection, re.compile(r".*-\s+([0-9]+)\s*:[^\n]*\s+" +
-                                                        re.escape(value) +
-                                                        r"\s*\n.*for more commands:.*", re.DOTALL))
-            Expect.enter(connection, match[0])
-            match = Expect.match(connection, re.compile(r".*x\s+([0-9]+)\s*:[^\n]*\s+" +
-                                                        re.escape(value) +
-                                                        r"\s*\n.*for more commands:.*", re.DOTALL))
-            Expect.enter(connection, "l")
+            if value not in items:
+                # the value can be preceded by other text on the line
+                labels = [label for label in items if label.endswith(" " + value)]
+                if not labels:
+                    raise ExpectFailed("%s is not on the list: %s" % (value, sorted(items)))
+                value = labels[-1]
+            if not items[value].selected and items[value] not in to_toggle:
+                to_toggle.append(items[value])
+        if to_toggle:
+            RHUIManager._toggle(connection, to_toggle, value_list)
         Expect.enter(connection, "c")
 
     @staticmethod
@@ -65,13 +153,19 @@ class RHUIManager(object):
         '''
         Select list of items (multiple choice)
         '''
-        lines = RHUIManager.list_lines(connection, prompt=CONFIRM_PATTERN_STRING, enter_l=False)
-        for item in itemslist:
-            for line in lines:
-                if item in line:
-                    index = list(filter(str.isdigit, str(lines[lines.index(line)-1])))[0]
-                    Expect.enter(connection, index)
-                    break
+        screen = RHUIManager.list_screen(connection,
+                                         prompt=prompts.CONFIRM_SELECTION,
+                                         enter_l=False)
+        items = screen.items()
+        labels = dict((item.label, item) for item in reversed(items))
+        to_toggle = []
+        for wanted in itemslist:
+            item = labels.get(wanted) or next((item for item in items if wanted in item.label),
+                                              None)
+            if item is not None and item not in to_toggle:
+                to_toggle.append(item)
+        if to_toggle:
+            RHUIManager._toggle(connection, to_toggle, itemslist)
         Expect.enter(connection, "c")
 
     @staticmethod
@@ -79,10 +173,7 @@ class RHUIManager(object):
         '''
         Select one item (single choice)
         '''
-        match = Expect.match(connection, re.compile(r".*([0-9]+)\s+-\s+" +
-                                                    item +
-                                                    r"\s*\n.*to abort:.*",
-                                                    re.DOTALL))
+        match = Expect.match(connection, prompts.single_choice(item))
         Expect.enter(connection, match[0])
 
     @staticmethod
@@ -90,30 +181,41 @@ class RHUIManager(object):
         '''
         Select all items
         '''
-        Expect.expect(connection, "Enter value .*:")
+        Expect.expect(connection, prompts.ENTER_VALUE_PATTERN)
         Expect.enter(connection, "a")
-        Expect.expect(connection, "Enter value .*:")
+        Expect.expect(connection, prompts.ENTER_VALUE_PATTERN)
         Expect.enter(connection, "c")
 
     @staticmethod
-    def quit(connection, prefix="", timeout=10):
+    def quit(connection, prefix="", timeout=60):
         '''
         Quit from rhui-manager
 
         Use @param prefix to specify something to expect before exiting
-        Use @param timeout to specify the timeout
+        Use @param timeout to specify the timeout; the prompt usually comes back only after
+        the remote work (registering, deleting, scheduling, ...) is done
         '''
-        Expect.expect(connection, prefix + r".*rhui \(.*\) =>", timeout)
-        Expect.enter(connection, "q")
+        Expect.expect(connection, prompts.any_screen(prefix), timeout)
+        RHUIManager.leave(connection)
 
     @staticmethod
-    def logout(connection, prefix=""):
+    def leave(connection):
+        '''
+        Quit from rhui-manager whose prompt has already been seen;
+        keep it running if it's a session
+        '''
+        if not isinstance(connection, RHUIManagerSession):
+            Expect.enter(connection, "q")
+
+    @staticmethod
+    def logout(connection, prefix="", timeout=60):
         '''
         Logout from rhui-manager
 
         Use @param prefix to specify something to expect before exiting
+        Use @param timeout to specify the timeout
         '''
-        Expect.expect(connection, prefix + r".*rhui \(.*\) =>")
+        Expect.expect(connection, prompts.any_screen(prefix), timeout)
         Expect.enter(connection, "logout")
 
     @staticmethod
@@ -121,7 +223,7 @@ class RHUIManager(object):
         '''
         Proceed without check (avoid this function when possible!)
         '''
-        Expect.expect(connection, r"Proceed\? \(y/n\)")
+        Expect.expect(connection, prompts.PROCEED_PATTERN)
         Expect.enter(connection, "y")
 
     @staticmethod
@@ -131,11 +233,7 @@ class RHUIManager(object):
 
         Use @param skip_list to skip meaningless 2nd-level headers
         '''
-        selected = Expect.match(connection,
-                                re.compile(".*" +
-                                           caption +
-                                           r"\r\n(.*)\r\nProceed\? \(y/n\).*",
-                                           re.DOTALL))[0].splitlines()
+        selected = Expect.match(connection, prompts.proceed_with(caption))[0].splitlines()
         selected_clean = []
         for val in selected:
             val = val.strip()
@@ -164,10 +262,13 @@ class RHUIManager(object):
             key = "sm"
         else:
             raise ValueError("Unsupported screen name: " + screen_name)
-        Expect.enter(connection, "rhui-manager")
-        Expect.expect(connection, r"rhui \(home\) =>")
+        if isinstance(connection, RHUIManagerSession):
+            connection.home()
+        else:
+            Expect.enter(connection, "rhui-manager")
+            Expect.expect(connection, prompts.HOME_PATTERN, 60)
         Expect.enter(connection, key)
-        Expect.expect(connection, r"rhui \(" + screen_name + r"\) =>")
+        Expect.expect(connection, prompts.screen(screen_name))
 
     @staticmethod
     def initial_run(connection, username="admin", password="admin"):
@@ -176,29 +277,27 @@ class RHUIManager(object):
         '''
         Expect.enter(connection, "rhui-manager")
         state = Expect.expect_list(connection,
-                                   [(re.compile(".*RHUI Username:.*", re.DOTALL), 1),
-                                    (re.compile(r".*rhui \(home\) =>.*", re.DOTALL), 2)])
+                                   [(prompts.USERNAME_PATTERN, 1),
+                                    (prompts.HOME_PATTERN, 2)],
+                                   60)
         if state == 1:
             Expect.enter(connection, username)
             Expect.expect(connection, "RHUI Password:")
             Expect.enter(connection, password)
             password_state = Expect.expect_list(connection,
-                                                [(re.compile(".*Invalid login.*",
-                                                             re.DOTALL),
-                                                  1),
-                                                 (re.compile(r".*rhui \(home\) =>.*",
-                                                             re.DOTALL),
-                                                  2)])
+                                                [(prompts.INVALID_LOGIN_PATTERN, 1),
+                                                 (prompts.HOME_PATTERN, 2)],
+                                                60)
             if password_state == 1:
                 initial_password = Util.get_initial_password(connection)
                 if not initial_password:
                     raise RuntimeError("Could not get the initial rhui-manager password.")
                 Expect.enter(connection, "rhui-manager")
-                Expect.expect(connection, ".*RHUI Username:")
+                Expect.expect(connection, ".*RHUI Username:", 60)
                 Expect.enter(connection, username)
                 Expect.expect(connection, "RHUI Password:")
                 Expect.enter(connection, initial_password)
-                Expect.expect(connection, r"rhui \(home\) =>")
+                Expect.expect(connection, prompts.HOME_PATTERN, 60)
         Expect.enter(connection, "q")
 
     @staticmethod
@@ -214,7 +313,7 @@ class RHUIManager(object):
         Expect.enter(connection, password)
         Expect.expect(connection, "Re-enter Password:")
         Expect.enter(connection, password)
-        Expect.expect(connection, "Password successfully updated")
+        Expect.expect(connection, "Password successfully updated", 60)
         # this action is supposed to log the admin out and thus delete the user cert
         Expect.expect_retval(connection, "test -f /root/.rhui/%s/user.crt" % rhua, 1)
 
@@ -233,4 +332,5 @@ class RHUIManager(object):
         '''
         Expect.ping_pong(connection,
                          "rhui-manager status",
-                         "Entitlement CA certificate expiration date.*OK")
+                         "Entitlement CA certificate expiration date.*OK",
+                         60)
@@ -1,6 +1,6 @@
 """ RHUIManager Client functions """
 
-from stitches.expect import Expect
+from rhui3_tests_lib.expect import Expect
 
 from rhui3_tests_lib.rhuimanager import RHUIManager
 
@@ -55,8 +55,9 @@ class RHUIManagerClient(object):
             rpmrelease = "1"
         Expect.expect(connection,
                       "Location: %s/%s-%s/build/RPMS/noarch/%s-%s-%s.noarch.rpm" % \
-                      (dirname, rpmname, rpmversion, rpmname, rpmversion, rpmrelease))
-        Expect.enter(connection, "q")
+                      (dirname, rpmname, rpmversion, rpmname, rpmversion, rpmrelease),
+                      60)
+        RHUIManager.leave(connection)
 
     @staticmethod
     def create_container_conf_rpm(connection, dirname, rpmname, rpmversion="", rpmrelease="",
@@ -82,8 +83,9 @@ class RHUIManagerClient(object):
             rpmrelease = "1"
         Expect.expect(connection,
                       "Location: %s/%s-%s/build/RPMS/noarch/%s-%s-%s.noarch.rpm" % \
-                      (dirname, rpmname, rpmversion, rpmname, rpmversion, rpmrelease))
-        Expect.enter(connection, "q")
+                      (dirname, rpmname, rpmversion, rpmname, rpmversion, rpmrelease),
+                      60)
+        RHUIManager.leave(connection)
 
     @staticmethod
     def create_atomic_conf_pkg(connection, dirname, tarname, certpath, certkey, port=""):
@@ -105,4 +107,4 @@ class RHUIManagerClient(object):
         Expect.expect(connection,
                       "Location: %s/%s.tar.gz" % \
                       (dirname, tarname))
-        Expect.enter(connection, "q")
+        RHUIManager.leave(connection)
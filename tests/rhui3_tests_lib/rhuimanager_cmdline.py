@@ -1,23 +1,20 @@
 """ RHUIManagerCLI functions """
 
+from itertools import islice
 from os.path import join
 import re
-import time
 
 import nose
 
-from stitches.expect import Expect
+from rhui3_tests_lib.expect import Expect
+from rhui3_tests_lib.batch import exit_statuses
+from rhui3_tests_lib.catalog import invalidates_catalog
+from rhui3_tests_lib.parsing import parse_entitlement_names, parse_repo_info, \
+                                    parse_subscriptions
+from rhui3_tests_lib.rhuimanager_sync import RHUIManagerSync
+from rhui3_tests_lib.timing import Timing
 from rhui3_tests_lib.util import Util
 
-def _get_repo_status(connection, repo_name):
-    '''
-    get the status of the given repository
-    '''
-    Expect.enter(connection, "rhui-manager status")
-    status = Expect.match(connection, re.compile(".*%s[^A-Z]*([A-Za-z]*).*" % re.escape(repo_name),
-                                                 re.DOTALL))[0]
-    return status
-
 def _ent_list(stdout):
     '''
     return a list of entitlements based on the given output (produced by cert upload/info)
@@ -30,10 +27,9 @@ def _ent_list(stdout):
     except IndexError:
         raise RuntimeError("Unexpected output: %s" % response)
     if status == "Valid":
-        # only pay attention to lines containing products
-        # (which are non-empty lines below the header, without expriration and file name info)
-        entitlements = [line for line in lines[3:] if line and not line.startswith("Expiration")]
-        return entitlements
+        # only pay attention to the products, not to the expiration and file name info;
+        # as before, products in an "Expired" section below the valid ones are listed, too
+        return parse_entitlement_names(lines)
     elif status == "Expired" or status == "No Red Hat entitlements found.":
         # return an empty list
         return []
@@ -72,30 +68,38 @@ class RHUIManagerCLI(object):
         return _ent_list(stdout)
 
     @staticmethod
-    def repo_unused(connection, by_repo_id=False):
+    def iter_repo_unused(connection, by_repo_id=False):
         '''
-        return a list of repos that are entitled but not added to RHUI
+        yield the repos that are entitled but not added to RHUI
         '''
         # beware: if using by_repo_id, products will be followed by one or more repo IDs
         # on separate lines that start with two spaces
         cmd = "rhui-manager repo unused"
         if by_repo_id:
             cmd += " --by_repo_id"
-        _, stdout, _ = connection.exec_command(cmd)
-        response = stdout.read().decode().splitlines()
-        # return everything but the first four lines, which contain headers
-        return response[4:]
+        # skip the first four lines, which contain headers
+        return islice(Util.command_lines(connection, cmd), 4, None)
+
+    @staticmethod
+    def repo_unused(connection, by_repo_id=False):
+        '''
+        return a list of repos that are entitled but not added to RHUI
+        '''
+        return list(RHUIManagerCLI.iter_repo_unused(connection, by_repo_id))
 
     @staticmethod
+    @invalidates_catalog
     def repo_add(connection, repo):
         '''
         add a repo specified by its product name
         '''
         Expect.ping_pong(connection,
                          "rhui-manager repo add --product_name \"" + repo + "\"",
-                         "Successfully added")
+                         "Successfully added",
+                         timeout=120)
 
     @staticmethod
+    @invalidates_catalog
     def repo_add_by_repo(connection, repo_ids):
         '''
         add a repo specified by its ID
@@ -106,9 +110,9 @@ class RHUIManagerCLI(object):
                          timeout=300)
 
     @staticmethod
-    def repo_list(connection, ids_only=False, redhat_only=False, delimiter=""):
+    def iter_repo_list(connection, ids_only=False, redhat_only=False, delimiter=""):
         '''
-        show repos; can show IDs only, RH repos only, and accepts a delimiter
+        yield the lines of the repo list; can show IDs only, RH repos only, and accepts a delimiter
         '''
         cmd = "rhui-manager repo list"
         if ids_only:
@@ -117,38 +121,41 @@ class RHUIManagerCLI(object):
             cmd += " --redhat_only"
         if delimiter:
             cmd += " --delimiter %s" % delimiter
-        _, stdout, _ = connection.exec_command(cmd)
-        response = stdout.read().decode().strip()
-        return response
+        return Util.command_lines(connection, cmd)
 
     @staticmethod
+    def repo_list(connection, ids_only=False, redhat_only=False, delimiter=""):
+        '''
+        show repos; can show IDs only, RH repos only, and accepts a delimiter
+        '''
+        return "\n".join(RHUIManagerCLI.iter_repo_list(connection, ids_only, redhat_only,
+                                                       delimiter)).strip()
+
+    @staticmethod
+    @invalidates_catalog
     def repo_sync(connection, repo_id, repo_name):
         '''
         sync a repo
         '''
         Expect.ping_pong(connection,
                          "rhui-manager repo sync --repo_id " + repo_id,
-                         "successfully scheduled for the next available timeslot")
-        repo_status = _get_repo_status(connection, repo_name)
-        while repo_status in ["Never", "Running", "Unknown"]:
-            time.sleep(10)
-            repo_status = _get_repo_status(connection, repo_name)
-        nose.tools.assert_equal(repo_status, "Success")
+                         "successfully scheduled for the next available timeslot",
+                         timeout=60)
+        RHUIManagerSync.wait_till_repo_synced(connection, [repo_name], "cli")
 
     @staticmethod
     def repo_info(connection, repo_id):
         '''
-        return a dictionary containing information about the given repo
+        return information about the given repo as a parsing.RepoInfo record
         '''
-        _, stdout, _ = connection.exec_command("rhui-manager repo info --repo_id %s" % repo_id)
-        all_lines = stdout.read().decode().splitlines()
-        if all_lines[0] == "repository %s was not found" % repo_id:
+        info = parse_repo_info(Util.command_lines(connection,
+                                                  "rhui-manager repo info --repo_id %s" % repo_id))
+        if info is None:
             raise RuntimeError("Invalid repository ID.")
-        info_pair_list = [line.split(":", 1) for line in all_lines]
-        info_dict = {i[0].replace(" ", "").lower(): i[1].lstrip() for i in info_pair_list}
-        return info_dict
+        return info
 
     @staticmethod
+    @invalidates_catalog
     def repo_create_custom(connection,
                            repo_id,
                            path="",
@@ -179,7 +186,8 @@ class RHUIManagerCLI(object):
             cmd += " --gpg_public_keys %s" % gpg_public_keys
         # get a list of invalid GPG key files (will be implicitly empty if that option isn't used)
         key_list = gpg_public_keys.split(",")
-        bad_keys = [key for key in key_list if connection.recv_exit_status("test -f %s" % key)]
+        key_statuses = exit_statuses(connection, ["test -f %s" % key for key in key_list])
+        bad_keys = [key for key, status in zip(key_list, key_statuses) if status]
         # possible output (more or less specific):
         out = {"missing_options": "Usage:",
                "invalid_id": "Only.*valid in a repository ID",
@@ -193,7 +201,8 @@ class RHUIManagerCLI(object):
                                     (re.compile(".*%s.*" % out["invalid_id"], re.DOTALL), 2),
                                     (re.compile(".*%s.*" % out["repo_exists"], re.DOTALL), 3),
                                     (re.compile(".*%s.*" % out["bad_gpg"], re.DOTALL), 4),
-                                    (re.compile(".*%s.*" % out["success"], re.DOTALL), 5)])
+                                    (re.compile(".*%s.*" % out["success"], re.DOTALL), 5)],
+                                   60)
         if state == 1 or state == 2:
             raise ValueError("the given repo ID is unusable")
         if state == 3:
@@ -204,6 +213,7 @@ class RHUIManagerCLI(object):
         nose.tools.assert_equal(state, 5)
 
     @staticmethod
+    @invalidates_catalog
     def repo_delete(connection, repo_id):
         '''
         delete the given repo
@@ -215,30 +225,39 @@ class RHUIManagerCLI(object):
         '''
         associate errata metadata with a repo
         '''
-        Expect.expect_retval(connection,
-                             "rhui-manager repo add_errata " +
-                             "--repo_id %s --updateinfo %s" % (repo_id, updateinfo),
-                             timeout=120)
+        with Timing.step("cli.repo.add_errata", 120) as timeout:
+            Expect.expect_retval(connection,
+                                 "rhui-manager repo add_errata " +
+                                 "--repo_id %s --updateinfo %s" % (repo_id, updateinfo),
+                                 timeout=timeout)
 
     @staticmethod
     def repo_add_comps(connection, repo_id, comps):
         '''
         associate comps metadata with a repo
         '''
-        Expect.expect_retval(connection,
-                             "rhui-manager repo add_comps " +
-                             "--repo_id %s --comps %s" % (repo_id, comps),
-                             timeout=120)
+        with Timing.step("cli.repo.add_comps", 120) as timeout:
+            Expect.expect_retval(connection,
+                                 "rhui-manager repo add_comps " +
+                                 "--repo_id %s --comps %s" % (repo_id, comps),
+                                 timeout=timeout)
+
+    @staticmethod
+    def iter_packages(connection, repo_id):
+        '''
+        yield the packages present in the repo
+        '''
+        return Util.command_lines(connection, "rhui-manager packages list --repo_id %s" % repo_id)
 
     @staticmethod
     def packages_list(connection, repo_id):
         '''
         return a list of packages present in the repo
         '''
-        _, stdout, _ = connection.exec_command("rhui-manager packages list --repo_id %s" % repo_id)
-        return stdout.read().decode().splitlines()
+        return list(RHUIManagerCLI.iter_packages(connection, repo_id))
 
     @staticmethod
+    @invalidates_catalog
     def packages_upload(connection, repo_id, path):
         '''
         upload a package or a directory with packages to the custom repo
@@ -260,14 +279,19 @@ class RHUIManagerCLI(object):
             expected_packages = []
         nose.tools.eq_(successfully_uploaded_packages, expected_packages)
 
+    @staticmethod
+    def iter_client_labels(connection):
+        '''
+        yield the repo labels in the RHUA
+        '''
+        return Util.command_lines(connection, "rhui-manager client labels")
+
     @staticmethod
     def client_labels(connection):
         '''
         view repo labels in the RHUA; returns a list of the labels
         '''
-        _, stdout, _ = connection.exec_command("rhui-manager client labels")
-        labels = stdout.read().decode().splitlines()
-        return labels
+        return list(RHUIManagerCLI.iter_client_labels(connection))
 
     @staticmethod
     def client_cert(connection, repo_labels, name, days, directory):
@@ -277,7 +301,8 @@ class RHUIManagerCLI(object):
         Expect.ping_pong(connection,
                          "rhui-manager client cert --repo_label %s " % ",".join(repo_labels) +
                          "--name %s --days %s --dir %s" % (name, str(days), directory),
-                         "Entitlement certificate created at %s/%s.crt" % (directory, name))
+                         "Entitlement certificate created at %s/%s.crt" % (directory, name),
+                         timeout=60)
 
     @staticmethod
     def client_rpm(connection, certdata, rpmdata, directory, unprotected_repos=None, proxy=""):
@@ -319,7 +344,8 @@ class RHUIManagerCLI(object):
         Expect.ping_pong(connection,
                          cmd,
                          "Location: %s/%s-%s/build/RPMS/noarch/%s-%s-%s.noarch.rpm" % \
-                         (directory, rpmdata[0], rpmdata[1], rpmdata[0], rpmdata[1], rpmdata[2]))
+                         (directory, rpmdata[0], rpmdata[1], rpmdata[0], rpmdata[1], rpmdata[2]),
+                         timeout=60)
 
     @staticmethod
     def client_content_source(connection, certdata, rpmdata, directory):
@@ -344,7 +370,8 @@ class RHUIManagerCLI(object):
         Expect.ping_pong(connection,
                          cmd,
                          "Location: %s/%s-%s/build/RPMS/noarch/%s-%s-1.noarch.rpm" % \
-                         (directory, rpmdata[0], rpmdata[1], rpmdata[0], rpmdata[1]))
+                         (directory, rpmdata[0], rpmdata[1], rpmdata[0], rpmdata[1]),
+                         timeout=60)
 
     @staticmethod
     def subscriptions_list(connection, what="registered", poolonly=False):
@@ -357,17 +384,13 @@ class RHUIManagerCLI(object):
         cmd = "rhui-manager subscriptions list --%s" % what
         if poolonly:
             cmd += " --pool-only"
-        _, stdout, _ = connection.exec_command(cmd)
-        subs = stdout.read().decode().splitlines()
+        subs = Util.command_lines(connection, cmd)
         # if "ESC" and some control characters are included, then RHBZ#1577052 has regressed
         # if only pool IDs are requested, return their list as read from the output;
         # otherwise, create and return a dict with subscription names and corresponding pool IDs
         if poolonly:
-            return subs
-        labels = [l.replace("  Label: ", "") for l in subs if l.startswith("  Label")]
-        poolids = [p.replace("  Pool ID: ", "") for p in subs if p.startswith("  Pool")]
-        sub_dict = dict(zip(labels, poolids))
-        return sub_dict
+            return list(subs)
+        return parse_subscriptions(subs)
 
     @staticmethod
     def subscriptions_register(connection, pool):
@@ -2,10 +2,16 @@
 
 import re
 
-from stitches.expect import CTRL_C, Expect
+from rhui3_tests_lib import prompts
+from rhui3_tests_lib.expect import CTRL_C, Expect
 from rhui3_tests_lib.rhuimanager import RHUIManager
+from rhui3_tests_lib.screen import Screen
 
 PROMPT = r"rhui \(entitlements\) => "
+CUSTOM_LIST_PATTERN = re.compile("c\r\n\r\nCustom Repository Entitlements\r\n\r\n(.*)" + PROMPT,
+                                 re.DOTALL)
+UPDATED_PATTERN = re.compile(".*The RHUI will be updated.*", re.DOTALL)
+NO_SUCH_FILE_PATTERN = re.compile(".*Cannot find file.*", re.DOTALL)
 
 class MissingCertificate(Exception):
     """
@@ -22,6 +28,20 @@ class IncompatibleCertificate(Exception):
     Raised when a certificate is incompatible with RHUI
     """
 
+def _entitlements(screen):
+    '''
+    the entitlements on the screen: their names and certificate lines, up to "pem"
+    '''
+    entitlements = []
+    name = None
+    for line in screen.lines:
+        if "pem" in line and name:
+            entitlements.append(name + "\r\n" + line[:line.index("pem") + 3])
+            name = None
+        elif line.strip():
+            name = line.strip()
+    return entitlements
+
 class RHUIManagerEntitlements(object):
     '''
     Represents -= Entitlements Manager =- RHUI screen
@@ -33,7 +53,7 @@ class RHUIManagerEntitlements(object):
         '''
         RHUIManager.screen(connection, "entitlements")
         lines = RHUIManager.list_lines(connection, prompt=PROMPT)
-        Expect.enter(connection, 'q')
+        RHUIManager.leave(connection)
         return lines
 
     @staticmethod
@@ -44,17 +64,9 @@ class RHUIManagerEntitlements(object):
 
         RHUIManager.screen(connection, "entitlements")
         Expect.enter(connection, "l")
-        match = Expect.match(connection,
-                             re.compile("(.*)" + PROMPT, re.DOTALL))
-
-        matched_string = match[0].replace('l\r\n\r\nRed Hat Entitlements\r\n\r\n  ' +
-                                          '\x1b[92mValid\x1b[0m\r\n    ', '', 1)
-
-        entitlements_list = []
-        pattern = re.compile('(.*?\r\n.*?pem)', re.DOTALL)
-        for entitlement in pattern.findall(matched_string):
-            entitlements_list.append(entitlement.strip())
-        Expect.enter(connection, 'q')
+        screen = Screen(Expect.match(connection, prompts.listing(PROMPT), timeout=60)[0])
+        entitlements_list = _entitlements(screen)
+        RHUIManager.leave(connection)
         return entitlements_list
 
 
@@ -66,16 +78,14 @@ class RHUIManagerEntitlements(object):
 
         RHUIManager.screen(connection, "entitlements")
         Expect.enter(connection, "c")
-        match = Expect.match(connection,
-                             re.compile("c\r\n\r\nCustom Repository Entitlements\r\n\r\n(.*)" +
-                                        PROMPT, re.DOTALL))[0]
+        match = Expect.match(connection, CUSTOM_LIST_PATTERN, timeout=60)[0]
 
         repo_list = []
 
         for line in match.splitlines():
             if "Name:" in line:
                 repo_list.append(line.replace("Name:", "").strip())
-        Expect.enter(connection, 'q')
+        RHUIManager.leave(connection)
         return sorted(repo_list)
 
     @staticmethod
@@ -91,26 +101,20 @@ class RHUIManagerEntitlements(object):
         Expect.expect(connection, "Full path to the new content certificate:")
         Expect.enter(connection, certificate_file)
         state = Expect.expect_list(connection,
-                                   [(re.compile(".*The RHUI will be updated.*", re.DOTALL), 1),
-                                    (re.compile(".*Cannot find file.*", re.DOTALL), 2)])
+                                   [(UPDATED_PATTERN, 1), (NO_SUCH_FILE_PATTERN, 2)],
+                                   60)
         if state == 2:
             Expect.enter(connection, CTRL_C)
             RHUIManager.quit(connection)
             raise MissingCertificate("No such certificate file: %s" % certificate_file)
         Expect.enter(connection, "y")
-        match = Expect.match(connection,
-                             re.compile("(.*)" + PROMPT, re.DOTALL))
-        matched_string = match[0].replace('l\r\n\r\nRed Hat Entitlements\r\n\r\n  ' +
-                                          '\x1b[92mValid\x1b[0m\r\n    ', '', 1)
-        if bad_cert_msg in matched_string:
-            Expect.enter(connection, 'q')
+        screen = Screen(Expect.match(connection, prompts.listing(PROMPT), timeout=60)[0])
+        if bad_cert_msg in screen.text:
+            RHUIManager.leave(connection)
             raise BadCertificate()
-        if incompatible_cert_msg in matched_string:
-            Expect.enter(connection, 'q')
+        if incompatible_cert_msg in screen.text:
+            RHUIManager.leave(connection)
             raise IncompatibleCertificate()
-        entitlements_list = []
-        pattern = re.compile('(.*?\r\n.*?pem)', re.DOTALL)
-        for entitlement in pattern.findall(matched_string):
-            entitlements_list.append(entitlement.strip())
-        Expect.enter(connection, 'q')
+        entitlements_list = _entitlements(screen)
+        RHUIManager.leave(connection)
         return entitlements_list
@@ -2,11 +2,12 @@
 
 import re
 
-from stitches.expect import Expect, CTRL_C
+from rhui3_tests_lib.expect import Expect, CTRL_C
 
 from rhui3_tests_lib.conmgr import ConMgr, SUDO_USER_NAME, SUDO_USER_KEY
 from rhui3_tests_lib.rhuimanager import RHUIManager
 from rhui3_tests_lib.instance import Instance
+from rhui3_tests_lib.timing import Timing
 
 class InstanceAlreadyExistsError(Exception):
     """
@@ -61,7 +62,7 @@ class RHUIManagerInstance(object):
                         re.DOTALL), 1),
             (re.compile(r".*instance with that hostname exists.*Continue\?\s+\(y/n\): ",
                         re.DOTALL), 2)
-                                               ])
+                                               ], 30)
         if state == 2:
             # cds or haproxy of the same hostname is already being tracked
             if not update:
@@ -85,18 +86,19 @@ class RHUIManagerInstance(object):
         state = Expect.expect_list(connection, [
             (re.compile(".*Cannot find file, please enter a valid path.*", re.DOTALL), 1),
             (re.compile(".*Checking that instance ports are reachable.*", re.DOTALL), 2)
-        ])
+        ], 30)
         if state == 1:
             # don't know how to continue with invalid path: raise an exception
             Expect.enter(connection, CTRL_C)
-            Expect.enter(connection, "q")
+            RHUIManager.leave(connection)
             raise InvalidSshKeyPath(ssh_key_path)
         # all OK
         # if the SSH key is unknown, rhui-manager now asks you to confirm it; say yes
         if not known_host:
             Expect.enter(connection, "y")
         # some installation and configuration through Puppet happens here, let it take its time
-        RHUIManager.quit(connection, "The .*was successfully configured.", 180)
+        with Timing.step("%s.add" % screen, 180) as timeout:
+            RHUIManager.quit(connection, "The .*was successfully configured.", timeout)
 
 
     @staticmethod
@@ -106,7 +108,7 @@ class RHUIManagerInstance(object):
         '''
         # first check if the instances are really tracked
         tracked_instances = RHUIManagerInstance.list(connection, screen)
-        hostnames = [instance.host_name for instance in tracked_instances]
+        hostnames = set(instance.host_name for instance in tracked_instances)
         bad_instances = [i for i in instances if i not in hostnames]
         if bad_instances:
             raise NoSuchInstance(bad_instances)
@@ -114,7 +116,8 @@ class RHUIManagerInstance(object):
         Expect.enter(connection, "d")
         RHUIManager.select_items(connection, instances)
         Expect.enter(connection, "y")
-        RHUIManager.quit(connection, "Unregistered", 180)
+        with Timing.step("%s.delete" % screen, 180) as timeout:
+            RHUIManager.quit(connection, "Unregistered", timeout)
 
     @staticmethod
     def delete_all(connection, screen):
@@ -138,7 +141,6 @@ class RHUIManagerInstance(object):
         '''
         RHUIManager.screen(connection, screen)
         # eating prompt!!
-        lines = RHUIManager.list_lines(connection, r"rhui \(" + screen + r"\) => ")
-        ret = Instance.parse(lines)
-        Expect.enter(connection, 'q')
+        ret = Instance.parse(RHUIManager.list_screen(connection, r"rhui \(" + screen + r"\) => "))
+        RHUIManager.leave(connection)
         return [cds for _, cds in ret]
@@ -2,13 +2,16 @@
 
 from os.path import basename
 import re
-import time
 
 import nose
 
-from stitches.expect import CTRL_C, Expect
+from rhui3_tests_lib.expect import CTRL_C, Expect
 
+from rhui3_tests_lib import prompts
+from rhui3_tests_lib.catalog import RepoCatalog, invalidates_catalog
 from rhui3_tests_lib.helpers import Helpers
+from rhui3_tests_lib.parsing import parse_repo_list
+from rhui3_tests_lib.polling import poll
 from rhui3_tests_lib.util import Util
 from rhui3_tests_lib.rhuimanager import RHUIManager
 
@@ -24,6 +27,7 @@ class RHUIManagerRepo(object):
     Represents -= Repository Management =- RHUI screen
     '''
     @staticmethod
+    @invalidates_catalog
     def add_custom_repo(connection,
                         reponame,
                         displayname="",
@@ -47,7 +51,8 @@ class RHUIManagerRepo(object):
                                      1),
                                     (re.compile(".*repository.*already exists.*Unique ID.*:",
                                                 re.DOTALL),
-                                     2)])
+                                     2)],
+                                   30)
         if state == 1:
             Expect.enter(connection, displayname)
             if displayname != "":
@@ -122,6 +127,7 @@ class RHUIManagerRepo(object):
             raise AlreadyExistsError()
 
     @staticmethod
+    @invalidates_catalog
     def add_rh_repo_all(connection):
         '''
         add a new Red Hat content repository (All in Certificate)
@@ -134,6 +140,7 @@ class RHUIManagerRepo(object):
         RHUIManager.quit(connection, "", 180)
 
     @staticmethod
+    @invalidates_catalog
     def add_rh_repo_by_product(connection, productlist):
         '''
         add a new Red Hat content repository (By Product)
@@ -149,6 +156,7 @@ class RHUIManagerRepo(object):
         RHUIManager.quit(connection)
 
     @staticmethod
+    @invalidates_catalog
     def add_rh_repo_by_repo(connection, repolist):
         '''
         add a new Red Hat content repository (By Repository)
@@ -171,6 +179,7 @@ class RHUIManagerRepo(object):
         RHUIManager.quit(connection)
 
     @staticmethod
+    @invalidates_catalog
     def add_container(connection, containername, containerid="", displayname="", credentials=""):
         '''
         add a new Red Hat container
@@ -226,22 +235,9 @@ class RHUIManagerRepo(object):
         RHUIManager.screen(connection, "repo")
         Expect.enter(connection, "l")
         # eating prompt!!
-        pattern = re.compile(r'l\r\n(.*)\r\n-+\r\nrhui\s* \(repo\)\s* =>',
-                             re.DOTALL)
-        ret = Expect.match(connection, pattern, grouplist=[1])[0]
-        reslist = map(str.strip, str(ret).splitlines())
-        repolist = []
-        for line in reslist:
-            if line in ["",
-                        "Custom Repositories",
-                        "Red Hat Repositories",
-                        "OSTree",
-                        "Docker",
-                        "Yum",
-                        "No repositories are currently managed by the RHUI"]:
-                continue
-            repolist.append(line)
-        Expect.enter(connection, 'q')
+        ret = Expect.match(connection, prompts.REPO_LIST_PATTERN, grouplist=[1], timeout=60)[0]
+        repolist = parse_repo_list(ret)
+        RHUIManager.leave(connection)
         return repolist
 
     @staticmethod
@@ -249,18 +245,13 @@ class RHUIManagerRepo(object):
         '''
         get repo version
         '''
-        repolist = RHUIManagerRepo.list(connection)
         # delete escape back slash from the reponame
         reponame = reponame.replace("\\", "")
-        # get full repo name with its version from the list of all repos
-        full_reponame = next((s for s in repolist if reponame in s), None)
-        #return full_reponame
-        # get its version
-        repo_version = re.sub(r'^.*\((.*?)\)[^\(]*$', r'\g<1>', full_reponame)
-
-        return repo_version
+        # look the repo up by its name without the version, or by a part of the name
+        return RepoCatalog.get(connection).version(reponame)
 
     @staticmethod
+    @invalidates_catalog
     def delete_repo(connection, repolist):
         '''
         delete a repository from the RHUI
@@ -272,6 +263,7 @@ class RHUIManagerRepo(object):
         RHUIManager.quit(connection)
 
     @staticmethod
+    @invalidates_catalog
     def delete_all_repos(connection):
         '''
         delete all repositories from the RHUI
@@ -291,10 +283,10 @@ class RHUIManagerRepo(object):
         RHUIManager.proceed_without_check(connection)
         # Wait until all repos are deleted
         RHUIManager.quit(connection, "", 360)
-        while RHUIManagerRepo.list(connection):
-            time.sleep(10)
+        poll(lambda: not RHUIManagerRepo.list(connection), "repo.delete_all.list")
 
     @staticmethod
+    @invalidates_catalog
     def upload_content(connection, repolist, path):
         '''
         upload content to a custom repository
@@ -333,9 +325,7 @@ class RHUIManagerRepo(object):
         Expect.expect(connection, r"\(blank line for no filter\):")
         Expect.enter(connection, package)
 
-        pattern = re.compile(r'.*only\.\r\n(.*)\r\n-+\r\nrhui\s* \(repo\)\s* =>',
-                             re.DOTALL)
-        ret = Expect.match(connection, pattern, grouplist=[1])[0]
+        ret = Expect.match(connection, prompts.PACKAGE_LIST_PATTERN, grouplist=[1], timeout=60)[0]
         reslist = map(str.strip, str(ret).splitlines())
         packagelist = []
         for line in reslist:
@@ -348,7 +338,7 @@ class RHUIManagerRepo(object):
             if line == 'No packages in the repository.':
                 continue
             packagelist.append(line)
-        Expect.enter(connection, 'q')
+        RHUIManager.leave(connection)
         return packagelist
 
     @staticmethod
@@ -370,9 +360,9 @@ class RHUIManagerRepo(object):
         RHUIManager.screen(connection, "repo")
         Expect.enter(connection, "i")
         RHUIManager.select(connection, [repo_data[0]])
-        pattern = re.compile(r".*(Name:.*)\r\n\r\n-+\r\nrhui\s* \(repo\)\s* =>", re.DOTALL)
-        actual_responses = Expect.match(connection, pattern)[0].splitlines()
-        Expect.enter(connection, "q")
+        actual_responses = Expect.match(connection, prompts.REPO_INFO_PATTERN,
+                                        timeout=60)[0].splitlines()
+        RHUIManager.leave(connection)
         expected_responses = ["Name:                " + repo_data[0]]
         if type_data[0]:
             repo_type = "Custom"
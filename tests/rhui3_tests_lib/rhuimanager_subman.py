@@ -1,8 +1,7 @@
 """ Red Hat subscription registration in RHUI """
 
-import re
-
-from stitches.expect import Expect, ExpectFailed
+from rhui3_tests_lib import prompts
+from rhui3_tests_lib.expect import Expect, ExpectFailed
 from rhui3_tests_lib.rhuimanager import RHUIManager
 
 PROMPT = r"rhui \(subscriptions\) => "
@@ -21,10 +20,10 @@ class RHUIManagerSubMan(object):
 
         RHUIManager.screen(connection, "subscriptions")
         Expect.enter(connection, key)
-        lines = Expect.match(connection, re.compile("(.*)" + PROMPT, re.DOTALL))[0]
+        lines = Expect.match(connection, prompts.listing(PROMPT), timeout=60)[0]
         # subscription names are on lines that start with two spaces
         sub_list = [line.strip() for line in lines.splitlines() if line.startswith("  ")]
-        Expect.enter(connection, "q")
+        RHUIManager.leave(connection)
         return sub_list
 
     @staticmethod
@@ -35,7 +34,7 @@ class RHUIManagerSubMan(object):
         try:
             RHUIManager.select(connection, names)
         except ExpectFailed:
-            Expect.enter(connection, "q")
+            RHUIManager.leave(connection)
             raise RuntimeError("subscription(s) not available: %s" % names)
         RHUIManager.proceed_with_check(connection,
                                        "The following subscriptions will be registered:",
@@ -50,7 +49,7 @@ class RHUIManagerSubMan(object):
         try:
             RHUIManager.select(connection, names)
         except ExpectFailed:
-            Expect.enter(connection, "q")
+            RHUIManager.leave(connection)
             raise RuntimeError("subscription(s) not registered: %s" % names)
         RHUIManager.proceed_with_check(connection,
                                        "The following subscriptions will be unregistered:",
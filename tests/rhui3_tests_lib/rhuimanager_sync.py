@@ -1,40 +1,133 @@
 """ RHUIManager Sync functions """
 
+from collections import namedtuple
 import re
 import time
 
 import nose
 
-from stitches.expect import Expect, CTRL_C
+from rhui3_tests_lib.expect import Expect, CTRL_C
 
+from rhui3_tests_lib.catalog import invalidates_catalog
 from rhui3_tests_lib.conmgr import ConMgr
+from rhui3_tests_lib.parsing import parse_status
+from rhui3_tests_lib.polling import poll
 from rhui3_tests_lib.rhuimanager import RHUIManager
+from rhui3_tests_lib.screen import Screen
 from rhui3_tests_lib.util import Util
 
-def _get_repo_status(connection, reponame):
+# the statuses of a repository on the sync screen and in the output of rhui-manager status
+NOT_STARTED = ["Never", "Unknown"]
+RUNNING = "Running"
+SUCCESS = "Success"
+ERROR = "Error"
+SOURCES = ["cli", "tui"]
+# the polling backoff (see polling.intervals) for each source; rendering the screen means
+# launching and killing rhui-manager, so it's done less often
+BACKOFF = {"cli": {}, "tui": {"initial": 5, "maximum": 30}}
+# how long rhui-manager may keep showing the result of the previous sync of a repository
+# before it starts the new one
+SETTLE = 10
+
+# how a repository's synchronization went: its status when it was found done, and when it was
+# first seen running and found done (as time.time() values; started is None if it was never seen
+# running, which happens with syncs shorter than the polling interval)
+SyncReport = namedtuple("SyncReport", ["name", "status", "started", "finished"])
+
+def _cli_statuses(connection, repolist):
+    '''
+    the statuses of the repositories as printed by rhui-manager status; None if not listed
+    '''
+    statuses = dict(parse_status(Util.command_lines(connection, "rhui-manager status")))
+    return dict((repo, statuses.get(repo)) for repo in repolist)
+
+def _tui_statuses(connection, repolist):
     '''
-    display repo sync summary
+    the statuses of the repositories as displayed on the sync summary screen, rendered once
     '''
     RHUIManager.screen(connection, "sync")
     Expect.enter(connection, "dr")
-    res = Expect.match(connection,
-                       re.compile(r".*%s\s*\r\n([^\n]*)\r\n.*" % re.escape(reponame),
-                                  re.DOTALL), [1], 60)[0]
+    # wait until the status line of each repository is on the screen
+    pattern = "".join(r"(?=.*%s\s*\r\n[^\n]*\r\n)" % re.escape(repo) for repo in repolist)
+    res = Expect.match(connection, re.compile(pattern + "(.*)", re.DOTALL), [1], 60)[0]
     connection.cli.exec_command("killall -s SIGINT rhui-manager")
-    res = Util.uncolorify(res)
-    ret_list = res.split("             ")
-    for i, _ in enumerate(ret_list):
-        ret_list[i] = ret_list[i].strip()
-
     Expect.enter(connection, CTRL_C)
-    Expect.enter(connection, "q")
-    return ret_list
+    RHUIManager.leave(connection)
+    # a repository name is followed by a line with the next sync, last sync and the status
+    lines = Screen(res).text.splitlines()
+    statuses = {}
+    for name, status_line in zip(lines, lines[1:]):
+        name = name.strip()
+        if name in repolist and name not in statuses and status_line.split():
+            statuses[name] = status_line.split()[-1]
+    return dict((repo, statuses.get(repo)) for repo in repolist)
+
+class SyncWaiter(object):
+    '''
+    Waits for the synchronization of several repositories at once: each cycle takes the status
+    of all of them from one rhui-manager status command ("cli") or one sync summary screen
+    ("tui"), so the wait takes as long as the slowest repository
+    '''
+    def __init__(self, connection, repolist, source="cli", timeout=None, settle=SETTLE):
+        if source not in SOURCES:
+            raise ValueError("Unsupported source: '%s'. Use one of: %s." % (source, SOURCES))
+        self.connection = connection
+        self.repolist = list(repolist)
+        self.source = source
+        self.timeout = timeout
+        self.settle = settle
+
+    def snapshot(self):
+        '''
+        return {repo: status} for all the repositories; the status is None if there's none
+        '''
+        if self.source == "tui":
+            return _tui_statuses(self.connection, self.repolist)
+        return _cli_statuses(self.connection, self.repolist)
+
+    def wait(self, done):
+        '''
+        poll until done(status) is true for all the repositories; a repository that isn't listed
+        yet (its status is None) hasn't started; a status that was there when the wait began
+        only counts once the repository was seen running or in another status, or after
+        the settle time (it may be the result of the previous sync);
+        return {repo: SyncReport}, raise polling.PollTimeout
+        '''
+        started = {}
+        finished = {}
+        first = {}
+        changed = set()
+        start = time.time()
+
+        def _check():
+            '''
+            take a snapshot and note which repositories started or finished; True if all did
+            '''
+            now = time.time()
+            statuses = self.snapshot()
+            for repo in self.repolist:
+                status = statuses[repo]
+                if repo in finished or status is None:
+                    continue
+                if status == RUNNING or status != first.setdefault(repo, status):
+                    changed.add(repo)
+                if status == RUNNING:
+                    started.setdefault(repo, now)
+                if done(status) and (repo in changed or now - start >= self.settle):
+                    finished[repo] = (status, now)
+            return len(finished) == len(self.repolist)
+
+        poll(_check, "sync.%s" % self.source, self.timeout, **BACKOFF[self.source])
+        return dict((repo, SyncReport(repo, finished[repo][0], started.get(repo),
+                                      finished[repo][1]))
+                    for repo in self.repolist)
 
 class RHUIManagerSync(object):
     '''
     Represents -= Synchronization Status =- RHUI screen
     '''
     @staticmethod
+    @invalidates_catalog
     def sync_repo(connection, repolist):
         '''
         sync an individual repository immediately
@@ -51,31 +144,28 @@ class RHUIManagerSync(object):
         RHUIManager.quit(connection)
 
     @staticmethod
-    def check_sync_started(connection, repolist):
+    def check_sync_started(connection, repolist, source="tui"):
         '''ensure that sync started'''
-        for repo in repolist:
-            reposync = ["", "", "Never"]
-            while reposync[2] in ["Never", "Unknown"]:
-                time.sleep(10)
-                reposync = _get_repo_status(connection, repo)
-            if reposync[2] in ["Running", "Success"]:
-                pass
-            else:
+        waiter = SyncWaiter(connection, repolist, source)
+        reports = waiter.wait(lambda status: status not in NOT_STARTED)
+        for report in reports.values():
+            if report.status not in [RUNNING, SUCCESS]:
                 raise TypeError("Something went wrong")
+        return reports
 
     @staticmethod
-    def wait_till_repo_synced(connection, repolist):
+    @invalidates_catalog
+    def wait_till_repo_synced(connection, repolist, source="tui"):
         '''
-        wait until repo is synced
+        wait until repo is synced; return {repo: SyncReport}
         '''
-        for repo in repolist:
-            reposync = ["", "", "Running"]
-            while reposync[2] in ["Running", "Never", "Unknown"]:
-                time.sleep(10)
-                reposync = _get_repo_status(connection, repo)
-            if reposync[2] == "Error":
+        waiter = SyncWaiter(connection, repolist, source)
+        reports = waiter.wait(lambda status: status not in NOT_STARTED + [RUNNING])
+        for report in reports.values():
+            if report.status == ERROR:
                 raise TypeError("The repo sync returned Error")
-            nose.tools.assert_equal(reposync[2], "Success")
+            nose.tools.assert_equal(report.status, SUCCESS)
+        return reports
 
     @staticmethod
     def wait_till_pulp_tasks_finish(connection):
@@ -98,8 +188,9 @@ class RHUIManagerSync(object):
                              "ln -s ~/.rhui/%s/user.crt ~/.pulp/user-cert.pem; " % rhua +
                              "touch /tmp/pulploginhack; " +
                              "fi")
-        while connection.recv_exit_status("pulp-admin tasks list | grep -q '^No tasks found'"):
-            time.sleep(15)
+        poll(lambda: not connection.recv_exit_status("pulp-admin tasks list | " +
+                                                     "grep -q '^No tasks found'"),
+             "pulp.tasks", maximum=15)
         Expect.expect_retval(connection,
                              "if [ -f /tmp/pulploginhack ]; then " +
                              "rm -f ~/.pulp/user-cert.pem /tmp/pulploginhack; " +
@@ -0,0 +1,186 @@
+"""
+Terminal screen model for the rhui-manager output
+
+The raw output from the shell channel (colors, cursor movements, carriage returns, ...) is fed
+to a Screen, which interprets it like a VT100 terminal would and keeps the resulting text.
+Unlike on a real terminal, lines are neither wrapped nor scrolled away, so that whole lists
+can be read from the screen. The escape sequences can be split across chunks of the output.
+"""
+
+from collections import namedtuple
+import re
+
+# escape sequences: CSI, OSC, two-character ones; control characters; plain text
+TOKEN_PATTERN = re.compile(r"\x1b\[([0-9;?]*)[ -/]*([@-~])|" +
+                           r"\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|" +
+                           r"\x1b[()#][0-9A-Za-z]|" +
+                           r"\x1b[^\[\]()#]|" +
+                           r"([\r\n\b\t\x07])|" +
+                           r"([^\x1b\r\n\b\t\x07]+)")
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;?]*[ -/]*[@-~]")
+ITEM_PATTERN = re.compile(r"^\s*(x|-)\s+([0-9]+)\s*:(.*)$")
+PROMPT_PATTERN = re.compile(r"^rhui\s*\((.*)\)\s*=>")
+
+SelectionItem = namedtuple("SelectionItem", ["selected", "index", "label"])
+
+def strip_ansi(text):
+    '''
+    remove color (and other CSI) sequences from the text
+    '''
+    return ANSI_PATTERN.sub("", text)
+
+class Screen(object):
+    '''
+    Text on the terminal, as produced by the output fed so far
+    '''
+    def __init__(self, data="", height=80):
+        self.height = height
+        self._lines = [[]]
+        self._row = 0
+        self._col = 0
+        self._pending = ""
+        if data:
+            self.feed(data)
+
+    def feed(self, data):
+        '''
+        interpret another chunk of the output
+        '''
+        data = self._pending + data
+        self._pending = ""
+        pos = 0
+        while pos < len(data):
+            token = TOKEN_PATTERN.match(data, pos)
+            if token is None:
+                # an incomplete escape sequence; the rest comes with the next chunk
+                self._pending = data[pos:]
+                break
+            params, final, control, text = token.groups()
+            if text is not None:
+                self._write(text)
+            elif control is not None:
+                self._control(control)
+            elif final is not None:
+                self._csi(params, final)
+            pos = token.end()
+
+    def _write(self, text):
+        '''
+        put the text on the screen at the cursor, overwriting what's there
+        '''
+        line = self._lines[self._row]
+        if len(line) < self._col:
+            line.extend(" " * (self._col - len(line)))
+        line[self._col:self._col + len(text)] = text
+        self._col += len(text)
+
+    def _move_to_row(self, row):
+        '''
+        move the cursor to the given row (adding lines as needed)
+        '''
+        row = max(row, 0)
+        while len(self._lines) <= row:
+            self._lines.append([])
+        self._row = row
+
+    def _control(self, char):
+        '''
+        interpret a control character
+        '''
+        if char == "\r":
+            self._col = 0
+        elif char == "\n":
+            self._move_to_row(self._row + 1)
+        elif char == "\b":
+            self._col = max(self._col - 1, 0)
+        elif char == "\t":
+            self._col = (self._col // 8 + 1) * 8
+
+    def _csi(self, params, final):
+        '''
+        interpret a CSI sequence; colors and other attributes are ignored
+        '''
+        numbers = [int(number) if number.isdigit() else 0
+                   for number in params.lstrip("?").split(";")]
+        count = max(numbers[0], 1)
+        line = self._lines[self._row]
+        if final == "A":
+            self._move_to_row(self._row - count)
+        elif final == "B":
+            self._move_to_row(self._row + count)
+        elif final == "C":
+            self._col += count
+        elif final == "D":
+            self._col = max(self._col - count, 0)
+        elif final == "G":
+            self._col = count - 1
+        elif final in "Hf":
+            top = max(len(self._lines) - self.height, 0)
+            self._move_to_row(top + count - 1)
+            self._col = max(numbers[1], 1) - 1 if len(numbers) > 1 else 0
+        elif final == "K":
+            if numbers[0] == 0:
+                del line[self._col:]
+            elif numbers[0] == 1:
+                line[:self._col + 1] = " " * min(self._col + 1, len(line))
+            else:
+                del line[:]
+        elif final == "J":
+            if numbers[0] == 0:
+                del line[self._col:]
+                del self._lines[self._row + 1:]
+            else:
+                self._lines = [[]]
+                self._row = 0
+                self._col = 0
+
+    @property
+    def lines(self):
+        '''
+        the text lines on the screen, without trailing whitespace
+        '''
+        return ["".join(line).rstrip() for line in self._lines]
+
+    @property
+    def text(self):
+        '''
+        the text on the screen as one string
+        '''
+        return "\n".join(self.lines)
+
+    def items(self):
+        '''
+        the items of a (multiple choice) list on the screen as SelectionItem tuples;
+        if the item line has no label, the label is taken from the next line
+        '''
+        lines = self.lines
+        items = []
+        for number, line in enumerate(lines):
+            match = ITEM_PATTERN.match(line)
+            if not match:
+                continue
+            label = match.group(3).strip()
+            if not label and number + 1 < len(lines):
+                label = lines[number + 1].strip()
+            items.append(SelectionItem(match.group(1) == "x", int(match.group(2)), label))
+        return items
+
+    def prompt(self):
+        '''
+        the name of the rhui-manager screen whose prompt is on the last line, or None
+        '''
+        for line in reversed(self.lines):
+            if line:
+                match = PROMPT_PATTERN.match(line)
+                return match.group(1) if match else None
+        return None
+
+    def line_after(self, text):
+        '''
+        the line following the last line that contains the text, or None
+        '''
+        lines = self.lines
+        for number in range(len(lines) - 2, -1, -1):
+            if text in lines[number]:
+                return lines[number + 1]
+        return None
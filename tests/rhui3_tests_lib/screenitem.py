@@ -2,6 +2,8 @@
 Screen item module
 """
 
+from functools import total_ordering
+
 from rhui3_tests_lib import lineparser
 from rhui3_tests_lib import rhuimanager
 
@@ -10,15 +12,62 @@ class NoSuchItem(ValueError):
     to be raised in case the item can't be located
     """
 
+@total_ordering
 class ScreenItem(object):
     """
     something that has a line parser
-    and is able to locate itself within the lines
+    and is able to locate itself within the lines;
+    subclasses list their attributes in __slots__, and the values can't be changed once set,
+    so the items can be hashed, put in sets and sorted (by the attributes, in order)
     """
+    __slots__ = ()
     parser = lineparser.Parser(mapping = []) # to be overriden in subclasses
 
-    def __init__(self):
-        self.parser = lineparser.Parser(self.mapping)
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.pop(name, None))
+        if values:
+            raise TypeError("%s has no attributes %s" % (type(self).__name__, sorted(values)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def _key(self):
+        """
+        the values of the attributes, in order
+        """
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__,
+                           ", ".join("%s=%r" % pair for pair in zip(self.__slots__, self._key())))
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __lt__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self._key() < other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __getstate__(self):
+        return self._key()
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
 
     def locate(self, lines):
         """
@@ -39,6 +88,7 @@ class ScreenItem(object):
         a default implementation of a screen item selection handling
         return True/False, on-screen-index
         """
+        lines = getattr(lines, "lines", lines)
         index = self.locate(lines)
         # usually, the "selection"--pattern header will preceed the line
         # on which this item was found; subclasses may override
@@ -49,10 +99,8 @@ class ScreenItem(object):
         """
         a default implementation of the parser--output constructor
         """
-        obj = cls()
-        for pair in item_pairs:
-            setattr(obj, pair[0], pair[1][0]) # second item is a tuple here (re.match groups)
-        return obj
+        # second item is a tuple here (re.match groups)
+        return cls(**dict((name, groups[0]) for name, groups in item_pairs))
 
     @classmethod
     def parse(cls, lines):
@@ -65,9 +113,9 @@ class ScreenItem(object):
     def iter_parse(cls, lines):
         """
         parse the list of lines yielding cls instance a time
-        lines as shown in list of cds on the rhui screen
+        lines as shown in list of cds on the rhui screen (or the Screen itself)
         """
+        lines = getattr(lines, "lines", lines)
         for linenr, pairs in cls.parser.parse(lines):
             # map the pairs onto cls
             yield linenr, cls.from_parsed_item_pairs(pairs)
-
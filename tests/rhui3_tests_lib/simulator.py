@@ -0,0 +1,1068 @@
+"""
+Simulated RHUA: a local stand-in for rhui-manager and the rhui command
+
+SimulatedConnection looks like a stitches connection to the RHUA: the shell channel runs
+a simulated rhui-manager with the screens the library drives (repo, cds, loadbalancers, sync,
+client, entitlements, subscriptions), and exec_command/recv_exit_status answer the
+rhui-manager and rhui (cds|haproxy) commands. The state (repositories, instances, etc.)
+is kept in a SimulatedRHUA, which all the connections share. Other shell commands succeed
+without output. Every entered line can be delayed to mimic network and tool latency.
+
+To get simulated connections from ConMgr.connect, set RHUI_SIMULATOR (see conmgr), e.g.:
+
+    RHUI_SIMULATOR="repos=10000,cds=3,latency=0.001" python benchmarks/...
+"""
+
+import shlex
+import socket
+import threading
+import time
+
+from rhui3_tests_lib.facts import Facts, NoticingShell
+
+SHELL_PROMPT = "[%s@%s ~]# "
+SCREEN_PROMPT = "rhui (%s) => "
+SEPARATOR = "-" * 78
+CONFIRM_SELECTION = "Enter value (1-%d) to toggle selection, 'c' to confirm selections, " + \
+                    "or '?' for more commands: "
+STATUS_GAP = " " * 13
+CA_STATUS = "Entitlement CA certificate expiration date = 2038-01-19 (OK)"
+
+SCREENS = {"r": ("repo", "Repository Management"),
+           "c": ("cds", "Content Delivery Server (CDS) Management"),
+           "l": ("loadbalancers", "Load-balancer (HAProxy) Management"),
+           "s": ("sync", "Synchronization Status"),
+           "e": ("client", "Client Entitlement Management"),
+           "n": ("entitlements", "Entitlements Manager"),
+           "sm": ("subscriptions", "Subscriptions Manager")}
+
+INSTANCE_SCREENS = {"cds": ("CDS", "cds"), "loadbalancers": ("HAProxy load-balancer", "hap")}
+
+def parse_spec(spec):
+    '''
+    turn "repos=100,cds=2,latency=0.01" into keyword arguments for SimulatedRHUA
+    '''
+    kwargs = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        kwargs[name.strip()] = float(value) if "." in value else int(value)
+    return kwargs
+
+def pool_id(name):
+    '''
+    the (made up) pool ID of the subscription with the given name
+    '''
+    return "8a85f98%025x" % (sum(ord(char) * 31 ** number
+                                 for number, char in enumerate(name)) % 16 ** 25)
+
+class SimulatedRepo(object):
+    '''
+    A repository managed by the simulated RHUA
+    '''
+    def __init__(self, repo_id, name, custom=False, protected=True, path="", packages=0):
+        self.repo_id = repo_id
+        self.name = name
+        self.custom = custom
+        self.protected = protected
+        self.path = path or repo_id
+        self.packages = ["package-%d-1.0-1.noarch.rpm" % number for number in range(packages)]
+        self.last_sync = "Never"
+        self.sync_done_at = None
+
+    def info(self):
+        '''
+        the lines of the detailed information about the repository
+        '''
+        if self.custom:
+            path = ("protected/" if self.protected else "unprotected/") + self.path
+            lines = ["Name:                %s" % self.name,
+                     "Type:                Custom",
+                     "Relative Path:       %s" % path,
+                     "GPG Check:           No"]
+        else:
+            lines = ["Name:                %s" % self.name,
+                     "Type:                Red Hat",
+                     "Relative Path:       %s" % self.path,
+                     "GPG Check:           Yes",
+                     "Custom GPG Keys:     (None)",
+                     "Red Hat GPG Key:     Yes"]
+        lines.append("Package Count:       %d" % len(self.packages))
+        if not self.custom:
+            lines += ["Last Sync:           %s" % self.last_sync,
+                      "Next Sync:           %s" % "Unknown"]
+        return lines
+
+    def status(self):
+        '''
+        the result of the last sync: Never, Running or Success
+        '''
+        if self.sync_done_at is None:
+            return "Never"
+        if time.time() < self.sync_done_at:
+            return "Running"
+        self.last_sync = time.strftime("%m-%d-%Y %H:%M", time.localtime(self.sync_done_at))
+        return "Success"
+
+class SimulatedRHUA(object):
+    '''
+    The state of the simulated RHUI: available and added repositories, CDS and HAProxy
+    instances, entitlements and subscriptions
+    '''
+    def __init__(self, repos=10, available=10, custom_repos=0, cds=0, haproxy=0, packages=5,
+                 sync_time=0.0, latency=0.0):
+        self.latency = latency
+        self.sync_time = sync_time
+        self.packages = packages
+        self.lock = threading.RLock()
+        self.available = []
+        for number in range(repos + available):
+            name = "Red Hat Enterprise Linux Test %05d (RPMs)" % number
+            repo_id = "rhel-test-%05d-rpms-x86_64" % number
+            self.available.append(SimulatedRepo(repo_id, name + " (x86_64)", packages=packages))
+        self.repos = dict((repo.repo_id, repo) for repo in self.available[:repos])
+        for number in range(custom_repos):
+            repo_id = "custom-%05d" % number
+            self.repos[repo_id] = SimulatedRepo(repo_id, repo_id, custom=True, packages=packages)
+        self.instances = {"cds": ["cds%02d.example.com" % number for number in range(1, cds + 1)],
+                          "hap": ["hap%02d.example.com" % number
+                                  for number in range(1, haproxy + 1)]}
+        self.entitlements = ["Red Hat Enterprise Linux Test (RPMs)"]
+        self.subscriptions = {"available": ["Red Hat Update Infrastructure and RHEL Add-Ons"],
+                              "registered": []}
+
+    def sorted_repos(self, custom=None):
+        '''
+        the added repositories sorted by name, optionally only custom or Red Hat ones
+        '''
+        return sorted([repo for repo in self.repos.values()
+                       if custom is None or repo.custom == custom],
+                      key=lambda repo: repo.name)
+
+    def unused(self):
+        '''
+        the available Red Hat repositories that haven't been added
+        '''
+        return [repo for repo in self.available if repo.repo_id not in self.repos]
+
+    def add(self, repos):
+        '''
+        add the given available repositories
+        '''
+        for repo in repos:
+            self.repos[repo.repo_id] = repo
+
+    def by_name(self, names):
+        '''
+        the added or available repositories with the given names
+        '''
+        repos = dict((repo.name, repo) for repo in self.available)
+        repos.update((repo.name, repo) for repo in self.repos.values())
+        return [repos[name] for name in names if name in repos]
+
+    def sync(self, repos):
+        '''
+        start syncing the given repositories
+        '''
+        for repo in repos:
+            repo.sync_done_at = time.time() + self.sync_time
+
+    def run(self, command, shell=None):
+        '''
+        run a shell command, return its exit status, stdout and stderr
+        '''
+        if " ; " in command:
+            # a sequence of commands: the exit status is that of the last one
+            results = [self.run(part, shell) for part in command.split(" ; ")]
+            return (results[-1][0], "".join(result[1] for result in results),
+                    "".join(result[2] for result in results))
+        try:
+            args = shlex.split(command)
+        except ValueError:
+            args = command.split()
+        if not args:
+            return 0, "", ""
+        with self.lock:
+            if args[0] == "rhui-manager" and len(args) > 1:
+                return _RHUIManagerCommand(self, args[1:]).run()
+            if args[0] == "rhui" and len(args) > 2:
+                return self._rhui_command(args[1:])
+        if args[0] == "killall" and "rhui-manager" in args and shell is not None:
+            shell.kill()
+        return 0, "", ""
+
+    def _rhui_command(self, args):
+        '''
+        rhui (cds|haproxy) (list|add|reinstall|delete) ...
+        '''
+        node_type, action, rest = args[0], args[1], args[2:]
+        if node_type not in ["cds", "haproxy"]:
+            return 1, "", "Usage: rhui (cds|haproxy) ...\n"
+        instances = self.instances["cds" if node_type == "cds" else "hap"]
+        hostnames = [arg for arg in rest if not arg.startswith("-")]
+        if action == "list":
+            return 0, "".join("Hostname: %s\n" % host for host in instances), ""
+        if action == "add" and hostnames:
+            if hostnames[0] in instances and "-f" not in rest:
+                return 1, "", "%s is already tracked\n" % hostnames[0]
+            if hostnames[0] not in instances:
+                instances.append(hostnames[0])
+            return 0, "", ""
+        if action == "reinstall" and hostnames:
+            return (0, "", "") if hostnames[0] in instances else (1, "", "unknown host\n")
+        if action == "delete":
+            unknown = [host for host in hostnames if host not in instances]
+            if unknown and "-f" not in rest:
+                return 1, "", "unknown hosts: %s\n" % " ".join(unknown)
+            instances[:] = [host for host in instances if host not in hostnames]
+            return 0, "", ""
+        return 1, "", "Usage: rhui %s ...\n" % node_type
+
+class _RHUIManagerCommand(object):
+    '''
+    the rhui-manager command-line interface
+    '''
+    def __init__(self, rhua, args):
+        self.rhua = rhua
+        self.args = args
+        self.options = {}
+        index = 0
+        while index < len(args):
+            if args[index].startswith("--"):
+                name = args[index][2:]
+                if index + 1 < len(args) and not args[index + 1].startswith("--"):
+                    self.options[name] = args[index + 1]
+                    index += 1
+                else:
+                    self.options[name] = True
+            index += 1
+
+    def run(self):
+        '''
+        return the exit status, stdout and stderr of the command
+        '''
+        words = [arg for arg in self.args[:2] if not arg.startswith("--")]
+        handler = getattr(self, "_" + "_".join(words), None)
+        if handler is None:
+            return 1, "", "Usage: rhui-manager [options] ...\n"
+        return handler()
+
+    def _status(self):
+        rhua = self.rhua
+        lines = [CA_STATUS, ""]
+        lines += ["%s ..... %s" % (repo.name, repo.status()) for repo in rhua.sorted_repos()]
+        return 0, "\n".join(lines) + "\n", ""
+
+    def _cert_info(self):
+        lines = ["Red Hat Entitlements", "", "  \x1b[92mValid\x1b[0m"]
+        for name in self.rhua.entitlements:
+            lines += ["    " + name, "      Expiration: 2038-01-19  Certificate: rhcert.pem"]
+        return 0, "\n".join(lines) + "\n", ""
+
+    _cert_upload = _cert_info
+
+    def _repo_list(self):
+        repos = self.rhua.sorted_repos(False if "redhat_only" in self.options else None)
+        if "ids_only" in self.options:
+            delimiter = self.options.get("delimiter", "\n")
+            return 0, delimiter.join(repo.repo_id for repo in repos) + "\n", ""
+        lines = ["%s :: %s" % (repo.repo_id, repo.name) for repo in repos]
+        return 0, "\n".join(lines) + "\n", ""
+
+    def _repo_unused(self):
+        lines = ["", "Available Red Hat Repositories", SEPARATOR, ""]
+        for repo in self.rhua.unused():
+            lines.append(repo.name)
+            if "by_repo_id" in self.options:
+                lines.append("  " + repo.repo_id)
+        return 0, "\n".join(lines) + "\n", ""
+
+    def _repo_add(self):
+        name = self.options.get("product_name", "")
+        repos = [repo for repo in self.rhua.unused() if repo.name.startswith(name)]
+        if not repos:
+            return 1, "", "No such product: %s\n" % name
+        self.rhua.add(repos)
+        return 0, "Successfully added %s\n" % name, ""
+
+    def _repo_add_by_repo(self):
+        repo_ids = str(self.options.get("repo_ids", "")).split(",")
+        repos = [repo for repo in self.rhua.unused() if repo.repo_id in repo_ids]
+        self.rhua.add(repos)
+        return 0, "".join("Successfully added %s\n" % repo.name for repo in repos), ""
+
+    def _repo_sync(self):
+        repo = self.rhua.repos.get(self.options.get("repo_id"))
+        if repo is None:
+            return 1, "", "repository %s was not found\n" % self.options.get("repo_id")
+        self.rhua.sync([repo])
+        return 0, "sync for repository %s successfully scheduled for the next available " \
+                  "timeslot\n" % repo.name, ""
+
+    def _repo_info(self):
+        repo = self.rhua.repos.get(self.options.get("repo_id"))
+        if repo is None:
+            return 1, "repository %s was not found\n" % self.options.get("repo_id"), ""
+        lines = repo.info()
+        lines.insert(1, "ID:                  %s" % repo.repo_id)
+        return 0, "\n".join(lines) + "\n", ""
+
+    def _repo_delete(self):
+        if self.rhua.repos.pop(self.options.get("repo_id"), None) is None:
+            return 1, "", "repository %s was not found\n" % self.options.get("repo_id")
+        return 0, "", ""
+
+    def _repo_create_custom(self):
+        repo_id = self.options.get("repo_id")
+        if not repo_id or repo_id is True:
+            return 1, "Usage: rhui-manager repo create_custom --repo_id ID ...\n", ""
+        if repo_id in self.rhua.repos:
+            return 1, "A repository with ID \"%s\" already exists\n" % repo_id, ""
+        name = self.options.get("display_name", repo_id)
+        self.rhua.repos[repo_id] = SimulatedRepo(repo_id, name, custom=True,
+                                                 protected="protected" in self.options,
+                                                 path=self.options.get("path", ""))
+        return 0, "Successfully created repository \"%s\"\n" % name, ""
+
+    def _packages_list(self):
+        repo = self.rhua.repos.get(self.options.get("repo_id"))
+        if repo is None:
+            return 1, "", "repository %s was not found\n" % self.options.get("repo_id")
+        return 0, "".join(package + "\n" for package in repo.packages), ""
+
+    def _subscriptions_list(self):
+        what = "registered" if "registered" in self.options else "available"
+        names = self.rhua.subscriptions[what]
+        if "pool-only" in self.options:
+            return 0, "".join(pool_id(name) + "\n" for name in names), ""
+        lines = []
+        for name in names:
+            lines += ["  Label: " + name, "  Pool ID: " + pool_id(name), ""]
+        return 0, "\n".join(lines) + "\n", ""
+
+    def _subscriptions_register(self):
+        return self._move_subscription("available", "registered")
+
+    def _subscriptions_unregister(self):
+        return self._move_subscription("registered", "available")
+
+    def _move_subscription(self, source, target):
+        subscriptions = self.rhua.subscriptions
+        names = [name for name in subscriptions[source]
+                 if pool_id(name) == self.options.get("pool")]
+        if not names:
+            return 1, "", "Unknown pool: %s\n" % self.options.get("pool")
+        subscriptions[source].remove(names[0])
+        subscriptions[target].append(names[0])
+        return 0, "", ""
+
+class _Shell(object):
+    '''
+    A login shell on the simulated RHUA, able to run rhui-manager;
+    input() takes an entered line and returns the output, including the echo
+    '''
+    def __init__(self, connection, rhua):
+        self.connection = connection
+        self.rhua = rhua
+        self.screen = None
+        self.deferred = ""
+        self._handler = self._command
+
+    def input(self, line):
+        '''
+        process an entered line
+        '''
+        if "\x03" in line:
+            return "^C\r\n" + self._interrupt()
+        with self.rhua.lock:
+            return line + "\r\n" + self._handler(line.strip())
+
+    def kill(self):
+        '''
+        terminate rhui-manager (if running)
+        '''
+        if self.screen is not None:
+            self.connection.channel.push(self._exit())
+
+    def _later(self, text):
+        '''
+        output to appear only after the output so far has been read (like after a long task)
+        '''
+        self.deferred += text
+        return ""
+
+    def _shell_prompt(self):
+        return SHELL_PROMPT % (self.connection.username, self.connection.hostname.split(".")[0])
+
+    def _exit(self):
+        self.screen = None
+        self._handler = self._command
+        return self._shell_prompt()
+
+    def _interrupt(self):
+        if self.screen is None:
+            return self._shell_prompt()
+        return self._at(self.screen)
+
+    def _command(self, line):
+        '''
+        a shell command
+        '''
+        if line == "rhui-manager":
+            return self._open("home")
+        if line in ["home", "q", "l", "logout"] or line[:1].isdigit():
+            return "bash: %s: command not found\r\n" % line + self._shell_prompt()
+        _, stdout, stderr = self.rhua.run(line, self)
+        return (stdout + stderr).replace("\n", "\r\n") + self._shell_prompt()
+
+    def _at(self, screen, text=""):
+        '''
+        show the text and the prompt of the screen, and wait for a command there
+        '''
+        self.screen = screen
+        self._handler = self._menu
+        return text + SCREEN_PROMPT % screen
+
+    def _open(self, screen):
+        titles = dict(SCREENS.values())
+        title = titles.get(screen, "Home")
+        return self._at(screen, "\r\n-= Red Hat Update Infrastructure Management Tool =-\r\n\r\n" +
+                        "-= %s =-\r\n\r\n" % title)
+
+    def _menu(self, line):
+        '''
+        a command at a screen prompt
+        '''
+        if line == "q":
+            return self._exit()
+        if line == "logout":
+            return "Logged out\r\n" + self._exit()
+        if line == "home":
+            return self._open("home")
+        if self.screen == "home" and line in SCREENS:
+            return self._open(SCREENS[line][0])
+        action = getattr(self, "_%s_%s" % (self.screen, line), None)
+        if action is None and self.screen in INSTANCE_SCREENS:
+            action = getattr(self, "_instance_%s" % line, None)
+        if action is None:
+            return self._at(self.screen)
+        return action()
+
+    # helpers for the dialogs
+    def _select(self, title, labels, on_confirm, labels_below=False):
+        '''
+        multiple choice list; on_confirm gets the selected labels
+        '''
+        selected = set()
+
+        def _render():
+            lines = [title, ""] if title else []
+            for number, label in enumerate(labels, 1):
+                mark = "x" if number in selected else "-"
+                if labels_below:
+                    lines += ["  %s  %d : " % (mark, number), "    " + label]
+                else:
+                    lines.append("  %s  %d : %s" % (mark, number, label))
+            return "\r\n".join(lines) + "\r\n\r\n" + CONFIRM_SELECTION % len(labels)
+
+        def _handle(line):
+            if line == "c":
+                return on_confirm([labels[number - 1] for number in sorted(selected)])
+            if line == "b":
+                return self._at(self.screen)
+            if line == "a":
+                selected.update(range(1, len(labels) + 1))
+            for value in line.split():
+                if value.isdigit() and 1 <= int(value) <= len(labels):
+                    selected.symmetric_difference_update([int(value)])
+            return _render()
+
+        self._handler = _handle
+        return _render()
+
+    def _proceed(self, caption, lines, on_yes, question="Proceed? (y/n) "):
+        '''
+        ask for confirmation of the listed values
+        '''
+        def _handle(line):
+            if line == "y":
+                return on_yes()
+            return self._at(self.screen)
+
+        self._handler = _handle
+        return caption + "\r\n" + "".join("  %s\r\n" % line for line in lines) + question
+
+    def _ask(self, steps, on_done, answers=None):
+        '''
+        ask the questions one by one; a step is (key, question), where the question can
+        be a function of the previous answers returning the question text or None to skip it
+        '''
+        answers = {} if answers is None else answers
+        steps = list(steps)
+        while steps:
+            key, question = steps[0]
+            if callable(question):
+                question = question(answers)
+            if question is not None:
+                break
+            steps.pop(0)
+        else:
+            return on_done(answers)
+
+        def _handle(line):
+            answers[key] = line
+            return self._ask(steps[1:], on_done, answers)
+
+        self._handler = _handle
+        return question
+
+    # repo screen
+    def _repo_l(self):
+        lines = []
+        for header, custom in [("Custom Repositories", True), ("Red Hat Repositories", False)]:
+            repos = self.rhua.sorted_repos(custom)
+            if repos:
+                lines += [header] + ["  " + repo.name for repo in repos] + [""]
+        if not lines:
+            lines = ["No repositories are currently managed by the RHUI", ""]
+        return self._at("repo", "\r\n".join(lines) + "\r\n" + SEPARATOR + "\r\n")
+
+    def _repo_d(self):
+        names = [repo.name for repo in self.rhua.sorted_repos()]
+        if not names:
+            return self._at("repo", "No repositories are currently managed by the RHUI\r\n")
+
+        def _delete(chosen):
+            def _done():
+                for repo in self.rhua.by_name(chosen):
+                    self.rhua.repos.pop(repo.repo_id, None)
+                return self._at("repo", "Deleted %d repositories\r\n" % len(chosen))
+            return self._proceed("The following repositories will be deleted:", chosen, _done)
+
+        return self._select("Select the repositories to delete:", names, _delete)
+
+    def _repo_a(self):
+        def _choice(line):
+            unused = self.rhua.unused()
+            if line == "1":
+                return self._proceed("The following product repositories will be deployed:",
+                                     [repo.name for repo in unused],
+                                     lambda: self._added(unused))
+            if line in ["2", "3"]:
+                caption = "The following %s will be deployed:" % \
+                          ("products" if line == "2" else "product repositories")
+                names = [repo.name for repo in unused]
+
+                def _chosen(chosen):
+                    listed = chosen if line == "2" else \
+                             sum([[name.rsplit(" (", 1)[0], name] for name in chosen], [])
+                    return self._proceed(caption, listed,
+                                         lambda: self._added(self.rhua.by_name(chosen)))
+                return self._select("Select one or more %s:" % caption.split()[2], names, _chosen)
+            return self._at("repo")
+
+        self._handler = _choice
+        return "Import Repositories:\r\n  1  - All in Certificate\r\n  2  - By Product\r\n" + \
+               "  3  - By Repository\r\nEnter value (1-3) or 'b' to abort: "
+
+    def _added(self, repos):
+        self.rhua.add(repos)
+        return self._at("repo", "".join("Importing %s...\r\n" % repo.name for repo in repos) +
+                        "Content will not be downloaded to the newly imported repositories " +
+                        "until the next sync is run.\r\n")
+
+    def _repo_c(self):
+        def _id_question(answers):
+            if answers.get("id") in self.rhua.repos:
+                return "A repository with ID \"%s\" already exists\r\n" % answers["id"] + \
+                       "Unique ID for the custom repository (alphanumerics, _, and - only): "
+            return None
+
+        def _entitlement_guess(answers):
+            path = answers["path"] or answers["id"]
+            guess = path.replace("x86_64", "$basearch").replace("i386", "$basearch")
+            return path if path.count("x86_64") + path.count("i386") > 1 else guess
+
+        def _done(answers):
+            if answers["id"] in self.rhua.repos:
+                return self._at("repo")
+            name = answers["name"] or answers["id"]
+            path = answers["path"] or answers["id"]
+            checklist = ["ID: " + answers["id"], "Name: " + name, "Path: " + path]
+            if answers["entitled"] == "y":
+                checklist.append("Entitlement: " +
+                                 (answers.get("entitlement") or _entitlement_guess(answers)))
+            if answers["gpg"] == "y":
+                checklist.append("GPG Check Yes")
+                checklist.append("Red Hat GPG Key: " +
+                                 ("Yes" if answers.get("redhat_gpg") == "y" else "No"))
+                if answers.get("custom_gpg") == "y":
+                    checklist.append("Custom GPG Keys: '%s'" % answers.get("key", ""))
+                else:
+                    checklist.append("Custom GPG Keys: (None)")
+            else:
+                checklist += ["GPG Check No", "Red Hat GPG Key: No"]
+
+            def _create():
+                self.rhua.repos[answers["id"]] = SimulatedRepo(answers["id"], name, custom=True,
+                                                               protected=answers["entitled"] == "y",
+                                                               path=path)
+                return self._at("repo", "Successfully created repository \"%s\"\r\n" % name)
+            return self._proceed("The following repository will be created:", checklist, _create)
+
+        steps = [("id", "Unique ID for the custom repository (alphanumerics, _, and - only): "),
+                 ("retry", _id_question),
+                 ("name", lambda answers: "Display name for the custom repository [%s]: " %
+                  answers["id"]),
+                 ("path", lambda answers: "Unique path at which the repository will be served " +
+                  "[%s]: " % answers["id"]),
+                 ("checksum", "Select checksum type:\r\n  1 - sha256\r\n  2 - sha1\r\n" +
+                  "Enter value (1-2) [1]: "),
+                 ("entitled", "Should the repository require an entitlement certificate " +
+                  "to access? (y/n) "),
+                 ("entitlement", lambda answers: "Path that should be used when granting an " +
+                  "entitlement for this repository [%s]: " % _entitlement_guess(answers)
+                  if answers["entitled"] == "y" else None),
+                 ("gpg", "Should the repository require clients to perform a GPG check and " +
+                  "verify packages are signed by a GPG key? (y/n) "),
+                 ("redhat_gpg", lambda answers: "Will the repository be used to host any " +
+                  "Red Hat GPG signed content? (y/n) " if answers["gpg"] == "y" else None),
+                 ("custom_gpg", lambda answers: "Will the repository be used to host any " +
+                  "custom GPG signed content? (y/n) " if answers["gpg"] == "y" else None),
+                 ("key", lambda answers: "Enter the absolute path to the public key of the " +
+                  "GPG keypair: " if answers.get("custom_gpg") == "y" else None),
+                 ("another", lambda answers: "Would you like to enter another public key? " +
+                  "(y/n) " if answers.get("custom_gpg") == "y" else None)]
+        return self._ask(steps, _done)
+
+    def _repo_single(self, then):
+        '''
+        single choice of a repository
+        '''
+        repos = self.rhua.sorted_repos()
+        lines = ["  %d - %s" % (number, repo.name) for number, repo in enumerate(repos, 1)]
+
+        def _handle(line):
+            if line.isdigit() and 1 <= int(line) <= len(repos):
+                return then(repos[int(line) - 1])
+            return self._at("repo")
+
+        self._handler = _handle
+        return "Select the repository:\r\n" + "\r\n".join(lines) + \
+               "\r\nEnter value (1-%d) or 'b' to abort: " % len(repos)
+
+    def _repo_p(self):
+        def _filter(repo):
+            def _list(answers):
+                packages = [package for package in repo.packages
+                            if package.startswith(answers["filter"])]
+                if not repo.packages:
+                    lines = ["No packages in the repository."]
+                elif not packages:
+                    lines = ["No packages found that match the given filter."]
+                else:
+                    lines = ["Packages:"] + ["  " + package for package in packages]
+                return self._at("repo", "Only packages that match the filter will be listed; " +
+                                "the list includes the newest versions only.\r\n" +
+                                "\r\n".join(lines) + "\r\n" + SEPARATOR + "\r\n")
+            return self._ask([("filter", "Enter the first few characters of the package name " +
+                               "(blank line for no filter): ")], _list)
+        return self._repo_single(_filter)
+
+    def _repo_i(self):
+        def _info(chosen):
+            lines = []
+            for repo in self.rhua.by_name(chosen):
+                lines += repo.info() + [""]
+            return self._at("repo", "\r\n".join(lines) + "\r\n" + SEPARATOR + "\r\n")
+        return self._select("Select one or more repositories:",
+                            [repo.name for repo in self.rhua.sorted_repos()], _info)
+
+    # cds and loadbalancers screens
+    def _instances(self):
+        return self.rhua.instances[INSTANCE_SCREENS[self.screen][1]]
+
+    def _instance_l(self):
+        lines = []
+        for host in self._instances():
+            lines += ["  Hostname:             %s" % host,
+                      "  SSH Username:         ec2-user",
+                      "  SSH Private Key:      /root/.ssh/id_rsa_rhua",
+                      ""]
+        if not lines:
+            lines = ["No %s instances are registered." % INSTANCE_SCREENS[self.screen][0], ""]
+        return self._at(self.screen, "\r\n".join(lines) + "\r\n")
+
+    def _instance_a(self):
+        kind = INSTANCE_SCREENS[self.screen][0]
+
+        def _exists(answers):
+            if answers["host"] in self._instances():
+                return "A %s instance with that hostname exists. Continue? (y/n): " % kind
+            return None
+
+        def _done(answers):
+            if answers.get("update") == "n":
+                return self._at(self.screen)
+            if answers["host"] not in self._instances():
+                self._instances().append(answers["host"])
+            return "Checking that instance ports are reachable...\r\n" + \
+                   self._later(self._at(self.screen,
+                                        "The %s was successfully configured.\r\n" % kind))
+
+        steps = [("host", "Hostname of the %s instance to register: " % kind),
+                 ("update", _exists),
+                 ("user", lambda answers: None if answers.get("update") == "n" else
+                  "Username with SSH access to %s and sudo privileges: " % answers["host"]),
+                 ("key", lambda answers: None if answers.get("update") == "n" else
+                  "Absolute path to an SSH private key to log into %s as ec2-user: " %
+                  answers["host"])]
+        return self._ask(steps, _done)
+
+    def _instance_d(self):
+        def _delete(chosen):
+            def _done():
+                self._instances()[:] = [host for host in self._instances() if host not in chosen]
+                return self._at(self.screen,
+                                "".join("Unregistered %s\r\n" % host for host in chosen))
+            return self._proceed("The following instances will be unregistered:", chosen, _done,
+                                 "Are you sure you wish to continue? (y/n): ")
+        return self._select("Select one or more instances to unregister:",
+                            list(self._instances()), _delete, labels_below=True)
+
+    # sync screen
+    def _sync_sr(self):
+        def _schedule(chosen):
+            def _done():
+                self.rhua.sync(self.rhua.by_name(chosen))
+                return self._at("sync")
+            return self._proceed("The following repositories will be scheduled for " +
+                                 "synchronization:", chosen, _done)
+        return self._select("Select one or more repositories to schedule to be synchronized " +
+                            "before its scheduled time:",
+                            [repo.name for repo in self.rhua.sorted_repos()], _schedule)
+
+    def _sync_dr(self):
+        lines = ["Last Refreshed: %s" % time.strftime("%H:%M:%S"),
+                 "(updated every 5 seconds, ctrl+c to exit)", "",
+                 "Next Sync                    Last Sync                    Last Result",
+                 SEPARATOR]
+        for repo in self.rhua.sorted_repos():
+            status = repo.status()
+            lines += [repo.name, STATUS_GAP.join(["Never", repo.last_sync, status])]
+        # the screen keeps refreshing until interrupted
+        self._handler = lambda line: ""
+        return "\r\n".join(lines) + "\r\n\r\n"
+
+    # client screen
+    def _client_e(self):
+        def _chosen(chosen):
+            steps = [("name", "Name of the certificate. This will be used as the name of the " +
+                      "certificate file (name.crt) and its associated private key (name.key). " +
+                      "Choose something that will help identify the products contained with it: "),
+                     ("dir", "Local directory in which to save the generated certificate " +
+                      "[current directory]: "),
+                     ("days", "Number of days the certificate should be valid [365]: ")]
+
+            def _done(answers):
+                return self._proceed("Repositories to be included in the entitlement " +
+                                     "certificate:", chosen,
+                                     lambda: self._at("client", "Entitlement certificate " +
+                                                      "created at %s/%s.crt\r\n" %
+                                                      (answers["dir"], answers["name"])))
+            return self._ask(steps, _done)
+        return self._select("Select one or more repositories to include in the entitlement " +
+                            "certificate:", [repo.name for repo in self.rhua.sorted_repos()],
+                            _chosen)
+
+    def _rpm_location(self, answers):
+        version = answers.get("version") or "2.0"
+        release = answers.get("release") or "1"
+        return "Location: %s/%s-%s/build/RPMS/noarch/%s-%s-%s.noarch.rpm\r\n" % \
+               (answers["dir"], answers["rpm"], version, answers["rpm"], version, release)
+
+    def _client_c(self):
+        steps = [("dir", "Full path to local directory in which the client configuration " +
+                  "files generated by this tool should be stored (if this directory does not " +
+                  "exist, it will be created): "),
+                 ("rpm", "Name of the RPM: "),
+                 ("version", "Version of the configuration RPM [2.0]: "),
+                 ("release", "Release of the configuration RPM [1]: "),
+                 ("cert", "Full path to the entitlement certificate authorizing the client to " +
+                  "access specific channels on RHUI: "),
+                 ("key", "Full path to the private key for the above entitlement certificate: ")]
+
+        def _done(answers):
+            unprotected = [repo.name for repo in self.rhua.sorted_repos(True)
+                           if not repo.protected]
+            if unprotected:
+                return self._select("Select any unprotected repositories to be included in " +
+                                    "the client configuration:", unprotected,
+                                    lambda chosen: self._at("client",
+                                                            self._rpm_location(answers)))
+            return self._at("client", self._rpm_location(answers))
+        return self._ask(steps, _done)
+
+    def _client_d(self):
+        steps = [("dir", "Full path to local directory in which the client configuration " +
+                  "files generated by this tool should be stored: "),
+                 ("rpm", "Name of the RPM: "),
+                 ("version", "Version of the configuration RPM [2.0]: "),
+                 ("release", "Release of the configuration RPM [1]: "),
+                 ("port", "Port to serve Docker content on (default 5000): ")]
+        return self._ask(steps, lambda answers: self._at("client", self._rpm_location(answers)))
+
+    def _client_o(self):
+        steps = [("dir", "Full path to local directory in which the client configuration " +
+                  "files generated by this tool should be stored: "),
+                 ("tar", "Name of the tar file (excluding extension): "),
+                 ("cert", "Full path to the entitlement certificate: "),
+                 ("key", "Full path to the private key for the above entitlement certificate: "),
+                 ("port", "Port to serve Docker content on (default 5000): ")]
+        return self._ask(steps, lambda answers: self._at("client", "Location: %s/%s.tar.gz\r\n" %
+                                                         (answers["dir"], answers["tar"])))
+
+    # entitlements screen
+    def _entitlement_lines(self):
+        lines = ["", "Red Hat Entitlements", "", "  \x1b[92mValid\x1b[0m"]
+        for name in self.rhua.entitlements:
+            lines += ["    " + name, "      Expiration: 2038-01-19  Certificate: rhcert.pem", ""]
+        return "\r\n".join(lines) + "\r\n"
+
+    def _entitlements_l(self):
+        return self._at("entitlements", self._entitlement_lines())
+
+    def _entitlements_c(self):
+        lines = ["", "Custom Repository Entitlements", ""]
+        for repo in self.rhua.sorted_repos(True):
+            if repo.protected:
+                lines += ["  Name:        " + repo.name, "  URL:         " + repo.path, ""]
+        return self._at("entitlements", "\r\n".join(lines) + "\r\n")
+
+    def _entitlements_u(self):
+        def _uploaded(answers):
+            return self._proceed("The RHUI will be updated with the following certificate:",
+                                 [answers["path"]],
+                                 lambda: self._at("entitlements", self._entitlement_lines()))
+        return self._ask([("path", "Full path to the new content certificate: ")], _uploaded)
+
+    # subscriptions screen
+    def _subscriptions_list(self, what):
+        names = self.rhua.subscriptions[what]
+        return self._at("subscriptions", "".join("  %s\r\n" % name for name in names) + "\r\n")
+
+    def _subscriptions_l(self):
+        return self._subscriptions_list("registered")
+
+    def _subscriptions_a(self):
+        return self._subscriptions_list("available")
+
+    def _subscriptions_move(self, source, target, verb):
+        def _chosen(chosen):
+            def _done():
+                subscriptions = self.rhua.subscriptions
+                subscriptions[source] = [name for name in subscriptions[source]
+                                         if name not in chosen]
+                subscriptions[target] += chosen
+                return self._at("subscriptions")
+            return self._proceed("The following subscriptions will be %s:" % verb, chosen, _done)
+        return self._select("Select one or more subscriptions:",
+                            list(self.rhua.subscriptions[source]), _chosen)
+
+    def _subscriptions_r(self):
+        return self._subscriptions_move("available", "registered", "registered")
+
+    def _subscriptions_d(self):
+        return self._subscriptions_move("registered", "available", "unregistered")
+
+class SimulatedChannel(object):
+    '''
+    The interactive shell channel of a simulated connection
+    '''
+    def __init__(self, shell, latency=0.0):
+        self._shell = shell
+        self._latency = latency
+        self._input = ""
+        self._output = b""
+        self._timeout = None
+        self._lock = threading.Lock()
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+
+    def gettimeout(self):
+        return self._timeout
+
+    def setblocking(self, blocking):
+        self._timeout = None if blocking else 0.0
+
+    def push(self, text):
+        '''
+        add output as if the remote side produced it
+        '''
+        with self._lock:
+            self._output += text.encode()
+
+    def send(self, data):
+        self._input += data
+        while "\n" in self._input:
+            line, self._input = self._input.split("\n", 1)
+            if self._latency:
+                time.sleep(self._latency * (len(line) + 1))
+            self.push(self._shell.input(line))
+        return len(data)
+
+    def recv_ready(self):
+        return bool(self._output)
+
+    def recv(self, size):
+        with self._lock:
+            if not self._output and self._shell.deferred:
+                self._output, self._shell.deferred = self._shell.deferred.encode(), ""
+            data, self._output = self._output[:size], self._output[size:]
+        if not data:
+            # nothing is going to come in the meantime
+            time.sleep(self._timeout or 0)
+            raise socket.timeout()
+        return data
+
+    def drain(self):
+        '''
+        discard the pending output
+        '''
+        with self._lock:
+            self._output = b""
+
+    def close(self):
+        pass
+
+class _Output(object):
+    '''
+    stdin/stdout/stderr of a finished command, like a paramiko ChannelFile
+    '''
+    def __init__(self, text, channel):
+        self._text = text
+        self._data = text.encode()
+        self._position = 0
+        self.channel = channel
+
+    def write(self, data):
+        pass
+
+    def read(self, size=-1):
+        start = self._position
+        self._position = len(self._data) if size < 0 else min(start + size, len(self._data))
+        return self._data[start:self._position]
+
+    def readlines(self):
+        return self._text.splitlines(True)
+
+class _ExecChannel(object):
+    '''
+    a session channel to run one command, like the one from paramiko's open_session()
+    '''
+    def __init__(self, connection):
+        self._connection = connection
+        self.status = None
+        self._stdout = b""
+        self._stderr = b""
+        self.eof_received = False
+
+    def exec_command(self, command):
+        self.status, stdout, stderr = self._connection.run(command)
+        self._stdout, self._stderr = stdout.encode(), stderr.encode()
+        self.eof_received = True
+
+    def recv_ready(self):
+        return bool(self._stdout)
+
+    def recv(self, size):
+        data, self._stdout = self._stdout[:size], self._stdout[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        return bool(self._stderr)
+
+    def recv_stderr(self, size):
+        data, self._stderr = self._stderr[:size], self._stderr[size:]
+        return data
+
+    def exit_status_ready(self):
+        return self.status is not None
+
+    def recv_exit_status(self):
+        return self.status
+
+    def close(self):
+        pass
+
+class _Transport(object):
+    '''
+    the SSH transport of a simulated connection
+    '''
+    def __init__(self, connection):
+        self._connection = connection
+
+    def is_active(self):
+        return True
+
+    def open_session(self):
+        return _ExecChannel(self._connection)
+
+class _Client(object):
+    '''
+    the SSH client of a simulated connection
+    '''
+    def __init__(self, connection):
+        self._connection = connection
+
+    def get_transport(self):
+        return _Transport(self._connection)
+
+    def exec_command(self, command):
+        return self._connection.exec_command(command)
+
+class SimulatedConnection(object):
+    '''
+    A stand-in for a (pooled) stitches connection, talking to a SimulatedRHUA
+    '''
+    def __init__(self, rhua, hostname, username="root", key_filename=None):
+        self.rhua = rhua
+        self.hostname = hostname
+        self.username = username
+        self.key_filename = key_filename
+        self.output_shell = False
+        self.last_command = ""
+        self.last_stdout = ""
+        self.last_stderr = ""
+        self.channel = NoticingShell(self, SimulatedChannel(_Shell(self, rhua), rhua.latency))
+        self.cli = _Client(self)
+        self.sftp = None
+
+    def run(self, command):
+        '''
+        run a command, return its exit status, stdout and stderr
+        '''
+        self.last_command = command
+        Facts.notice(self, command)
+        return self.rhua.run(command, self.channel._shell)
+
+    def exec_command(self, command):
+        status, stdout, stderr = self.run(command)
+        channel = _ExecChannel(self)
+        channel.status = status
+        return _Output("", channel), _Output(stdout, channel), _Output(stderr, channel)
+
+    def recv_exit_status(self, command, timeout=10):
+        status, self.last_stdout, self.last_stderr = self.run(command)
+        return status
+
+    def is_connected(self):
+        return True
+
+    def drain(self):
+        self.channel.drain()
+
+    def disconnect(self):
+        pass
@@ -3,7 +3,8 @@
 import re
 
 import nose
-from stitches.expect import Expect
+from rhui3_tests_lib.expect import Expect
+from rhui3_tests_lib.util import Util
 
 class Sos(object):
     """Sos handling for RHUI"""
@@ -36,10 +37,18 @@ class Sos(object):
         # must strip the path in front of the real root directory; the archive contains files like:
         # sosreport-HOST-DATE-HASH/sos_commands/rhui/rhui-debug-DATE-TIME/etc/pulp/repo_auth.conf
         # while the given filelist contains actual paths like /etc/pulp/repo_auth.conf
-        pattern = "^.*/rhui-debug[^/]+"
+        pattern = re.compile("^.*/rhui-debug[^/]+")
+        # go through the archive as it's listed, ticking off the files found
+        not_found = set(filelist)
         _, stdout, _ = connection.exec_command("tar tf %s" % archive)
-        archive_filelist_raw = stdout.read().decode().splitlines()
-        archive_filelist = [re.sub(pattern, "", path) for path in archive_filelist_raw]
-        missing_files = [f for f in filelist if f not in archive_filelist]
+        try:
+            for path in Util.iter_lines(stdout):
+                not_found.discard(pattern.sub("", path, 1))
+                if not not_found:
+                    break
+        finally:
+            # don't leave tar running (and its channel open) if it stopped early
+            stdout.channel.close()
+        missing_files = [f for f in filelist if f in not_found]
         nose.tools.ok_(not missing_files,
                        msg="Not found in the archive: %s" % missing_files)
@@ -2,8 +2,9 @@
 
 import re
 
-from stitches.expect import Expect
+from rhui3_tests_lib.expect import Expect
 
+from rhui3_tests_lib.facts import Facts
 from rhui3_tests_lib.helpers import Helpers
 
 class RHSMRHUI(object):
@@ -19,10 +20,14 @@ class RHSMRHUI(object):
             raise RuntimeError("The system is already registered.")
         if not username or not password:
             username, password = Helpers.get_credentials(connection)
-        Expect.expect_retval(connection,
-                             "subscription-manager register --force --type rhui " +
-                             "--username %s --password %s" % (username, password),
-                             timeout=60)
+        try:
+            Expect.expect_retval(connection,
+                                 "subscription-manager register --force --type rhui " +
+                                 "--username %s --password %s" % (username, password),
+                                 timeout=60)
+        finally:
+            # --force unregisters the system first, so even a failed attempt changes the facts
+            Facts.invalidate(connection)
 
     @staticmethod
     def attach_subscription(connection, sub):
@@ -55,4 +60,7 @@ class RHSMRHUI(object):
     @staticmethod
     def unregister_system(connection):
         """unregister from RHSM"""
-        Expect.expect_retval(connection, "subscription-manager unregister", timeout=20)
+        try:
+            Expect.expect_retval(connection, "subscription-manager unregister", timeout=20)
+        finally:
+            Facts.invalidate(connection)
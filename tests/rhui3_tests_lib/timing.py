@@ -0,0 +1,171 @@
+"""
+Timeouts learned from how long the steps took in previous runs
+
+Each named step (e.g. waiting for the rhui command to add a CDS node) has a default timeout,
+which used to be hard-coded. Wrap the step in Timing.step() to use an adaptive timeout instead:
+
+    with Timing.step("rhui.cds.add", 300) as timeout:
+        status = connection.recv_exit_status(command, timeout=timeout)
+
+The durations of the steps that succeed are stored per stack profile. Once a step has taken
+at least MIN_SAMPLES times, its timeout is the PERCENTILE of its durations times FACTOR, but at
+least FLOOR seconds and at most CAP_FACTOR times the default. Hung steps thus fail sooner,
+and steps that are slow in a given environment get more time than the default. The timeouts are
+whole numbers of seconds, as stitches expects. Only use this for steps whose duration doesn't
+depend on the amount of work (e.g. the number of repositories), which changes between tests.
+
+The durations are kept in the file that the RHUI_TIMINGS environment variable points to,
+or in DEFAULT_TIMINGS_FILE; set RHUI_TIMINGS to an empty string to use the defaults only.
+The profile is taken from the RHUI_PROFILE environment variable, so that e.g. stacks in different
+regions can be told apart. Nothing is learned while replaying recorded connections.
+"""
+
+import atexit
+from contextlib import contextmanager
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from rhui3_tests_lib.conmgr import ConMgr, REPLAY_ENV_VAR
+
+TIMINGS_ENV_VAR = "RHUI_TIMINGS"
+PROFILE_ENV_VAR = "RHUI_PROFILE"
+DEFAULT_TIMINGS_FILE = os.path.expanduser("~/.rhui3_timings.json")
+DEFAULT_PROFILE = "default"
+
+MIN_SAMPLES = 5
+HISTORY = 50
+PERCENTILE = 99
+FACTOR = 3
+FLOOR = 5
+CAP_FACTOR = 3
+
+_DURATIONS = {}
+_NEW_DURATIONS = {}
+_LOADED = []
+_LOCK = threading.Lock()
+
+def _timings_file():
+    '''
+    the path to the file with the durations, or an empty string if they aren't to be kept
+    '''
+    return os.environ.get(TIMINGS_ENV_VAR, DEFAULT_TIMINGS_FILE)
+
+def _read(path):
+    '''
+    the durations stored in the given file: {profile: {step: [seconds, ...]}}
+    '''
+    try:
+        with open(path) as timings_file:
+            return json.load(timings_file)
+    except (IOError, OSError, ValueError) as err:
+        if os.path.exists(path):
+            logging.warning("Cannot read the timings from %s: %s", path, err)
+        return {}
+
+def _durations(profile, step):
+    '''
+    the known durations of the step in the profile
+    '''
+    with _LOCK:
+        if not _LOADED:
+            path = _timings_file()
+            _DURATIONS.update(_read(path) if path else {})
+            _LOADED.append(path)
+        return list(_DURATIONS.get(profile, {}).get(step, []))
+
+def percentile(values, percent):
+    '''
+    the nearest-rank percentile of the values
+    '''
+    ordered = sorted(values)
+    rank = max(int(-(-len(ordered) * percent // 100)), 1)
+    return ordered[rank - 1]
+
+class Timing(object):
+    '''
+    Adaptive timeouts of named steps
+    '''
+    @staticmethod
+    def profile():
+        '''
+        return the name of the stack profile in use
+        '''
+        if os.environ.get(PROFILE_ENV_VAR):
+            return os.environ[PROFILE_ENV_VAR]
+        if ConMgr.get_simulator() is not None:
+            return "simulator"
+        return DEFAULT_PROFILE
+
+    @staticmethod
+    def timeout(step, default):
+        '''
+        return the timeout for the step, learned from its durations or the default
+        '''
+        durations = _durations(Timing.profile(), step)
+        if len(durations) < MIN_SAMPLES:
+            return default
+        learned = max(percentile(durations, PERCENTILE) * FACTOR, FLOOR)
+        return int(math.ceil(min(learned, default * CAP_FACTOR)))
+
+    @staticmethod
+    def record(step, duration):
+        '''
+        remember that the step took the given number of seconds
+        '''
+        if os.environ.get(REPLAY_ENV_VAR):
+            return
+        profile = Timing.profile()
+        _durations(profile, step)
+        with _LOCK:
+            for durations in [_DURATIONS, _NEW_DURATIONS]:
+                steps = durations.setdefault(profile, {}).setdefault(step, [])
+                steps.append(round(duration, 3))
+                del steps[:-HISTORY]
+
+    @staticmethod
+    @contextmanager
+    def step(step, default):
+        '''
+        time the step, which is to use the yielded timeout; only record the duration
+        if the step completes without an exception (steps that can fail otherwise, e.g. with
+        an exit status, should use timeout() and record() instead)
+        '''
+        timeout = Timing.timeout(step, default)
+        if timeout != default:
+            logging.debug("Using a timeout of %.1f s for %s instead of %s s",
+                          timeout, step, default)
+        start = time.time()
+        yield timeout
+        Timing.record(step, time.time() - start)
+
+    @staticmethod
+    def save():
+        '''
+        add the durations recorded in this process to the file
+        '''
+        with _LOCK:
+            new_durations = dict(_NEW_DURATIONS)
+            _NEW_DURATIONS.clear()
+        path = _timings_file()
+        if not new_durations or not path:
+            return
+        # other processes may have saved their durations in the meantime
+        durations = _read(path)
+        for profile, steps in new_durations.items():
+            for step, seconds in steps.items():
+                stored = durations.setdefault(profile, {}).setdefault(step, [])
+                stored.extend(seconds)
+                del stored[:-HISTORY]
+        temporary_path = "%s.%d" % (path, os.getpid())
+        try:
+            with open(temporary_path, "w") as timings_file:
+                json.dump(durations, timings_file, indent=1, sort_keys=True)
+            os.rename(temporary_path, path)
+        except (IOError, OSError) as err:
+            logging.warning("Cannot save the timings to %s: %s", path, err)
+
+atexit.register(Timing.save)
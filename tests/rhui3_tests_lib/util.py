@@ -1,16 +1,22 @@
 """ Utility functions """
 
+import codecs
 import os
 import random
 import re
 import string
-import tempfile
 import time
 import yaml
 
-from stitches.expect import Expect, ExpectFailed
-
+from rhui3_tests_lib.batch import exit_statuses
 from rhui3_tests_lib.conmgr import ConMgr, DOMAIN
+from rhui3_tests_lib.expect import Expect, ExpectFailed
+from rhui3_tests_lib.facts import Facts
+from rhui3_tests_lib.fanout import fan_out
+from rhui3_tests_lib.screen import strip_ansi
+
+STREAM_CHUNK_SIZE = 1048576
+LINE_CHUNK_SIZE = 65536
 
 class Util(object):
     '''
@@ -19,12 +25,7 @@ class Util(object):
     @staticmethod
     def uncolorify(instr):
         """ Remove colorification """
-        res = instr.replace("\x1b", "")
-        res = res.replace("[91m", "")
-        res = res.replace("[92m", "")
-        res = res.replace("[93m", "")
-        res = res.replace("[0m", "")
-        return res
+        return strip_ansi(instr)
 
     @staticmethod
     def generate_gpg_key(connection,
@@ -104,17 +105,83 @@ class Util(object):
         If "pedantic", fail if the rpmlist contains one or more packages that are not installed.
         Otherwise, ignore such packages, remove whatever *is* installed (if anything).
         '''
-        installed = [rpm for rpm in rpmlist if connection.recv_exit_status("rpm -q %s" % rpm) == 0]
+        statuses = exit_statuses(connection, ["rpm -q %s" % rpm for rpm in rpmlist])
+        installed = [rpm for rpm, status in zip(rpmlist, statuses) if status == 0]
         if installed:
             Expect.expect_retval(connection, "rpm -e %s" % ' '.join(installed), timeout=60)
+            Facts.invalidate(connection)
         if pedantic and installed != rpmlist:
             raise OSError("%s: not installed, could not remove" % (set(rpmlist) - set(installed)))
 
+    @staticmethod
+    def iter_lines(channel_file, chunk_size=LINE_CHUNK_SIZE):
+        '''
+        Yield the lines (without line endings) of a command's output as it arrives, decoding it
+        chunk by chunk; only the current chunk and line are kept in local memory.
+        '''
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        pending = ""
+        while True:
+            chunk = channel_file.read(chunk_size)
+            text = decoder.decode(chunk, not chunk)
+            if text:
+                lines = (pending + text).split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    yield line[:-1] if line.endswith("\r") else line
+            if not chunk:
+                break
+        if pending:
+            yield pending
+
+    @staticmethod
+    def command_lines(connection, command):
+        '''
+        Run a command and yield the lines of its output as they arrive.
+        '''
+        _, stdout, _ = connection.exec_command(command)
+        return Util.iter_lines(stdout)
+
+    @staticmethod
+    def stream_file(source_connection, source_path, target_connections, target_path,
+                    chunk_size=STREAM_CHUNK_SIZE):
+        '''
+        Copy a file from a remote host to one or more other remote hosts chunk by chunk,
+        reading the source only once and keeping at most one chunk in local memory.
+        '''
+        source = source_connection.sftp.open(source_path, "rb")
+        targets = []
+        try:
+            for connection in target_connections:
+                target = connection.sftp.open(target_path, "wb")
+                # don't wait for an acknowledgement of each write
+                target.set_pipelined(True)
+                targets.append(target)
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                for target in targets:
+                    target.write(chunk)
+        finally:
+            source.close()
+            for target in targets:
+                target.close()
+
     @staticmethod
     def install_pkg_from_rhua(rhua_connection, target_connection, pkgpath, allow_update=False):
         '''
         Transfer a package from the RHUA to the target node and install it there.
         '''
+        Util.install_pkg_from_rhua_many(rhua_connection, [target_connection], pkgpath, allow_update)
+
+    @staticmethod
+    def install_pkg_from_rhua_many(rhua_connection, target_connections, pkgpath,
+                                   allow_update=False):
+        '''
+        Transfer a package from the RHUA to all the target nodes and install it there,
+        reading the package on the RHUA only once and installing it on the targets concurrently.
+        '''
         # the package can be an RPM file to install/update using rpm -- typically a RHUI client
         # configuration RPM,
         # or it can be a gzipped tarball -- typically an Atomic client configuration package
@@ -129,16 +196,21 @@ class Util(object):
             raise ValueError("%s has an unsupported file extension. Supported extensions are: %s" %\
                              (pkgpath, list(supported_extensions.values())))
 
-        local_file = tempfile.NamedTemporaryFile(delete=False)
-        local_file.close()
+        # the package goes straight from the RHUA to the targets, not via a local file
+        Util.stream_file(rhua_connection, pkgpath, target_connections, target_file_name)
 
-        rhua_connection.sftp.get(pkgpath, local_file.name)
-        target_connection.sftp.put(local_file.name, target_file_name)
-
-        Expect.expect_retval(target_connection, cmd)
+        def _install(target_connection):
+            try:
+                Expect.expect_retval(target_connection, cmd)
+            finally:
+                Facts.invalidate(target_connection)
+                Expect.expect_retval(target_connection, "rm -f %s" % target_file_name)
 
-        os.unlink(local_file.name)
-        Expect.expect_retval(target_connection, "rm -f %s" % target_file_name)
+        if len(target_connections) == 1:
+            # keep the original exception if there's just one target
+            _install(target_connections[0])
+        else:
+            fan_out(target_connections, _install).check()
 
     @staticmethod
     def get_initial_password(connection):
@@ -171,22 +243,15 @@ class Util(object):
         '''
         get RHEL X.Y version (dict with two integers representing the major and minor version)
         '''
-        _, stdout, _ = connection.exec_command(r"egrep -o '[0-9]+\.[0-9]+' /etc/redhat-release")
-        version = stdout.read().decode().strip().split(".")
-        try:
-            version_dict = {"major": int(version[0]), "minor": int(version[1])}
-            return version_dict
-        except ValueError:
-            return None
+        version = Facts.get(connection, "rhel_version")
+        return dict(version) if version else None
 
     @staticmethod
     def get_arch(connection):
         '''
         get machine architecture; note that ARM64 is presented as aarch64.
         '''
-        _, stdout, _ = connection.exec_command("arch")
-        arch = stdout.read().decode().strip()
-        return arch
+        return Facts.get(connection, "arch")
 
     @staticmethod
     def format_repo(name, version="", kind=""):
@@ -206,9 +271,7 @@ class Util(object):
         '''
         return a list of RPM files in the directory
         '''
-        _, stdout, _ = connection.exec_command("cd %s && ls -w1 *.rpm" % directory)
-        rpms = stdout.read().decode().splitlines()
-        return rpms
+        return list(Util.command_lines(connection, "cd %s && ls -w1 *.rpm" % directory))
 
     @staticmethod
     def restart_if_present(connection, service):
@@ -233,17 +296,20 @@ class Util(object):
         Expect.ping_pong(connection,
                          "yumdownloader --url %s" % package_escaped,
                          "https://%s/pulp/repos/%s.*%s" % \
-                         (ConMgr.get_cds_lb_hostname(), path, package_escaped))
+                         (ConMgr.get_cds_lb_hostname(), path, package_escaped),
+                         60)
 
     @staticmethod
     def cert_expired(connection, cert):
         '''
         check if the certificate has already expired, return true if so
         '''
-        file_exists = connection.recv_exit_status("test -f %s" % cert) == 0
-        if not file_exists:
+        file_status, check_status = exit_statuses(connection,
+                                                  ["test -f %s" % cert,
+                                                   "openssl x509 -checkend -noout -in %s" % cert])
+        if file_status != 0:
             raise OSError("%s does not exist" % cert)
-        return connection.recv_exit_status("openssl x509 -checkend -noout -in %s" % cert) == 1
+        return check_status == 1
 
     @staticmethod
     def fetch(connection, source, dest):
@@ -1,9 +1,10 @@
 """Functions for Yum Commands and Repodata Handling"""
 
-from stitches.expect import Expect
 import xmltodict
 
+from rhui3_tests_lib.expect import Expect
 from rhui3_tests_lib.rhuimanager_cmdline import RHUIManagerCLI
+from rhui3_tests_lib.util import Util
 
 class Yummy(object):
     """various functions to test yum commands and repodata"""
@@ -12,7 +13,7 @@ class Yummy(object):
         """return the path to the repository file (on the RHUA) of the given data type"""
         # data types are : filelists, group, primary, updateinfo etc.
         base_path = "/var/lib/rhui/remote_share/published/yum/https/repos"
-        relative_path = RHUIManagerCLI.repo_info(connection, repo)["relativepath"]
+        relative_path = RHUIManagerCLI.repo_info(connection, repo).relative_path
         repodata_file = "%s/%s/repodata/repomd.xml" % (base_path, relative_path)
         _, stdout, _ = connection.exec_command("cat %s " % repodata_file)
         repodata = xmltodict.parse(stdout.read())
@@ -65,23 +66,18 @@ class Yummy(object):
         """return a sorted list of yum groups available to the client"""
         # first clean metadata, which may contain outdated information
         Expect.expect_retval(connection, "yum clean all")
-        # fetch the complete output from the command
-        _, stdout, _ = connection.exec_command("yum grouplist")
-        all_lines = stdout.read().decode().splitlines()
         # yum groups are on lines that start with three spaces
-        grouplist = [line.strip() for line in all_lines if line.startswith("   ")]
-        return sorted(grouplist)
+        return sorted(line.strip() for line in Util.command_lines(connection, "yum grouplist")
+                      if line.startswith("   "))
 
     @staticmethod
     def yum_group_packages(connection, group):
         """return a sorted list of packages available to the client in the given yum group"""
-        # fetch the complete output from the command
-        _, stdout, _ = connection.exec_command("yum groupinfo '%s'" % group)
-        all_lines = stdout.read().decode().splitlines()
         # packages are on lines that start with three spaces
-        packagelist = [line.strip() for line in all_lines if line.startswith("   ")]
         # in addition, the package names can start with +, -, or = depending on the status
         # (see man yum -> groups)
         # so, let's remove such signs if they're present
-        packagelist = [pkg[1:] if pkg[0] in ["+", "-", "="] else pkg for pkg in packagelist]
-        return sorted(packagelist)
+        packages = (line.strip() for line in
+                    Util.command_lines(connection, "yum groupinfo '%s'" % group)
+                    if line.startswith("   "))
+        return sorted(pkg[1:] if pkg[0] in ["+", "-", "="] else pkg for pkg in packages)